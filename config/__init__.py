@@ -0,0 +1,29 @@
+__version__ = '1.0.0'
+
+import importlib
+
+# Библиотечный интерфейс импортируется при первом обращении (PEP 562): CLI и модули
+# пакета не платят за api, asyncio и всё, что они тянут за собой
+_EXPORTS = {
+    'load': 'config.api',
+    'loads': 'config.api',
+    'select': 'config.api',
+    'cache_info': 'config.api',
+    'cache_clear': 'config.api',
+    'aload': 'config.aio',
+    'aload_many': 'config.aio',
+}
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'config' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,121 @@
+"""Загрузка конфигураций из asyncio без блокировки цикла событий.
+
+aload() и aload_many() читают и компилируют файлы в пуле потоков или процессов.
+Пул потоков использует общий кеш config.load(); процессы компилируют параллельно,
+но у каждого свой кеш, а результат передаётся обратно копией.
+
+Тайм-аут и отмена освобождают вызывающего сразу, но уже начатая компиляция
+в потоке или процессе не прерывается: она доработает в фоне, а результат
+будет отброшен. Задачи, ещё ждущие в очереди пула, не запускаются вовсе.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from config.api import freeze, load
+
+EXECUTORS = ('thread', 'process')
+
+
+class LoadResult:
+    def __init__(self, path, config=None, error=None, seconds=0.0, compile_seconds=None):
+        self.path = path
+        self.config = config
+        # Исключение загрузки (TimeoutError при тайм-ауте) или None
+        self.error = error
+        # Задержка от постановки в очередь до результата, включая ожидание свободного исполнителя
+        self.seconds = seconds
+        # Время чтения и компиляции в исполнителе (None, если результата нет)
+        self.compile_seconds = compile_seconds
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return f"LoadResult({self.path!r}, ok={self.ok}, seconds={self.seconds:.3f})"
+
+
+def _timed_load(path, copy):
+    started = time.perf_counter()
+    config = load(path, copy)
+    return config, time.perf_counter() - started
+
+
+def _timed_load_plain(path):
+    # Выполняется в другом процессе: MappingProxyType не передаётся через pickle
+    started = time.perf_counter()
+    config = load(path, copy=True)
+    return config, time.perf_counter() - started
+
+
+async def _load(path, executor, copy, timeout):
+    loop = asyncio.get_running_loop()
+    path = os.path.abspath(os.fspath(path))
+    in_process = isinstance(executor, ProcessPoolExecutor)
+    if in_process:
+        future = loop.run_in_executor(executor, _timed_load_plain, path)
+    else:
+        future = loop.run_in_executor(executor, _timed_load, path, copy)
+    try:
+        config, seconds = await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Loading '{path}' timed out after {timeout}s") from None
+    if in_process and not copy:
+        # Неизменяемое представление строится тоже вне цикла событий
+        config = await loop.run_in_executor(None, freeze, config)
+    return config, seconds
+
+
+def _pool(executor, workers):
+    # (исполнитель, созданный для вызова пул или None) по параметру executor
+    if executor is None or isinstance(executor, Executor):
+        return executor, None
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor}', expected one of {', '.join(EXECUTORS)}")
+    pool = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+    owned = pool(max_workers=workers)
+    return owned, owned
+
+
+async def aload(path, copy=False, executor=None, timeout=None):
+    """Асинхронный config.load(): path компилируется в executor.
+
+    executor - None или 'thread' (пул потоков цикла событий), 'process' (процесс,
+    создаваемый на время вызова) или готовый concurrent.futures.Executor.
+    timeout - предельное время в секундах, по истечении выбрасывается TimeoutError.
+    """
+    executor, owned = _pool(None if executor == 'thread' else executor, 1)
+    try:
+        return (await _load(path, executor, copy, timeout))[0]
+    finally:
+        if owned is not None:
+            owned.shutdown(wait=False, cancel_futures=True)
+
+
+async def aload_many(paths, copy=False, executor='thread', max_workers=None, timeout=None):
+    """Загружает файлы параллельно и возвращает список LoadResult в порядке paths.
+
+    executor - 'thread', 'process' (пул на max_workers исполнителей создаётся на время
+    вызова) или готовый concurrent.futures.Executor, которым управляет вызывающий.
+    timeout ограничивает загрузку каждого файла. Ошибка одного файла не прерывает
+    остальные и попадает в LoadResult.error. Отмена aload_many отменяет все загрузки.
+    """
+    paths = list(paths)
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(paths)))
+    executor, owned = _pool(executor, workers)
+
+    async def load_one(path):
+        started = time.perf_counter()
+        try:
+            config, seconds = await _load(path, executor, copy, timeout)
+        except Exception as e:
+            return LoadResult(str(path), error=e, seconds=time.perf_counter() - started)
+        return LoadResult(str(path), config, None, time.perf_counter() - started, seconds)
+
+    try:
+        return await asyncio.gather(*(load_one(path) for path in paths))
+    finally:
+        if owned is not None:
+            # Не ждём задач, продолжающих работу после тайм-аута или отмены
+            owned.shutdown(wait=False, cancel_futures=True)
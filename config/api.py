@@ -0,0 +1,153 @@
+"""Библиотечный интерфейс: config.load(path) и config.loads(text).
+
+Результаты load() хранятся в ограниченном LRU-кеше процесса. Ключ - путь, mtime,
+размер и inode файла, поэтому повторная загрузка неизменённого файла стоит одного
+вызова stat (и ещё по одному на каждый файл, включённый через include).
+По умолчанию возвращается неизменяемое представление (MappingProxyType для структур,
+tuple для массивов), общее для всех вызовов; copy=True возвращает независимую копию
+из обычных dict и list.
+"""
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from collections.abc import Mapping
+from types import MappingProxyType
+from config.evaluator import Evaluator
+from config.pipeline import prepare_ast
+from config.selection import select_source
+
+DEFAULT_CACHE_SIZE = 64
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+def loads(text, copy=False):
+    """Компилирует текст конфигурации; результат не кешируется"""
+    return _convert(Evaluator(share_structs=True).evaluate(prepare_ast(text)), frozen=not copy)
+
+
+def freeze(data):
+    """Неизменяемое представление результата: MappingProxyType для структур, tuple для массивов"""
+    return _convert(data, frozen=True)
+
+
+def thaw(data):
+    """Независимая копия результата из обычных dict и list"""
+    return _convert(data, frozen=False)
+
+
+def select(path, paths):
+    """Значения по путям с точками из файла: dict путь -> значение.
+
+    Разбираются и вычисляются только поля и константы, нужные этим путям;
+    результат не кешируется. Нет пути - KeyError.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return select_source(f, paths, path=path)
+
+
+class LoadCache:
+    """LRU-кеш результатов load() по идентичности файла"""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # ключ -> (неизменяемое представление, ключи включённых файлов); порядок - от давно использованных к недавним
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, path, copy=False):
+        path = os.path.abspath(os.fspath(path))
+        key = _file_key(path, os.stat(path))
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and _dependencies_unchanged(entry[1]):
+            with self._lock:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            view = entry[0]
+        else:
+            view = self._compile(path)
+        return _convert(view, frozen=False) if copy else view
+
+    def _compile(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            # Ключ берётся у открытого файла: даже если файл заменят во время чтения,
+            # запись кеша будет соответствовать прочитанному содержимому
+            key = _file_key(path, os.fstat(f.fileno()))
+            ast = prepare_ast(f, path=path)
+        # Включённые файлы проверяются stat при каждом попадании
+        dependencies = [_file_key(dependency, os.stat(dependency)) for dependency in ast['dependencies']]
+        view = _convert(Evaluator(share_structs=True).evaluate(ast), frozen=True)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (view, dependencies)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return view
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def _file_key(path, stat):
+    return path, stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def _dependencies_unchanged(dependencies):
+    try:
+        return all(_file_key(key[0], os.stat(key[0])) == key for key in dependencies)
+    except OSError:
+        return False
+
+
+def _convert(data, frozen):
+    # Вложенный dict оборачивается в MappingProxyType до заполнения: представление
+    # видит последующие изменения. Общие (одинаковые) структуры результата
+    # в неизменяемом виде остаются общими,
+    # а изменяемая копия получает отдельный dict на каждое вхождение
+    root = {}
+    shared = {}
+    stack = [(data, root)]
+    while stack:
+        source, target = stack.pop()
+        for key, value in source.items():
+            if isinstance(value, Mapping):
+                if frozen and id(value) in shared:
+                    target[key] = shared[id(value)]
+                    continue
+                child = {}
+                target[key] = MappingProxyType(child) if frozen else child
+                if frozen:
+                    shared[id(value)] = target[key]
+                stack.append((value, child))
+            elif isinstance(value, (list, tuple)):
+                target[key] = tuple(value) if frozen else list(value)
+            else:
+                target[key] = value
+    return MappingProxyType(root) if frozen else root
+
+
+_cache = LoadCache()
+
+
+def load(path, copy=False):
+    """Загружает файл конфигурации, повторные вызовы для неизменённого файла берутся из кеша"""
+    return _cache.load(path, copy)
+
+
+def cache_info():
+    return _cache.info()
+
+
+def cache_clear():
+    _cache.clear()
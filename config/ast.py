@@ -1,27 +1,69 @@
+# Узлы объявлены со __slots__: в больших файлах их миллионы, а словарь
+# атрибутов у каждого экземпляра занимал бы больше памяти, чем сам исходник
+
 class Node:
-    pass
+    __slots__ = ()
 
 class ConstDeclaration(Node):
+    __slots__ = ('name', 'value_node')
+
     def __init__(self, name, value_node):
         self.name = name
         self.value_node = value_node
 
 class Struct(Node):
+    __slots__ = ('fields',)
+
     def __init__(self, fields=None):
         self.fields = fields if fields is not None else {}
 
 class Number(Node):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
 class ConstExpression(Node):
-    def __init__(self, tokens):
+    __slots__ = ('tokens', 'program', 'names')
+
+    def __init__(self, tokens, names=None):
         self.tokens = tokens
+        # Имена констант в выражении; None - ещё не выделены (см. config.dependencies)
+        self.names = names
+        # Скомпилированная программа выражения (см. config.expressions)
+        self.program = None
+
+class Array(Node):
+    __slots__ = ('items',)
+
+    def __init__(self, items=None):
+        self.items = items if items is not None else []
 
 class Identifier(Node):
+    __slots__ = ('name',)
+
     def __init__(self, name):
         self.name = name
 
 class String(Node):
+    __slots__ = ('value',)
+
     def __init__(self, value):
-        self.value = value
\ No newline at end of file
+        self.value = value
+
+class Include(Node):
+    __slots__ = ('path', 'position', 'index')
+
+    def __init__(self, path, position=None, index=0):
+        self.path = path
+        self.position = position
+        # Сколько констант файла объявлено до include: место вставки включаемых объявлений
+        self.index = index
+
+class TemplateInstance(Node):
+    __slots__ = ('name', 'overrides')
+
+    def __init__(self, name, overrides):
+        # Имя { Поле = значение, ... }: структура-константа name с заменёнными полями
+        self.name = name
+        self.overrides = overrides
@@ -0,0 +1,149 @@
+import glob
+import os
+import sys
+import time
+from pathlib import Path
+from config.formats import FORMATS, DEFAULT_FORMAT
+from config.pipeline import prepare_ast, write_ast
+
+GLOB_CHARS = '*?['
+
+
+class BatchResult:
+    def __init__(self, input_path, output_path, error=None, seconds=0.0, cached=False,
+                 dependencies=()):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.error = error
+        self.seconds = seconds
+        self.cached = cached
+        # Абсолютные пути файлов, включённых через include
+        self.dependencies = list(dependencies)
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return f"BatchResult({self.input_path!r}, ok={self.ok})"
+
+
+def collect_inputs(source):
+    """Возвращает (базовый каталог, список входных файлов).
+
+    source - каталог (берутся все *.conf рекурсивно), glob-шаблон
+    или файл-манифест со списком путей, по одному на строку.
+    """
+    if any(char in source for char in GLOB_CHARS):
+        # Базовый каталог - часть шаблона до первого спецсимвола
+        prefix = source[:min(source.index(c) for c in GLOB_CHARS if c in source)]
+        base_dir = Path(prefix[:prefix.rfind(os.sep) + 1] or '.')
+        inputs = [Path(p) for p in sorted(glob.glob(source, recursive=True)) if os.path.isfile(p)]
+        return base_dir, inputs
+
+    path = Path(source)
+    if path.is_dir():
+        return path, sorted(p for p in path.rglob('*.conf') if p.is_file())
+    if path.is_file():
+        return _read_manifest(path)
+    raise FileNotFoundError(f"Batch source '{source}' does not exist")
+
+
+def _read_manifest(manifest_path):
+    inputs = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            # Относительные пути в манифесте считаются от его каталога
+            inputs.append(manifest_path.parent / line)
+    if not inputs:
+        return manifest_path.parent, inputs
+    base_dir = Path(os.path.commonpath([os.path.abspath(p.parent) for p in inputs]))
+    return base_dir, [Path(os.path.abspath(p)) for p in inputs]
+
+
+def output_path_for(input_path, base_dir, output_dir, output_format=DEFAULT_FORMAT):
+    """Путь выходного файла в дереве output_dir, повторяющем дерево входных файлов"""
+    relative = Path(os.path.relpath(input_path, base_dir))
+    return Path(output_dir) / relative.with_suffix(FORMATS[output_format])
+
+
+def compile_file(input_path, output_path, cache=None, output_format=DEFAULT_FORMAT):
+    """Компилирует один файл, возвращает BatchResult вместо исключения"""
+    started = time.perf_counter()
+    error = None
+    cache_key = None
+    dependencies = []
+    try:
+        if cache is not None:
+            cache_key = cache.key_for(input_path, output_format)
+            if cache.fetch(cache_key, output_path, output_format):
+                dependencies = [path for path, _ in cache.dependencies(cache_key)]
+                return BatchResult(str(input_path), str(output_path), None,
+                                   time.perf_counter() - started, cached=True,
+                                   dependencies=dependencies)
+        with open(input_path, 'r', encoding='utf-8') as f:
+            ast = prepare_ast(f, path=input_path)
+        dependencies = ast['dependencies']
+    except SyntaxError as e:
+        error = f"Syntax error: {str(e)}"
+    except (OSError, UnicodeDecodeError) as e:
+        error = f"Error reading input file: {str(e)}"
+    except Exception as e:
+        error = f"Processing error: {str(e)}"
+    else:
+        try:
+            write_ast(ast, output_path, output_format)
+        except OSError as e:
+            error = f"Error writing output file: {str(e)}"
+        except Exception as e:
+            error = f"Processing error: {str(e)}"
+        else:
+            store_in_cache(cache, cache_key, output_path, dependencies, output_format)
+    return BatchResult(str(input_path), str(output_path), error, time.perf_counter() - started,
+                       dependencies=dependencies)
+
+
+def store_in_cache(cache, cache_key, output_path, dependencies=(), output_format=DEFAULT_FORMAT):
+    # Ошибка записи в кеш не должна ломать сборку
+    if cache is None or cache_key is None:
+        return
+    try:
+        cache.store(cache_key, output_path, dependencies, output_format)
+    except OSError as e:
+        sys.stderr.write(f"Warning: cannot store '{output_path}' in cache: {str(e)}\n")
+
+
+def _compile_task(task):
+    return compile_file(*task)
+
+
+def run_batch(inputs, base_dir, output_dir, jobs=None, cache=None, output_format=DEFAULT_FORMAT):
+    """Компилирует файлы на пуле из jobs процессов, результаты - в порядке inputs"""
+    tasks = [(p, output_path_for(p, base_dir, output_dir, output_format), cache, output_format)
+             for p in inputs]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(tasks) <= 1:
+        return [_compile_task(task) for task in tasks]
+
+    # Пул процессов импортируется только в пакетном режиме: в одиночной сборке это
+    # заметная часть времени запуска
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+        # Небольшие пачки задач снижают накладные расходы на передачу между процессами
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        return list(executor.map(_compile_task, tasks, chunksize=chunksize))
+
+
+def print_summary(results, stream=None):
+    failed = 0
+    for result in results:
+        if result.ok:
+            note = ', cached' if result.cached else ''
+            print(f"OK    {result.input_path} -> {result.output_path} ({result.seconds:.3f}s{note})", file=stream)
+        else:
+            failed += 1
+            print(f"FAIL  {result.input_path}: {result.error}", file=stream)
+    print(f"{len(results)} files: {len(results) - failed} succeeded, {failed} failed", file=stream)
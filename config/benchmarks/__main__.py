@@ -0,0 +1,3 @@
+from config.benchmarks.runner import main
+
+main()
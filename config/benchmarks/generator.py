@@ -0,0 +1,126 @@
+"""Генератор синтетических конфигураций с настраиваемыми размерами"""
+import random
+
+ASCII_CHARS = 'abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+UNICODE_CHARS = 'абвгдеёжзийклмнопрстуфхцчшщыэюяАБВГДЕЖЗИЙКЛМНОПРСТУФХЦЧШЩЭЮЯ²—«»'
+OPERATORS = ('+', '-', '*')
+
+
+class ConfigGenerator:
+    """Строит текст конфигурации.
+
+    constants         - число объявлений констант
+    width             - число скалярных полей в каждой структуре
+    depth             - глубина вложенности структур
+    branching         - число вложенных структур в каждой структуре (кроме листовых)
+    expression_length - число операндов в выражениях .[ ... ].
+    string_size       - длина строковых литералов в символах
+    unicode_share     - доля не-ASCII символов в строках (0..1)
+    comment_density   - вероятность комментария <# ... #> перед полем (0..1)
+    repeated_leaves   - сколько разных листовых структур; листья выбираются из них,
+                        как в сгенерированных конфигурациях (0 - все листья разные)
+    """
+
+    def __init__(self, constants=20, width=8, depth=3, branching=2, expression_length=3,
+                 string_size=24, unicode_share=0.3, comment_density=0.1, repeated_leaves=0, seed=0):
+        self.constants = constants
+        self.width = width
+        self.depth = depth
+        self.branching = branching
+        self.expression_length = expression_length
+        self.string_size = string_size
+        self.unicode_share = unicode_share
+        self.comment_density = comment_density
+        self.repeated_leaves = repeated_leaves
+        self._leaves = {}
+        self.random = random.Random(seed)
+
+    def generate(self):
+        parts = []
+        for index in range(self.constants):
+            parts.append(self._comment())
+            parts.append(f'C{index} := {self._constant_value(index)};\n')
+
+        parts.append('struct {\n')
+        stack = [(0, self._field_kinds(0))]
+        while stack:
+            level, kinds = stack[-1]
+            indent = '    ' * (level + 1)
+            for number, kind in kinds:
+                parts.append(self._comment(indent))
+                if kind == 'struct':
+                    parts.append(f'{indent}S{number} = struct {{\n')
+                    if self.repeated_leaves and level + 1 == self.depth:
+                        parts.append(self._leaf_body(level + 1))
+                        continue
+                    stack.append((level + 1, self._field_kinds(level + 1)))
+                    break
+                parts.append(f'{indent}F{number} = {self._scalar()},\n')
+            else:
+                stack.pop()
+                parts.append('    ' * level + ('}' if level == 0 else '},') + '\n')
+        return ''.join(parts)
+
+    def _leaf_body(self, level):
+        # Поля и закрывающая скобка одной из repeated_leaves листовых структур
+        index = self.random.randrange(self.repeated_leaves)
+        body = self._leaves.get(index)
+        if body is None:
+            indent = '    ' * (level + 1)
+            lines = [f'{indent}F{number} = {self._scalar()},\n' for number in range(self.width)]
+            body = self._leaves[index] = ''.join(lines) + '    ' * level + '},\n'
+        return body
+
+    def _field_kinds(self, level):
+        kinds = [(number, 'scalar') for number in range(self.width)]
+        if level < self.depth:
+            kinds += [(number, 'struct') for number in range(self.branching)]
+        return iter(kinds)
+
+    def _constant_value(self, index):
+        if index > 0 and self.expression_length > 1 and self.random.random() < 0.5:
+            return self._expression(limit=index)
+        return self._number()
+
+    def _scalar(self):
+        choice = self.random.random()
+        if choice < 0.3:
+            return self._number()
+        if choice < 0.6 and self.string_size > 0:
+            return self._string()
+        if choice < 0.8 and self.constants:
+            return f'C{self.random.randrange(self.constants)}'
+        return self._expression(limit=self.constants)
+
+    def _number(self):
+        if self.random.random() < 0.5:
+            return str(self.random.randint(0, 10000))
+        return f'{self.random.uniform(0, 1000):.4f}'
+
+    def _string(self):
+        chars = []
+        for _ in range(self.string_size):
+            pool = UNICODE_CHARS if self.random.random() < self.unicode_share else ASCII_CHARS
+            chars.append(self.random.choice(pool))
+        return '"' + ''.join(chars) + '"'
+
+    def _operand(self, limit):
+        if limit and self.random.random() < 0.5:
+            return f'C{self.random.randrange(limit)}'
+        return str(self.random.randint(1, 100))
+
+    def _expression(self, limit):
+        tokens = [self._operand(limit)]
+        for _ in range(self.expression_length - 1):
+            tokens.append(self._operand(limit))
+            tokens.append(self.random.choice(OPERATORS))
+        return '.[' + ' '.join(tokens) + '].'
+
+    def _comment(self, indent=''):
+        if self.random.random() >= self.comment_density:
+            return ''
+        return f'{indent}<# {self._string()[1:-1]} #>\n'
+
+
+def generate_config(**params):
+    return ConfigGenerator(**params).generate()
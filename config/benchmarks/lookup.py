@@ -0,0 +1,79 @@
+"""Чтение нескольких ключей из большой конфигурации: JSON против двоичного формата.
+
+Для каждого формата замеряется открытие файла и чтение путей --keys: время и пиковая
+память Python (tracemalloc; страницы mmap в неё не входят и подгружаются по мере чтения).
+
+Запуск: python -m config.benchmarks.lookup [--size-mb N] [--keys PATH ...]
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import timeit
+import tracemalloc
+from pathlib import Path
+
+from config.binary import open_binary
+from config.evaluator import Evaluator
+from config.formats import write_output
+from config.lexer import Lexer
+from config.parser import Parser
+from config.benchmarks.memory import synthetic_config
+
+DEFAULT_KEYS = ['Field0.Name', 'Field1000.Mana', 'Field5000.Value']
+
+
+def read_json(path, keys):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    values = []
+    for key in keys:
+        node = data
+        for part in key.split('.'):
+            node = node[part]
+        values.append(node)
+    return values
+
+
+def read_binary(path, keys):
+    with open_binary(path) as config:
+        return [config[key] for key in keys]
+
+
+def measure(function, repeat):
+    seconds = min(timeit.repeat(function, number=1, repeat=repeat))
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Key lookup benchmark for output formats')
+    parser.add_argument('--size-mb', type=float, default=4)
+    parser.add_argument('--keys', nargs='+', default=DEFAULT_KEYS)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    ast = Parser(Lexer(synthetic_config(args.size_mb)).tokenize()).parse()
+    temp_dir = Path(tempfile.mkdtemp())
+    try:
+        json_path = temp_dir / 'config.json'
+        binary_path = temp_dir / 'config.cfgb'
+        write_output(ast, json_path, 'compact', Evaluator())
+        write_output(ast, binary_path, 'binary', Evaluator())
+        if read_json(json_path, args.keys) != read_binary(binary_path, args.keys):
+            raise AssertionError("Formats returned different values")
+
+        print(f"{'format':<10}{'file KB':>12}{'open+read ms':>16}{'peak KB':>12}")
+        for name, path, reader in (('json', json_path, read_json), ('binary', binary_path, read_binary)):
+            seconds, peak = measure(lambda: reader(path, args.keys), args.repeat)
+            print(f"{name:<10}{path.stat().st_size / 1024:>12.1f}{seconds * 1000:>16.3f}"
+                  f"{peak / 1024:>12.1f}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Память на мегабайт входа: список Token, компактный TokenBuffer и AST.
+
+Запуск: python -m config.benchmarks.memory [--size-mb N]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from config.lexer import Lexer
+from config.parser import Parser
+
+
+def synthetic_config(size_mb):
+    """Конфигурация примерно заданного размера из однотипных полей"""
+    lines = ['BaseInt := 20;', 'struct {']
+    size = 0
+    index = 0
+    while size < size_mb * 1024 * 1024:
+        line = (f'    Field{index} = struct {{ Name = "Поле {index}", Value = {index}, '
+                f'Mana = .[BaseInt {index} *]., Ref = BaseInt }},')
+        lines.append(line)
+        size += len(line.encode('utf-8')) + 1
+        index += 1
+    lines.append('}')
+    return '\n'.join(lines)
+
+
+def measure(build):
+    """Размер в байтах того, что build() оставляет в памяти, и пиковая память при построении"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Token and AST memory benchmark')
+    parser.add_argument('--size-mb', type=float, default=8, help='Synthetic input size in MB')
+    args = parser.parse_args()
+
+    text = synthetic_config(args.size_mb)
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+    compact = Lexer(text).tokenize_compact()
+
+    rows = [
+        ('Token list (tokenize)', lambda: Lexer(text).tokenize()),
+        ('TokenBuffer (tokenize_compact)', lambda: Lexer(text).tokenize_compact()),
+        ('AST (Parser over TokenBuffer)', lambda: Parser(compact).parse()),
+    ]
+    print(f"Input: {size_mb:.2f} MB, {len(compact)} tokens")
+    print(f"{'Structure':<32}{'retained MB/MB':>16}{'peak MB/MB':>14}")
+    for name, build in rows:
+        retained, peak = measure(build)
+        print(f"{name:<32}{retained / 1024 / 1024 / size_mb:>16.2f}{peak / 1024 / 1024 / size_mb:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
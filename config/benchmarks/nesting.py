@@ -0,0 +1,45 @@
+"""Разбор и вычисление глубоко вложенных структур.
+
+Запуск: python -m config.benchmarks.nesting [--depth N] [--width N]
+"""
+import argparse
+import timeit
+
+from config.lexer import Lexer
+from config.parser import Parser
+from config.evaluator import Evaluator
+
+
+def nested_config(depth, width):
+    """struct глубиной depth, на каждом уровне width числовых полей"""
+    parts = ['struct {']
+    for level in range(depth):
+        parts.append(' '.join(f'F{i} = {i},' for i in range(width)))
+        parts.append(f'Level{level} = struct {{')
+    parts.append('Leaf = 1')
+    parts.append('}' * (depth + 1))
+    return '\n'.join(parts)
+
+
+def best_of(function, repeat=5):
+    number = 10
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Nested struct benchmark')
+    parser.add_argument('--depth', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--width', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'depth':>8}{'width':>8}{'parse ms':>12}{'evaluate ms':>14}")
+    for depth in args.depth:
+        tokens = Lexer(nested_config(depth, args.width)).tokenize()
+        ast = Parser(tokens).parse()
+        parse_time = best_of(lambda: Parser(tokens).parse())
+        evaluate_time = best_of(lambda: Evaluator().evaluate(ast))
+        print(f"{depth:>8}{args.width:>8}{parse_time * 1000:>12.3f}{evaluate_time * 1000:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
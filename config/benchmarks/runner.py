@@ -0,0 +1,193 @@
+"""Замер скорости стадий компилятора на синтетических конфигурациях.
+
+Для каждого формата вывода (--format) дополнительно замеряются запись, чтение
+файла обратно и его размер.
+
+Запуск: python -m config.benchmarks [--scenario NAME ...] [--save FILE] [--compare FILE]
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+from unittest.mock import patch
+
+from config import __version__
+from config.lexer import Lexer
+from config.parser import Parser
+from config.evaluator import Evaluator
+from config.formats import FORMATS, write_output, read_output
+from config.main import main as cli_main
+from config.benchmarks.generator import generate_config
+
+# Наборы параметров генератора
+SCENARIOS = {
+    'small': dict(constants=10, width=8, depth=2, branching=2),
+    'wide': dict(constants=50, width=2000, depth=1, branching=1),
+    'deep': dict(constants=10, width=4, depth=12, branching=2),
+    'expressions': dict(constants=200, width=50, depth=4, branching=3, expression_length=8,
+                        string_size=0),
+    'strings': dict(constants=5, width=100, depth=3, branching=3, string_size=200,
+                    unicode_share=0.8),
+    'comments': dict(constants=50, width=40, depth=4, branching=3, comment_density=0.8),
+    'repetitive': dict(constants=10, width=4, depth=12, branching=2, repeated_leaves=16),
+}
+STAGES = ('tokenize', 'parse', 'evaluate', 'pipeline')
+DEFAULT_THRESHOLD = 0.10
+
+
+def best_time(function, repeat):
+    # Минимум из нескольких запусков меньше всего зависит от фоновой нагрузки
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def run_pipeline(input_path, output_path):
+    argv = ['config', '-i', str(input_path), '-o', str(output_path), '--no-cache']
+    with patch('sys.argv', argv), contextlib.redirect_stdout(io.StringIO()):
+        cli_main()
+
+
+def run_scenario(text, repeat=3):
+    """Время каждой стадии и пропускная способность в MB/s и токенах в секунду"""
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+    tokens = Lexer(text).tokenize()
+    ast = Parser(tokens).parse()
+
+    temp_dir = Path(tempfile.mkdtemp())
+    try:
+        input_path = temp_dir / 'input.conf'
+        input_path.write_text(text, encoding='utf-8')
+        timings = {
+            'tokenize': best_time(lambda: Lexer(text).tokenize(), repeat),
+            'parse': best_time(lambda: Parser(tokens).parse(), repeat),
+            'evaluate': best_time(lambda: Evaluator().evaluate(ast), repeat),
+            'pipeline': best_time(lambda: run_pipeline(input_path, temp_dir / 'output.json'), repeat),
+        }
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return {
+        stage: {
+            'seconds': seconds,
+            'mb_per_s': size_mb / seconds if seconds else 0.0,
+            'tokens_per_s': len(tokens) / seconds if seconds else 0.0,
+        }
+        for stage, seconds in timings.items()
+    }
+
+
+def run_formats(ast, repeat=3):
+    """Время записи и чтения обратно и размер файла для каждого формата вывода"""
+    temp_dir = Path(tempfile.mkdtemp())
+    results = {}
+    try:
+        for output_format, suffix in FORMATS.items():
+            output_path = temp_dir / f'output-{output_format}{suffix}'
+            write_seconds = best_time(lambda: write_output(ast, output_path, output_format), repeat)
+            read_seconds = best_time(lambda: read_output(output_path, output_format), repeat)
+            results[output_format] = {
+                'write_seconds': write_seconds,
+                'read_seconds': read_seconds,
+                'size_bytes': output_path.stat().st_size,
+            }
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return results
+
+
+def run(scenarios, repeat=3):
+    results = {}
+    for name in scenarios:
+        text = generate_config(**SCENARIOS[name])
+        results[name] = {
+            'size_bytes': len(text.encode('utf-8')),
+            'stages': run_scenario(text, repeat),
+            'formats': run_formats(Parser(Lexer(text).tokenize()).parse(), repeat),
+        }
+    return {
+        'version': __version__,
+        'python': platform.python_version(),
+        'results': results,
+    }
+
+
+def find_regressions(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Стадии, которые стали медленнее базовой линии больше чем на threshold"""
+    regressions = []
+    for name, scenario in report['results'].items():
+        base_scenario = baseline.get('results', {}).get(name)
+        if base_scenario is None:
+            continue
+        base_timings = dict(_timings(base_scenario))
+        for stage, seconds in _timings(scenario):
+            base = base_timings.get(stage)
+            if not base:
+                continue
+            ratio = seconds / base
+            if ratio > 1 + threshold:
+                regressions.append((name, stage, base, seconds, ratio))
+    return regressions
+
+
+def _timings(scenario):
+    # Пары (стадия, секунды); форматы вывода - как стадии вида "write:msgpack"
+    for stage, result in scenario['stages'].items():
+        yield stage, result['seconds']
+    # В базовых линиях старых версий замеров форматов нет
+    for output_format, result in scenario.get('formats', {}).items():
+        yield f'write:{output_format}', result['write_seconds']
+        yield f'read:{output_format}', result['read_seconds']
+
+
+def print_report(report, stream=None):
+    print(f"{'scenario':<14}{'stage':<10}{'ms':>10}{'MB/s':>10}{'tokens/s':>14}", file=stream)
+    for name, scenario in report['results'].items():
+        for stage in STAGES:
+            result = scenario['stages'][stage]
+            print(f"{name:<14}{stage:<10}{result['seconds'] * 1000:>10.2f}"
+                  f"{result['mb_per_s']:>10.2f}{result['tokens_per_s']:>14.0f}", file=stream)
+
+    print(file=stream)
+    print(f"{'scenario':<14}{'format':<10}{'write ms':>10}{'read ms':>10}{'KB':>14}", file=stream)
+    for name, scenario in report['results'].items():
+        for output_format, result in scenario.get('formats', {}).items():
+            print(f"{name:<14}{output_format:<10}{result['write_seconds'] * 1000:>10.2f}"
+                  f"{result['read_seconds'] * 1000:>10.2f}{result['size_bytes'] / 1024:>14.1f}",
+                  file=stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ConfigLang compiler benchmarks')
+    parser.add_argument('--scenario', nargs='+', choices=sorted(SCENARIOS), default=sorted(SCENARIOS))
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage, the best one is reported')
+    parser.add_argument('--save', help='Write results as a JSON baseline')
+    parser.add_argument('--compare', help='Baseline JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed slowdown relative to the baseline (0.1 = 10%%)')
+    args = parser.parse_args()
+
+    report = run(args.scenario, args.repeat)
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.threshold)
+        for name, stage, before, after, ratio in regressions:
+            print(f"REGRESSION {name}/{stage}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms "
+                  f"(x{ratio:.2f})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Выбор значений по путям (--select) против полной компиляции.
+
+На синтетической конфигурации выбирается доля полей корня (--fractions) и
+сравнивается время select_source с полным циклом compile_source. Пропущенные поля
+только проходят через лексер, поэтому выигрыш растёт с их долей.
+
+Запуск: python -m config.benchmarks.select [--size-mb N] [--fractions F ...]
+"""
+import argparse
+import timeit
+
+from config.pipeline import compile_source
+from config.selection import select_source
+from config.benchmarks.memory import synthetic_config
+
+
+def field_count(source):
+    return source.count(' = struct {')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Path selection benchmark')
+    parser.add_argument('--size-mb', type=float, default=2)
+    parser.add_argument('--fractions', type=float, nargs='+', default=[0.0, 0.1, 0.5, 1.0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    source = synthetic_config(args.size_mb)
+    fields = field_count(source)
+    full = min(timeit.repeat(lambda: compile_source(source), number=1, repeat=args.repeat))
+    print(f"{'selected':>10}{'paths':>8}{'select ms':>12}{'full ms':>10}{'ratio':>8}")
+    for fraction in args.fractions:
+        # Хотя бы одно поле: типичный случай - одно значение для скрипта развёртывания
+        paths = [f'Field{i}.Mana' for i in range(max(1, int(fields * fraction)))]
+        seconds = min(timeit.repeat(lambda: select_source(source, paths), number=1, repeat=args.repeat))
+        print(f"{fraction:>10.0%}{len(paths):>8}{seconds * 1000:>12.1f}{full * 1000:>10.1f}"
+              f"{seconds / full:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
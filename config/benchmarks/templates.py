@@ -0,0 +1,52 @@
+"""Вычисление экземпляров шаблонов против структур, записанных целиком.
+
+Для каждого сочетания размера шаблона, числа экземпляров и числа заменённых полей
+одна и та же конфигурация записывается двумя способами: каждый экземпляр - полная
+struct { ... } (expanded) и Шаблон { заменённые поля } (template). Время вычисления
+expanded растёт как размер x экземпляры, template - как заменённые поля x экземпляры.
+
+Запуск: python -m config.benchmarks.templates [--sizes N ...] [--instances N] [--overrides N ...]
+"""
+import argparse
+
+from config.evaluator import Evaluator
+from config.lexer import Lexer
+from config.parser import Parser
+from config.benchmarks.nesting import best_of
+
+
+def template_configs(size, instances, overrides):
+    """Пара исходников (expanded, template) с одинаковым результатом"""
+    fields = [f'F{i} = {i}' for i in range(size)]
+    expanded = ['struct {']
+    template = [f"Base := struct {{ {', '.join(fields)} }};", 'struct {']
+    for n in range(instances):
+        changed = [f'F{i} = {n + i}' for i in range(overrides)]
+        expanded.append(f"I{n} = struct {{ {', '.join(changed + fields[overrides:])} }},")
+        template.append(f"I{n} = Base {{ {', '.join(changed)} }},")
+    expanded.append('}')
+    template.append('}')
+    return '\n'.join(expanded), '\n'.join(template)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Struct template benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--instances', type=int, default=1000)
+    parser.add_argument('--overrides', type=int, nargs='+', default=[1, 5])
+    args = parser.parse_args()
+
+    print(f"{'size':>6}{'instances':>11}{'overrides':>11}{'expanded ms':>14}{'template ms':>14}")
+    for size in args.sizes:
+        for overrides in args.overrides:
+            sources = template_configs(size, args.instances, min(overrides, size))
+            times = []
+            for source in sources:
+                ast = Parser(Lexer(source).tokenize()).parse()
+                times.append(best_of(lambda: Evaluator(share_structs=True).evaluate(ast), repeat=3))
+            print(f"{size:>6}{args.instances:>11}{overrides:>11}"
+                  f"{times[0] * 1000:>14.3f}{times[1] * 1000:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+"""Двоичный формат вычисленной конфигурации для чтения через mmap.
+
+Файл можно открыть и прочитать из него несколько ключей, не разбирая остальное:
+у каждой структуры есть хеш-индекс ключей, а строки лежат в общей таблице.
+Все числа little-endian, смещения блоков - от начала области значений.
+
+    заголовок     magic 'CFGB', версия, смещения таблицы строк и области значений,
+                  число строк, смещение корневой структуры
+    строки        (count + 1) смещений u32 и UTF-8 байты всех строк подряд;
+                  одинаковые строки (ключи и значения) хранятся один раз
+    значения      блоки структур и массивов
+
+Значение (12 байт) - тег и 8 байт данных: float64 для числа, номер строки или
+смещение блока для строки, структуры и массива.
+Структура: число полей и корзин, корзины u32 (номер поля + 1, 0 - пусто; открытая
+адресация с линейным пробированием по FNV-1a ключа), поля в исходном порядке:
+хеш ключа, номер строки ключа и значение.
+Массив: число элементов и сами значения.
+"""
+import mmap
+import struct
+from collections.abc import Mapping
+from config.templates import StructOverlay
+
+MAGIC = b'CFGB'
+VERSION = 1
+
+NUMBER, STRING, STRUCT, ARRAY = 1, 2, 3, 4
+
+_HEADER = struct.Struct('<4sHxxIIII')      # magic, версия, строки, их число, значения, корень
+_COUNTS = struct.Struct('<II')             # число полей (элементов) и корзин
+_U32 = struct.Struct('<I')
+_ENTRY = struct.Struct('<IIB3x8s')         # хеш, ключ, тег, данные
+_VALUE = struct.Struct('<B3x8s')           # тег, данные
+_DOUBLE = struct.Struct('<d')
+_OFFSET = struct.Struct('<Q')
+_ENTRY_HASH_KEY = struct.Struct('<II')
+_VALUE_HEAD = struct.Struct('<B3xQ')
+_VALUE_NUMBER = struct.Struct('<B3xd')
+
+_FNV_OFFSET = 0x811c9dc5
+_FNV_PRIME = 0x01000193
+
+
+def fnv1a(data):
+    """32-битный FNV-1a от bytes"""
+    h = _FNV_OFFSET
+    for byte in data:
+        h = ((h ^ byte) * _FNV_PRIME) & 0xffffffff
+    return h
+
+
+def encode_binary(data):
+    """Кодирует вычисленную конфигурацию (dict) в bytes"""
+    if not isinstance(data, Mapping):
+        raise TypeError("Root value must be a struct")
+    strings = {}
+    area = bytearray()
+
+    def intern(text):
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+
+    # Обход в обратном порядке через явный стек: блоки детей пишутся раньше
+    # родителя, поэтому их смещения уже известны. slots - готовые значения детей.
+    slots = []
+    stack = [(data, False)]
+    while stack:
+        value, done = stack.pop()
+        value_type = type(value)
+        if value_type is StructOverlay:
+            value_type = dict
+            value = dict(value.raw_items())
+        if value_type is dict or value_type is list or value_type is tuple:
+            items = list(value.values()) if value_type is dict else value
+            if not done:
+                stack.append((value, True))
+                stack.extend((item, False) for item in reversed(items))
+                continue
+            children = slots[len(slots) - len(items):]
+            del slots[len(slots) - len(items):]
+            offset = len(area)
+            if value_type is dict:
+                area += _encode_struct(value, children, intern)
+                slots.append(_VALUE.pack(STRUCT, _OFFSET.pack(offset)))
+            else:
+                area += _COUNTS.pack(len(children), 0)
+                area += b''.join(children)
+                slots.append(_VALUE.pack(ARRAY, _OFFSET.pack(offset)))
+        elif value_type is str:
+            slots.append(_VALUE.pack(STRING, _OFFSET.pack(intern(value))))
+        elif value_type is float or value_type is int:
+            slots.append(_VALUE.pack(NUMBER, _DOUBLE.pack(value)))
+        else:
+            raise TypeError(f"Object of type {value_type.__name__} cannot be stored in a binary config")
+
+    # Корень обрабатывается последним, offset - смещение его блока
+    root = offset
+    encoded = [text.encode('utf-8') for text in strings]
+    offsets = [0]
+    for item in encoded:
+        offsets.append(offsets[-1] + len(item))
+    table = struct.pack(f'<{len(offsets)}I', *offsets) + b''.join(encoded)
+
+    strings_offset = _HEADER.size
+    values_offset = strings_offset + len(table)
+    values_offset += -values_offset % 8
+    header = _HEADER.pack(MAGIC, VERSION, strings_offset, len(encoded), values_offset, root)
+    return header + table + bytes(values_offset - strings_offset - len(table)) + bytes(area)
+
+
+def _bucket_count(size):
+    # Степень двойки не меньше удвоенного числа полей: пробирование остаётся коротким
+    count = 1
+    while count < size * 2:
+        count *= 2
+    return count if size else 0
+
+
+def _encode_struct(value, children, intern):
+    count = _bucket_count(len(value))
+    buckets = [0] * count
+    entries = []
+    for number, (key, slot) in enumerate(zip(value, children)):
+        if type(key) is not str:
+            raise TypeError(f"Keys must be str, not {type(key).__name__}")
+        key_hash = fnv1a(key.encode('utf-8'))
+        bucket = key_hash & (count - 1)
+        while buckets[bucket]:
+            bucket = (bucket + 1) & (count - 1)
+        buckets[bucket] = number + 1
+        entries.append(_ENTRY_HASH_KEY.pack(key_hash, intern(key)) + slot)
+    return (_COUNTS.pack(len(value), count) + struct.pack(f'<{count}I', *buckets)
+            + b''.join(entries))
+
+
+class BinaryConfig:
+    """Открытый двоичный файл конфигурации.
+
+    buffer - bytes или mmap. Корень доступен как root (BinaryStruct), get('A.B.C')
+    находит значение по пути с точками, читая только нужные блоки.
+    """
+
+    def __init__(self, buffer, close=None):
+        if len(buffer) < _HEADER.size:
+            raise ValueError("Not a ConfigLang binary file")
+        magic, version, strings_offset, string_count, values_offset, root = \
+            _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a ConfigLang binary file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported binary config version {version}")
+        self._buffer = buffer
+        self._close = close
+        self._strings = strings_offset
+        self._blob = strings_offset + _U32.size * (string_count + 1)
+        self._values = values_offset
+        self.root = BinaryStruct(self, root)
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, path, default=None):
+        try:
+            return self[path]
+        except KeyError:
+            return default
+
+    def __getitem__(self, path):
+        node = self.root
+        for key in path.split('.'):
+            position = node._find(key) if type(node) is BinaryStruct else -1
+            if position < 0:
+                raise KeyError(path)
+            node = self._value(position + _ENTRY_HASH_KEY.size)
+        return node
+
+    def to_dict(self):
+        return self.root.to_dict()
+
+    def _string(self, index):
+        start, end = _COUNTS.unpack_from(self._buffer, self._strings + _U32.size * index)
+        return str(self._buffer[self._blob + start:self._blob + end], 'utf-8')
+
+    def _string_equals(self, index, data):
+        start, end = _COUNTS.unpack_from(self._buffer, self._strings + _U32.size * index)
+        return end - start == len(data) and self._buffer[self._blob + start:self._blob + end] == data
+
+    def _value(self, position):
+        # Значение по абсолютной позиции: массивы - tuple, структуры - BinaryStruct
+        tag, payload = _VALUE_HEAD.unpack_from(self._buffer, position)
+        if tag == NUMBER:
+            return _VALUE_NUMBER.unpack_from(self._buffer, position)[1]
+        if tag == STRING:
+            return self._string(payload)
+        if tag == STRUCT:
+            return BinaryStruct(self, payload)
+        if tag == ARRAY:
+            return self._array(payload)
+        raise ValueError(f"Corrupted binary config: unknown value tag {tag}")
+
+    def _array(self, offset):
+        position = self._values + offset
+        size = _COUNTS.unpack_from(self._buffer, position)[0]
+        position += _COUNTS.size
+        return tuple(self._value(position + _VALUE.size * i) for i in range(size))
+
+
+class BinaryStruct(Mapping):
+    """Структура двоичного файла: поиск ключа по хеш-индексу, порядок ключей исходный"""
+
+    __slots__ = ('_config', '_offset', '_size', '_buckets', '_entries')
+
+    def __init__(self, config, offset):
+        self._config = config
+        self._offset = offset
+        position = config._values + offset
+        self._size, self._buckets = _COUNTS.unpack_from(config._buffer, position)
+        self._entries = position + _COUNTS.size + _U32.size * self._buckets
+
+    def _find(self, key):
+        # Позиция поля или -1
+        if not self._buckets or type(key) is not str:
+            return -1
+        data = key.encode('utf-8')
+        key_hash = fnv1a(data)
+        buffer = self._config._buffer
+        mask = self._buckets - 1
+        bucket = key_hash & mask
+        bucket_base = self._entries - _U32.size * self._buckets
+        while True:
+            number = _U32.unpack_from(buffer, bucket_base + _U32.size * bucket)[0]
+            if not number:
+                return -1
+            position = self._entries + _ENTRY.size * (number - 1)
+            entry_hash, key_index = _ENTRY_HASH_KEY.unpack_from(buffer, position)
+            if entry_hash == key_hash and self._config._string_equals(key_index, data):
+                return position
+            bucket = (bucket + 1) & mask
+
+    def __getitem__(self, key):
+        position = self._find(key)
+        if position < 0:
+            raise KeyError(key)
+        return self._config._value(position + _ENTRY_HASH_KEY.size)
+
+    def __contains__(self, key):
+        return self._find(key) >= 0
+
+    def __iter__(self):
+        config = self._config
+        for number in range(self._size):
+            position = self._entries + _ENTRY.size * number
+            yield config._string(_ENTRY_HASH_KEY.unpack_from(config._buffer, position)[1])
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f"BinaryStruct({self._size} fields)"
+
+    def items(self):
+        # Обход по полям подряд, без поиска каждого ключа по индексу
+        config = self._config
+        for number in range(self._size):
+            position = self._entries + _ENTRY.size * number
+            key_index = _ENTRY_HASH_KEY.unpack_from(config._buffer, position)[1]
+            yield config._string(key_index), config._value(position + _ENTRY_HASH_KEY.size)
+
+    def to_dict(self):
+        """Читает структуру целиком в dict и list"""
+        result = {}
+        stack = [(self.items(), result)]
+        while stack:
+            items, target = stack[-1]
+            for key, value in items:
+                if type(value) is BinaryStruct:
+                    child = target[key] = {}
+                    stack.append((value.items(), child))
+                    break
+                target[key] = _plain(value)
+            else:
+                stack.pop()
+        return result
+
+
+def _plain(value):
+    # Массивы из tuple в list (вложенные массивы - тоже)
+    if type(value) is tuple:
+        return [_plain(item) for item in value]
+    if type(value) is BinaryStruct:
+        return value.to_dict()
+    return value
+
+
+def open_binary(path):
+    """Открывает двоичный файл через mmap; закрывается close() или в блоке with"""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return BinaryConfig(buffer, buffer.close)
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from config import __version__
+from config.formats import FORMATS, DEFAULT_FORMAT
+
+# Предел размера кеша по умолчанию
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+READ_CHUNK_SIZE = 1024 * 1024
+SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_size(text):
+    """'512K', '64M', '1G' или число байт -> число байт"""
+    text = text.strip().upper()
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def file_digest(path, digest=None):
+    """SHA-256 байт файла (дописывается в digest, если он передан)"""
+    digest = hashlib.sha256() if digest is None else digest
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CompilationCache:
+    """Кеш скомпилированных файлов на диске, адресуемый по содержимому.
+
+    Ключ - SHA-256 от байт исходника, версии компилятора, параметров вывода и каталога
+    исходника (относительные include разрешаются от него, поэтому одинаковые файлы
+    в разных каталогах могут включать разное), значение - готовый выходной файл.
+    Для файлов с include рядом с записью хранится список включённых файлов с их
+    хешами: запись считается промахом, если хотя бы один из них изменился. Расширение
+    записи совпадает с расширением формата вывода. Вытеснение - LRU по времени
+    последнего использования (mtime записи обновляется при каждом попадании).
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # Оценка суммарного размера записей; None - каталог ещё не просматривался
+        self._size = None
+
+    def key_for(self, input_path, *options):
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(input_path))
+        digest.update(f"{__version__}\0{options!r}\0{directory}\0".encode('utf-8'))
+        return file_digest(input_path, digest)
+
+    def _entry_path(self, key, output_format=DEFAULT_FORMAT):
+        return self.directory / f"{key}{FORMATS[output_format]}"
+
+    def _deps_path(self, key):
+        return self.directory / f"{key}.deps"
+
+    def dependencies(self, key):
+        """Включённые файлы записи: список пар (путь, хеш)"""
+        try:
+            with open(self._deps_path(key), 'r', encoding='utf-8') as f:
+                return [tuple(item) for item in json.load(f)]
+        except FileNotFoundError:
+            return []
+
+    def _dependencies_match(self, key):
+        try:
+            for path, digest in self.dependencies(key):
+                if file_digest(path) != digest:
+                    return False
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def fetch(self, key, output_path, output_format=DEFAULT_FORMAT):
+        """Копирует закешированный результат в output_path. Возвращает True при попадании"""
+        entry = self._entry_path(key, output_format)
+        try:
+            if not self._dependencies_match(key):
+                raise FileNotFoundError(entry)
+            os.utime(entry)
+            output_path = Path(output_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(entry, output_path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, key, output_path, dependencies=(), output_format=DEFAULT_FORMAT):
+        """Сохраняет готовый выходной файл в кеш; dependencies - пути включённых файлов"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = self._entry_path(key, output_format)
+        deps_path = self._deps_path(key)
+        if dependencies:
+            # Список зависимостей пишется раньше записи: запись без него была бы принята
+            # при изменённых включённых файлах
+            temp_path = self.directory / f"{key}.{os.getpid()}.deps.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump([[str(path), file_digest(path)] for path in dependencies], f)
+            os.replace(temp_path, deps_path)
+        else:
+            try:
+                os.unlink(deps_path)
+            except FileNotFoundError:
+                pass
+        # Запись через временный файл: параллельные процессы не увидят её недописанной
+        temp_path = self.directory / f"{key}.{os.getpid()}.tmp"
+        shutil.copyfile(output_path, temp_path)
+        os.replace(temp_path, entry)
+
+        if self._size is not None:
+            self._size += entry.stat().st_size
+        if self._size is None or self._size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """Удаляет давно не использованные записи, пока кеш не уложится в max_size"""
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    # Списки зависимостей удаляются вместе со своей записью,
+                    # временные файлы принадлежат незавершённым store()
+                    if entry.name.endswith(('.deps', '.tmp')):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                    total += stat.st_size
+        except FileNotFoundError:
+            self._size = 0
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            key = os.path.basename(path).split('.', 1)[0]
+            for stale in (path, self._deps_path(key)):
+                try:
+                    os.unlink(stale)
+                except FileNotFoundError:
+                    pass
+            total -= size
+        self._size = total
@@ -0,0 +1,152 @@
+"""Граф зависимостей констант.
+
+Рёбра графа - ссылки Identifier, имена в токенах выражений .[ ... ]. и шаблоны
+экземпляров Имя { ... }. Константа может ссылаться на объявленную ниже, а
+вычисляются только константы, достижимые из нужных узлов (обычно корневой
+структуры), - зависимости раньше зависящих. Переобъявление сохраняет
+последовательный смысл: ссылка видит ближайшее объявление выше, корень - последнее.
+"""
+from config.ast import Struct, Array, Identifier, ConstExpression, TemplateInstance
+from config.expressions import constant_names
+
+_VISITING = 1
+_DONE = 2
+
+
+def expression_names(node):
+    """Имена констант в выражении ConstExpression; запоминаются в узле.
+
+    Выражение для этого не компилируется: программы всех выражений корня,
+    созданные разом до оптимизатора, переживали молодые поколения сборщика
+    мусора и вызывали полные сборки по всему AST.
+    """
+    names = node.names
+    if names is None:
+        names = node.names = list(dict.fromkeys(constant_names(node.tokens, [])))
+    return names
+
+
+def references(nodes):
+    """Имена констант, на которые ссылаются узлы, в порядке первого появления.
+
+    Общие (hash-consed) узлы просматриваются один раз.
+    """
+    names = {}
+    seen = set()
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        node_type = type(node)
+        if node_type is Struct:
+            if node not in seen:
+                seen.add(node)
+                stack.extend(reversed(node.fields.values()))
+        elif node_type is Identifier:
+            names[node.name] = None
+        elif node_type is ConstExpression:
+            if node not in seen:
+                seen.add(node)
+                for name in expression_names(node):
+                    names[name] = None
+        elif node_type is TemplateInstance:
+            names[node.name] = None
+            stack.append(node.overrides)
+        elif node_type is Array:
+            stack.extend(reversed(node.items))
+    return list(names)
+
+
+def root_references(ast):
+    """Имена констант, на которые ссылается корневая структура.
+
+    Парсер собирает ссылки по ходу разбора (ast['references'] - имена и узлы
+    выражений); для AST, собранного вручную, дерево обходится.
+    """
+    items = ast.get('references')
+    if items is None:
+        return references([ast['root']])
+    names = {}
+    for item in items:
+        if type(item) is str:
+            names[item] = None
+        else:
+            for name in expression_names(item):
+                names[name] = None
+    return list(names)
+
+
+def resolve_constants(consts, names, fixed=(), bindings=None):
+    """Объявления, нужные для вычисления констант names, в порядке зависимостей.
+
+    consts - объявления в порядке исходного текста, names - имена, на которые
+    ссылаются вычисляемые узлы (см. references); им соответствуют последние
+    объявления. Значения констант из fixed заданы извне (переопределения),
+    поэтому их собственные зависимости не обходятся. Ссылки на необъявленные
+    имена пропускаются - о них сообщит вычислитель. Цикл - ValueError с путём
+    по графу.
+
+    Ссылка из объявления на переобъявленное имя означает ближайшее объявление
+    выше (A := 1; A := .[A 1 +]. даёт 2), а если выше его нет - последнее.
+    Для таких ссылок в словарь bindings записывается объявление -> {имя:
+    объявление, значение которого должно быть у имени при его вычислении}.
+    """
+    declarations = {}
+    for index, decl in enumerate(consts):
+        declarations.setdefault(decl.name, []).append((index, decl))
+    redeclared = {name for name, versions in declarations.items() if len(versions) > 1}
+    positions = {}
+    if redeclared:
+        positions = {decl: index for index, decl in enumerate(consts)}
+
+    def bound(name, index):
+        versions = declarations[name]
+        if name not in redeclared:
+            return versions[0][1]
+        for version_index, decl in reversed(versions):
+            if version_index < index:
+                return decl
+        return versions[-1][1]
+
+    def dependencies(decl):
+        if decl.name in fixed:
+            return iter(())
+        found = [name for name in references([decl.value_node]) if name in declarations]
+        if redeclared:
+            index = positions[decl]
+            targets = {name: bound(name, index) for name in found}
+            binding = {name: targets[name] for name in found if name in redeclared}
+            if binding and bindings is not None:
+                bindings[decl] = binding
+            return iter(targets.values())
+        return (declarations[name][0][1] for name in found)
+
+    order = []
+    state = {}
+    for name in names:
+        if name not in declarations:
+            continue
+        start = declarations[name][-1][1]
+        if start in state:
+            continue
+        # Обход в глубину: path - текущая цепочка зависимостей
+        state[start] = _VISITING
+        path = [start]
+        stack = [dependencies(start)]
+        while stack:
+            for decl in stack[-1]:
+                decl_state = state.get(decl)
+                if decl_state is _DONE:
+                    continue
+                if decl_state is _VISITING:
+                    cycle = [item.name for item in path[path.index(decl):]] + [decl.name]
+                    raise ValueError(f"Constant cycle: {' -> '.join(cycle)}")
+                state[decl] = _VISITING
+                path.append(decl)
+                stack.append(dependencies(decl))
+                break
+            else:
+                stack.pop()
+                decl = path.pop()
+                state[decl] = _DONE
+                order.append(decl)
+    return order
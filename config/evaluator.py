@@ -1,31 +1,118 @@
 # config_lang/evaluator.py
 
-import math
-from config.ast import Number, String, Struct, Identifier, ConstExpression
+from config.ast import Number, String, Struct, Identifier, ConstExpression, Array, TemplateInstance
+from config.dependencies import references, resolve_constants, root_references
+from config.expressions import compile_expression
+from config.templates import StructOverlay, to_plain
+from config.vector import is_array, to_list
+
+
+# События потокового вычисления (см. Evaluator.iter_events)
+START_STRUCT = 'start_struct'
+KEY = 'key'
+SCALAR = 'scalar'
+END_STRUCT = 'end_struct'
 
 
 class Evaluator:
-    def __init__(self):
+    def __init__(self, overrides=None, share_structs=False):
         self.constants = {}
+        # Значения, подставляемые вместо объявленных констант (режим --sweep)
+        self.overrides = overrides or {}
+        # Сколько выражений .[ ... ]. было вычислено (для профилирования)
+        self.expressions_evaluated = 0
+        # Результаты структур при текущих значениях констант. Парсер делает одинаковые
+        # структуры одним узлом; с share_structs такой узел вычисляется один раз и его
+        # dict стоит во всех местах. Это безопасно, только если результат не меняют:
+        # его читает writer или он превращается в неизменяемое представление.
+        # По умолчанию каждое место получает свой dict
+        self.share_structs = share_structs
+        self._structs = {}
+        self.structs_reused = 0
+        # Сколько экземпляров шаблонов создано
+        self.instances = 0
 
     def evaluate(self, ast):
-        # Вычисляем константы
-        for decl in ast['consts']:
-            value = self._evaluate_node(decl.value_node)
-            if not isinstance(value, (int, float, str)):
-                raise TypeError(f"Constant '{decl.name}' must be a number or string")
-            self.constants[decl.name] = value
+        self.evaluate_constants(ast)
 
         # Вычисляем корневую структуру
         return self._evaluate_struct(ast['root'])
 
+    def evaluate_constants(self, ast, nodes=None):
+        """Вычисляет константы, нужные узлам nodes (по умолчанию - корневой структуре).
+
+        Порядок задаёт граф зависимостей (config.dependencies), а не порядок
+        объявлений; неиспользуемые константы не вычисляются.
+        """
+        names = root_references(ast) if nodes is None else references(nodes)
+        self._structs.clear()
+        bindings = {}
+        order = resolve_constants(ast['consts'], names, self.overrides, bindings)
+        # Для переобъявленных имён: значение каждого вычисленного объявления и
+        # объявление, чьё значение сейчас в self.constants
+        values = {}
+        current = {}
+        for decl in order:
+            if bindings:
+                self._bind(bindings.get(decl, {}), values, current)
+            if decl.name in self.overrides:
+                value = self.overrides[decl.name]
+            else:
+                value = self._evaluate_node(decl.value_node)
+            if not isinstance(value, (int, float, str, list, dict, StructOverlay)):
+                raise TypeError(f"Constant '{decl.name}' must be a number, string, array or struct")
+            if bindings:
+                values[decl] = value
+                self._bind({decl.name: decl}, values, current)
+            self.constants[decl.name] = value
+        if bindings:
+            # Корневая структура видит последние объявления
+            last = {decl.name: decl for decl in ast['consts']}
+            self._bind({name: last[name] for name in current}, values, current)
+        return self.constants
+
+    def _bind(self, binding, values, current):
+        # Подставляет в self.constants значения нужных объявлений переобъявленных имён.
+        # Результаты структур вычислены при прежних значениях и сбрасываются
+        for name, decl in binding.items():
+            previous = current.get(name)
+            if previous is decl:
+                continue
+            current[name] = decl
+            if previous is not None:
+                self._structs.clear()
+            if decl in values:
+                self.constants[name] = values[decl]
+
+    def iter_events(self, ast):
+        """Вычисляет корневую структуру, выдавая события (тип, значение) по мере обхода.
+
+        Результат целиком не собирается: в памяти только стек открытых структур,
+        поэтому её размер ограничен глубиной вложенности, а не размером документа.
+        """
+        self.evaluate_constants(ast)
+
+        yield START_STRUCT, None
+        stack = [iter(ast['root'].fields.items())]
+        while stack:
+            for name, value_node in stack[-1]:
+                yield KEY, name
+                if isinstance(value_node, Struct):
+                    yield START_STRUCT, None
+                    stack.append(iter(value_node.fields.items()))
+                    break
+                yield SCALAR, self._evaluate_node(value_node)
+            else:
+                stack.pop()
+                yield END_STRUCT, None
+
     def _evaluate_node(self, node):
         if isinstance(node, Number):
             return node.value
         elif isinstance(node, String):
             return node.value
         elif isinstance(node, ConstExpression):
-            return self._evaluate_expression(node.tokens)
+            return self._evaluate_expression(node)
         elif isinstance(node, Struct):
             return self._evaluate_struct(node)
         elif isinstance(node, String):
@@ -33,72 +120,102 @@ class Evaluator:
         elif isinstance(node, Identifier):
             if node.name not in self.constants:
                 raise NameError(f"Undefined constant '{node.name}'")
-            return self.constants[node.name]
+            value = self.constants[node.name]
+            if not self.share_structs and not isinstance(value, (int, float, str)):
+                # Без share_structs каждое место получает свою копию структуры или массива
+                return to_plain(value)
+            return value
+        elif isinstance(node, Array):
+            return self._evaluate_array(node)
+        elif isinstance(node, TemplateInstance):
+            return self._instantiate(node)
         else:
             raise TypeError(f"Unknown node type: {type(node)}")
 
-    def _evaluate_expression(self, tokens):
-        stack = []
-        for token in tokens:
-            if self._is_number(token):
-                stack.append(float(token))
-            elif token in self.constants:
-                value = self.constants[token]
-                if not isinstance(value, (int, float)):
-                    raise TypeError(f"Constant '{token}' used in expression must be a number")
-                stack.append(value)
-            elif token == '+':
-                self._apply_binary_op(stack, lambda a, b: a + b, token)
-            elif token == '-':
-                self._apply_binary_op(stack, lambda a, b: a - b, token)
-            elif token == '*':
-                self._apply_binary_op(stack, lambda a, b: a * b, token)
-            elif token == '/':
-                self._apply_binary_op(stack, lambda a, b: a / b if b != 0 else (_ for _ in ()).throw(
-                    ZeroDivisionError("Division by zero")), token)
-            elif token == 'mod':
-                self._apply_binary_op(stack, lambda a, b: a % b, token)
-            elif token == 'sqrt':
-                self._apply_unary_op(stack, lambda a: math.sqrt(a) if a >= 0 else (_ for _ in ()).throw(
-                    ValueError("Negative number in sqrt")), token)
-            else:
-                raise NameError(f"Unknown token in expression: '{token}'")
-
-        if len(stack) != 1:
-            raise ValueError(f"Invalid expression: expected 1 value on stack, got {len(stack)}")
-        return stack[0]
-
-    def _apply_binary_op(self, stack, op, token):
-        if len(stack) < 2:
-            raise ValueError(f"Not enough operands for operator '{token}'")
-        b = stack.pop()
-        a = stack.pop()
-        try:
-            stack.append(op(a, b))
-        except ZeroDivisionError:
-            raise ZeroDivisionError(f"Division by zero in expression") from None
-        except Exception as e:
-            raise ValueError(f"Error in operation '{token}': {str(e)}") from e
-
-    def _apply_unary_op(self, stack, op, token):
-        if len(stack) < 1:
-            raise ValueError(f"Not enough operands for operator '{token}'")
-        a = stack.pop()
-        try:
-            stack.append(op(a))
-        except Exception as e:
-            raise ValueError(f"Error in operation '{token}': {str(e)}") from e
+    def _evaluate_expression(self, node):
+        # Выражение компилируется один раз и кешируется в самом узле
+        if node.program is None:
+            node.program = compile_expression(node.tokens)
+        self.expressions_evaluated += 1
+        result = node.program(self.constants)
+        if type(result) is not float and is_array(result):
+            return to_list(result)
+        return result
+
+    def _evaluate_array(self, node):
+        result = []
+        for item in node.items:
+            value = self._evaluate_node(item)
+            if not isinstance(value, (int, float)):
+                raise TypeError("Array elements must be numbers")
+            result.append(float(value))
+        return result
+
+    def _template(self, node):
+        if node.name not in self.constants:
+            raise NameError(f"Undefined constant '{node.name}'")
+        base = self.constants[node.name]
+        if type(base) is not dict and type(base) is not StructOverlay:
+            raise TypeError(f"Constant '{node.name}' is not a struct and cannot be used as a template")
+        self.instances += 1
+        return base
+
+    def _instance(self, node):
+        # Возвращает (экземпляр, dict для заменённых полей). С share_structs тело шаблона
+        # уже вычислено в константе и общее: экземпляр - StructOverlay поверх него.
+        # Иначе - отдельная копия шаблона, в которую записываются заменённые поля
+        base = self._template(node)
+        if self.share_structs:
+            overrides = {}
+            return StructOverlay(base, overrides), overrides
+        result = to_plain(base)
+        return result, result
+
+    def _instantiate(self, node):
+        result, overrides = self._instance(node)
+        self._fill(node.overrides.fields, overrides)
+        return result
 
     def _evaluate_struct(self, struct_node):
-        result = {}
-        for name, value_node in struct_node.fields.items():
-            result[name] = self._evaluate_node(value_node)
+        if not self.share_structs:
+            result = {}
+        else:
+            result = self._structs.get(struct_node)
+            if result is not None:
+                self.structs_reused += 1
+                return result
+            result = self._structs[struct_node] = {}
+        self._fill(struct_node.fields, result)
         return result
 
-    @staticmethod
-    def _is_number(token):
-        try:
-            float(token)
-            return True
-        except ValueError:
-            return False
\ No newline at end of file
+    def _fill(self, fields, result):
+        # Вложенные структуры и заменённые поля экземпляров шаблонов заполняются на одном стеке
+        structs = self._structs if self.share_structs else None
+        stack = [(iter(fields.items()), result)]
+        while stack:
+            items, target = stack[-1]
+            for name, value_node in items:
+                node_type = type(value_node)
+                if node_type is Number or node_type is String:
+                    # Литералы - самый частый случай, берём значение без диспетчеризации
+                    target[name] = value_node.value
+                elif node_type is Struct:
+                    if structs is None:
+                        child = target[name] = {}
+                    else:
+                        child = structs.get(value_node)
+                        if child is not None:
+                            self.structs_reused += 1
+                            target[name] = child
+                            continue
+                        child = target[name] = structs[value_node] = {}
+                    stack.append((iter(value_node.fields.items()), child))
+                    break
+                elif node_type is TemplateInstance:
+                    target[name], child = self._instance(value_node)
+                    stack.append((iter(value_node.overrides.fields.items()), child))
+                    break
+                else:
+                    target[name] = self._evaluate_node(value_node)
+            else:
+                stack.pop()
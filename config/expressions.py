@@ -0,0 +1,141 @@
+import math
+import operator
+from config.vector import ARRAY_TYPES, binary as vector_binary, unary as vector_unary
+
+
+def _divide(a, b):
+    if b == 0:
+        raise ZeroDivisionError("Division by zero")
+    return a / b
+
+
+def _sqrt(a):
+    if a < 0:
+        raise ValueError("Negative number in sqrt")
+    return math.sqrt(a)
+
+
+# Таблицы операторов постфиксных выражений
+BINARY_OPS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': _divide,
+    'mod': operator.mod,
+}
+
+UNARY_OPS = {
+    'sqrt': _sqrt,
+}
+
+
+# Токен с буквы или '_' - имя константы или оператор; числом из таких float()
+# считает только эти слова (в любом регистре). Проверка первого символа дешевле
+# исключения ValueError, которое иначе выбрасывалось бы на каждом имени
+_WORD_START = frozenset('_abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+_FLOAT_WORDS = frozenset(('inf', 'infinity', 'nan'))
+
+
+def parse_number(token):
+    """Возвращает число, если токен - числовой литерал, иначе None"""
+    if token[:1] in _WORD_START and token.lower() not in _FLOAT_WORDS:
+        return None
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+def constant_names(tokens, names):
+    """Дописывает в names токены-ссылки на константы: всё, что не число и не оператор"""
+    for token in tokens:
+        if token not in BINARY_OPS and token not in UNARY_OPS and parse_number(token) is None:
+            names.append(token)
+    return names
+
+
+def compile_expression(tokens):
+    """Компилирует постфиксное выражение в функцию program(constants).
+
+    Литералы преобразуются в числа заранее, операторы связываются с таблицей
+    операций, а глубина стека проверяется во время компиляции. Стек хранит
+    не значения, а замыкания, поэтому готовая программа - это дерево вызовов,
+    вычисляющее операнды в том же порядке, что и исходный стековый интерпретатор.
+    """
+    stack = []
+    for token in tokens:
+        value = parse_number(token)
+        if value is not None:
+            stack.append(_literal(value))
+        elif token in BINARY_OPS:
+            if len(stack) < 2:
+                return _failing(stack, f"Not enough operands for operator '{token}'")
+            right = stack.pop()
+            left = stack.pop()
+            stack.append(_binary(token, BINARY_OPS[token], left, right))
+        elif token in UNARY_OPS:
+            if len(stack) < 1:
+                return _failing(stack, f"Not enough operands for operator '{token}'")
+            stack.append(_unary(token, UNARY_OPS[token], stack.pop()))
+        else:
+            # Имя константы разрешается при выполнении: значения известны только вычислителю
+            stack.append(_constant(token))
+
+    if len(stack) != 1:
+        return _failing(stack, f"Invalid expression: expected 1 value on stack, got {len(stack)}")
+    return stack[0]
+
+
+def _literal(value):
+    def program(constants):
+        return value
+    return program
+
+
+def _constant(name):
+    def program(constants):
+        if name not in constants:
+            raise NameError(f"Unknown token in expression: '{name}'")
+        value = constants[name]
+        if not isinstance(value, (int, float, list)):
+            raise TypeError(f"Constant '{name}' used in expression must be a number or array")
+        return value
+    return program
+
+
+def _binary(token, op, left, right):
+    def program(constants):
+        a = left(constants)
+        b = right(constants)
+        try:
+            if type(a) in ARRAY_TYPES or type(b) in ARRAY_TYPES:
+                # Массив обрабатывается целиком одной векторной операцией
+                return vector_binary(token, a, b)
+            return op(a, b)
+        except ZeroDivisionError:
+            raise ZeroDivisionError(f"Division by zero in expression") from None
+        except Exception as e:
+            raise ValueError(f"Error in operation '{token}': {str(e)}") from e
+    return program
+
+
+def _unary(token, op, operand):
+    def program(constants):
+        a = operand(constants)
+        try:
+            if type(a) in ARRAY_TYPES:
+                return vector_unary(token, a)
+            return op(a)
+        except Exception as e:
+            raise ValueError(f"Error in operation '{token}': {str(e)}") from e
+    return program
+
+
+def _failing(operands, message):
+    # Ошибку глубины стека сообщаем после вычисления уже разобранных операндов,
+    # чтобы ошибки в именах констант по-прежнему возникали первыми
+    def program(constants):
+        for operand in operands:
+            operand(constants)
+        raise ValueError(message)
+    return program
@@ -0,0 +1,212 @@
+"""Форматы выходного файла.
+
+json    - json.dump(..., indent=2, ensure_ascii=False), пишется потоково (по умолчанию)
+compact - JSON без пробелов; если установлен orjson, кодирование идёт через него
+jsonl   - по строке на каждое значение: {"путь.к.ключу": значение}
+msgpack - MessagePack (встроенный кодировщик config.msgpack)
+binary  - двоичный формат с индексом ключей для чтения через mmap (config.binary)
+"""
+import json
+from collections.abc import Mapping
+from math import isfinite
+from config.binary import encode_binary, BinaryConfig
+from config.evaluator import Evaluator, START_STRUCT, KEY, SCALAR, END_STRUCT
+from config.msgpack import packb, unpackb
+from config.templates import StructOverlay, json_default
+from config.writer import atomic_output, iter_value_chunks, write_events, FLUSH_EVERY
+
+_NOT_LOADED = object()
+# Модуль orjson, None - не установлен, _NOT_LOADED - ещё не импортировался
+orjson = _NOT_LOADED
+
+# Формат -> расширение выходного файла в пакетном режиме
+FORMATS = {
+    'json': '.json',
+    'compact': '.json',
+    'jsonl': '.jsonl',
+    'msgpack': '.msgpack',
+    'binary': '.cfgb',
+}
+DEFAULT_FORMAT = 'json'
+
+_encode_string = json.encoder.encode_basestring
+_encode_compact = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'),
+                                   default=json_default).encode
+
+
+def _load_orjson():
+    # Импорт orjson при первом кодировании: вместе с зависимостями он заметен
+    # во времени запуска CLI, которому compact не нужен
+    global orjson
+    if orjson is _NOT_LOADED:
+        try:
+            import orjson as module
+        except ImportError:  # orjson - необязательный ускоритель
+            module = None
+        orjson = module
+    return orjson
+
+
+def encode_compact(data):
+    """Компактный JSON в UTF-8"""
+    orjson = _load_orjson()
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(data, default=json_default)
+        except orjson.JSONEncodeError:
+            # У orjson фиксированный предел вложенности (255 уровней)
+            pass
+        else:
+            # orjson пишет NaN и бесконечности как null, а стандартный модуль - как
+            # NaN и Infinity. Значения проверяются, только если null вообще встретился
+            if b'null' not in encoded or not _has_non_finite(data):
+                return encoded
+    try:
+        return _encode_compact(data).encode('utf-8')
+    except RecursionError:
+        return ''.join(iter_value_chunks(data)).encode('utf-8')
+
+
+def _has_non_finite(data):
+    """Есть ли в значении NaN или бесконечность"""
+    stack = [data]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        value = pop()
+        value_type = type(value)
+        if value_type is dict:
+            items = value.values()
+        elif value_type is list or value_type is tuple:
+            # Сумма конечна, только если конечны все слагаемые
+            try:
+                if isfinite(sum(value)):
+                    continue
+            except TypeError:
+                pass  # В массиве не только числа
+            items = value
+        elif value_type is StructOverlay:
+            items = [item for _, item in value.raw_items()]
+        elif isinstance(value, Mapping):
+            items = value.values()
+        else:
+            if value_type is float and not isfinite(value):
+                return True
+            continue
+        for item in items:
+            item_type = type(item)
+            if item_type is float:
+                if not isfinite(item):
+                    return True
+            elif item_type is not str:
+                push(item)
+    return False
+
+
+def iter_jsonl_lines(events):
+    """Строки JSON Lines из событий вычислителя.
+
+    Пустая структура тоже даёт строку ({"путь": {}}), чтобы не потеряться.
+    """
+    path = []    # ключи открытых вложенных структур
+    counts = []  # сколько полей уже было в каждой открытой структуре
+    key = None
+    for event, value in events:
+        if event == KEY:
+            key = value
+        elif event == SCALAR:
+            counts[-1] += 1
+            yield from _flat_lines('.'.join(path + [key]), value)
+        elif event == START_STRUCT:
+            if counts:
+                counts[-1] += 1
+                path.append(key)
+            counts.append(0)
+        elif event == END_STRUCT:
+            if counts.pop() == 0 and path:
+                yield f"{{{_encode_string('.'.join(path))}:{{}}}}\n"
+            if path:
+                path.pop()
+        else:
+            raise ValueError(f"Unknown event: {event!r}")
+
+
+def _flat_lines(name, value):
+    # Значение константы-структуры раскладывается по путям так же, как обычные поля
+    stack = [(name, value)]
+    while stack:
+        name, value = stack.pop()
+        if isinstance(value, Mapping) and value:
+            stack.extend((f"{name}.{key}", item) for key, item in reversed(list(value.items())))
+        else:
+            yield f"{{{_encode_string(name)}:{_encode_compact(value)}}}\n"
+
+
+def write_output(ast, output_path, output_format=DEFAULT_FORMAT, evaluator=None):
+    """Вычисляет AST и пишет результат в выбранном формате (атомарно)"""
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}'")
+    evaluator = Evaluator(share_structs=True) if evaluator is None else evaluator
+
+    if output_format == 'json':
+        write_events(evaluator.iter_events(ast), output_path)
+    elif output_format == 'jsonl':
+        with atomic_output(output_path) as f:
+            lines = []
+            for line in iter_jsonl_lines(evaluator.iter_events(ast)):
+                lines.append(line)
+                if len(lines) >= FLUSH_EVERY:
+                    f.write(''.join(lines))
+                    lines.clear()
+            f.write(''.join(lines))
+    else:
+        # Компактные форматы кодируются из готового словаря одним вызовом
+        write_data(evaluator.evaluate(ast), output_path, output_format)
+
+
+def write_data(data, output_path, output_format=DEFAULT_FORMAT):
+    """Пишет уже вычисленный словарь в выбранном формате (атомарно)"""
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}'")
+    if output_format == 'json':
+        with atomic_output(output_path) as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=json_default)
+    elif output_format == 'jsonl':
+        with atomic_output(output_path) as f:
+            for key, value in data.items():
+                f.writelines(_flat_lines(key, value))
+    else:
+        encoder = {'compact': encode_compact, 'msgpack': packb, 'binary': encode_binary}[output_format]
+        encoded = encoder(data)
+        with atomic_output(output_path, binary=True) as f:
+            f.write(encoded)
+
+
+def read_output(path, output_format=DEFAULT_FORMAT):
+    """Читает выходной файл обратно в словарь (для проверок и бенчмарков)"""
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}'")
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if output_format == 'msgpack':
+        return unpackb(data)
+    if output_format == 'binary':
+        return BinaryConfig(data).to_dict()
+    if output_format == 'jsonl':
+        result = {}
+        for line in data.decode('utf-8').splitlines():
+            (name, value), = json.loads(line).items()
+            *parents, key = name.split('.')
+            target = result
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[key] = value
+        return result
+    orjson = _load_orjson()
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # NaN и Infinity читает только стандартный модуль
+    return json.loads(data)
@@ -0,0 +1,92 @@
+"""Ленивое чтение конфигурации из Python.
+
+Константы вычисляются сразу, а поля структур - при первом обращении, после чего
+значение запоминается. Сервису, которому нужны несколько ключей большой
+конфигурации, не приходится вычислять остальные.
+"""
+from collections.abc import Mapping
+from config.api import freeze, thaw
+from config.ast import Number, String, Struct
+from config.evaluator import Evaluator
+from config.pipeline import prepare_ast
+
+_MISSING = object()
+
+
+class LazyConfig(Mapping):
+    """Неизменяемое отображение над узлом Struct с вычислением полей по требованию.
+
+    Порядок ключей и значения совпадают с Evaluator.evaluate(), вложенные
+    структуры тоже LazyConfig. Как и config.load(), значения только для чтения:
+    массивы - tuple, структуры из констант - MappingProxyType. to_dict() вычисляет
+    всё и возвращает независимую копию из обычных dict и list.
+    """
+
+    __slots__ = ('_evaluator', '_fields', '_values')
+
+    def __init__(self, evaluator, struct_node):
+        self._evaluator = evaluator
+        self._fields = struct_node.fields
+        self._values = {}
+
+    def __getitem__(self, key):
+        value = self._values.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        node = self._fields[key]
+        node_type = type(node)
+        if node_type is Number or node_type is String:
+            value = node.value
+        elif node_type is Struct:
+            value = LazyConfig(self._evaluator, node)
+        else:
+            value = self._evaluator._evaluate_node(node)
+            # Вычисленные значения констант общие для всех обращений
+            if type(value) is list:
+                value = tuple(value)
+            elif isinstance(value, Mapping):
+                value = freeze(value)
+        self._values[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def __repr__(self):
+        return f"LazyConfig({len(self._values)}/{len(self._fields)} evaluated)"
+
+    def to_dict(self):
+        """Вычисляет все поля и возвращает dict"""
+        result = {}
+        stack = [(self, iter(self._fields), result)]
+        while stack:
+            lazy, keys, target = stack[-1]
+            for key in keys:
+                value = lazy[key]
+                if type(value) is LazyConfig:
+                    child = target[key] = {}
+                    stack.append((value, iter(value._fields), child))
+                    break
+                if type(value) is tuple:
+                    value = list(value)
+                elif isinstance(value, Mapping):
+                    value = thaw(value)
+                target[key] = value
+            else:
+                stack.pop()
+        return result
+
+
+def load_lazy(source, optimizer=None, path=None):
+    """Разбирает source (строку или файловый объект) и возвращает LazyConfig корня"""
+    ast = prepare_ast(source, optimizer, path)
+    evaluator = Evaluator()
+    evaluator.evaluate_constants(ast)
+    return LazyConfig(evaluator, ast['root'])
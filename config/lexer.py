@@ -1,6 +1,113 @@
 import re
+import codecs
+from array import array
+
+# Размер порции, читаемой из файла за один раз
+CHUNK_SIZE = 64 * 1024
+# Сколько символов после конца совпадения должно быть в буфере, чтобы
+# регулярка гарантированно не "обрезала" токен на границе порции
+LOOKAHEAD = 8
+
+
+# Все типы токенов; индекс в списке - код типа в TokenBuffer
+TOKEN_TYPES = [
+    'STRING', 'STRUCT', 'IDENTIFIER', 'NUMBER', 'COLON_EQUALS', 'LBRACE', 'RBRACE',
+    'COMMA', 'EQUALS', 'SEMICOLON', 'PLUS', 'MINUS', 'MUL', 'DIV',
+    'START_EXPR', 'EXPR_CONTENT', 'END_EXPR', 'LBRACKET', 'RBRACKET', 'INCLUDE',
+]
+TYPE_CODES = {kind: code for code, kind in enumerate(TOKEN_TYPES)}
+
+# Шаблоны токенов. Первые символы альтернатив не пересекаются (кроме знака
+# числа и операторов + и -), поэтому порядок выбран по частоте токенов в типичных
+# файлах: движок регулярок перебирает альтернативы слева направо
+TOKEN_SPECS = [
+    ('IDENTIFIER', r'[_A-Z][_a-zA-Z0-9]*'),
+    ('EQUALS', r'='),
+    ('COMMA', r','),
+    ('LBRACE', r'\{'),
+    ('RBRACE', r'\}'),
+    ('SEMICOLON', r';'),
+    # Число раньше операторов: '+5' и '-5' - это числа
+    ('NUMBER', r'[+-]?\d+(?:\.\d*)?(?:[eE][+-]?\d+)?'),
+    # Строка с escape-последовательностями; цикл "развёрнут", чтобы движок
+    # не перебирал альтернативы на каждом символе
+    ('STRING', r'"[^"\\]*(?:\\.[^"\\]*)*"'),
+    ('STRUCT', r'struct\b'),
+    ('COLON_EQUALS', r':='),
+    ('LBRACKET', r'\['),
+    ('RBRACKET', r'\]'),
+    ('PLUS', r'\+'),
+    ('MINUS', r'-'),
+    ('MUL', r'\*'),
+    ('DIV', r'/'),
+    ('INCLUDE', r'include\b'),
+]
+
+# Единая регулярка всего лексера, компилируется один раз при импорте модуля.
+# Пробелы поглощаются префиксом того же совпадения, что и следующий токен, поэтому
+# отдельных совпадений для них нет. Комментарий и выражение с закрывающей парой
+# проверяются раньше групп UNTERMINATED_*: те срабатывают, только если пара не
+# найдена, и означают ошибку либо (при потоковом чтении) сигнал дочитать вход.
+# MISMATCH совпадает с любым символом, поэтому совпадения идут подряд, а группа
+# токена необязательна, чтобы хвостовые пробелы давали совпадение без токена.
+MASTER_REGEX = re.compile(
+    r'[ \t\n]*(?:'
+    + '|'.join(f'(?P<{kind}>{pattern})' for kind, pattern in TOKEN_SPECS)
+    + r'|(?P<EXPR>\.\[.*?\]\.)'
+    r'|(?P<COMMENT><\#.*?\#>)'
+    r'|(?P<UNTERMINATED_COMMENT><\#)'
+    r'|(?P<UNTERMINATED_EXPR>\.\[)'
+    r'|(?P<MISMATCH>.)'
+    r')?',
+    re.DOTALL,
+)
+# Токены, которые выдаются как есть, без дополнительной обработки
+_PLAIN_KINDS = frozenset(kind for kind, _ in TOKEN_SPECS)
+# Пропуск блока { ... } без токенов (Lexer.skip_block): важны только скобки и то,
+# внутри чего скобка не считается, - строки, комментарии и выражения
+_SKIP_REGEX = re.compile(r'[{}"]|<\#|\.\[')
+_STRING_REGEX = re.compile(dict(TOKEN_SPECS)['STRING'])
+
+
+def unescape_string(s):
+    """Корректно обрабатывает escape-последовательности в строках"""
+    return s.replace('\\"', '"').replace('\\\\', '\\').replace('\\n', '\n').replace('\\t', '\t')
+
+
+def _mismatch_error(buf, start, base=0):
+    """(конец, сообщение) для ошибки, начатой неожиданным символом buf[start].
+
+    Незакрытая строка - одна ошибка до конца строки или входа, идущие подряд
+    неожиданные символы - одна ошибка на всю серию.
+    """
+    size = len(buf)
+    if buf[start] == '"':
+        end = buf.find('\n', start)
+        return (size if end < 0 else end), f"Unterminated string starting at position {base + start}"
+    end = start + 1
+    while end < size and buf[end] != '"':
+        match = MASTER_REGEX.match(buf, end)
+        if match.lastgroup != 'MISMATCH' or match.start('MISMATCH') != end:
+            break
+        end += 1
+    if end - start == 1:
+        return end, f"Unexpected character: '{buf[start]}' at position {base + start}"
+    return end, f"Unexpected characters: '{buf[start:end]}' at position {base + start}"
+
+
+def token_value(kind, text, start, end):
+    """Значение токена по его границам в исходном тексте"""
+    if kind == 'STRING':
+        # Корректная обработка escape-последовательностей
+        return unescape_string(text[start + 1:end - 1])
+    if kind == 'EXPR_CONTENT':
+        return text[start:end].strip()
+    return text[start:end]
+
 
 class Token:
+    __slots__ = ('type', 'value', 'position')
+
     def __init__(self, type, value, position=None):
         self.type = type
         self.value = value
@@ -9,84 +116,315 @@ class Token:
     def __repr__(self):
         return f"Token({self.type}, {self.value!r})"
 
-class Lexer:
+
+class TokenBuffer:
+    """Компактный поток токенов: параллельные массивы кодов типов и смещений.
+
+    Значения не копируются при токенизации, а вырезаются из исходного текста
+    только при обращении к конкретному токену.
+    """
+
     def __init__(self, text):
         self.text = text
+        self.types = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+
+    def __len__(self):
+        return len(self.types)
+
+    def type_at(self, index):
+        return TOKEN_TYPES[self.types[index]]
+
+    def value_at(self, index):
+        return token_value(self.type_at(index), self.text, self.starts[index], self.ends[index])
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        kind = self.type_at(index)
+        start = self.starts[index]
+        return Token(kind, token_value(kind, self.text, start, self.ends[index]), start)
+
+    def __iter__(self):
+        text = self.text
+        for code, start, end in zip(self.types, self.starts, self.ends):
+            kind = TOKEN_TYPES[code]
+            yield Token(kind, token_value(kind, text, start, end), start)
+
+
+class Lexer:
+    def __init__(self, text, chunk_size=CHUNK_SIZE, errors=None):
+        # text - строка целиком либо файловый объект (текстовый или бинарный)
+        self.text = text
+        self.chunk_size = chunk_size
+        # errors - список для режима восстановления: ошибки добавляются в него
+        # парами (позиция, сообщение) вместо исключения, ошибочный участок пропускается
+        self.errors = errors
         self.pos = 0
+        # Глубина пропускаемого блока (см. skip_block), 0 - обычный разбор
+        self._skip_depth = 0
         self.tokens = []
-        self.token_specs = [
-            ('STRING', r'"(?:\\.|[^"\\])*"'),  # Улучшенный паттерн для строк
-            ('STRUCT', r'struct\b'),
-            ('IDENTIFIER', r'[_A-Z][_a-zA-Z0-9]*'),
-            ('NUMBER', r'[+-]?\d+(?:\.\d*)?(?:[eE][+-]?\d+)?'),
-            ('COLON_EQUALS', r':='),
-            ('LBRACE', r'\{'),
-            ('RBRACE', r'\}'),
-            ('COMMA', r','),
-            ('EQUALS', r'='),
-            ('SEMICOLON', r';'),
-            ('PLUS', r'\+'),
-            ('MINUS', r'-'),
-            ('MUL', r'\*'),
-            ('DIV', r'/'),
-            ('SKIP', r'[ \t\n]+'),
-            ('MISMATCH', r'.'),
-        ]
-        self.regex = '|'.join(f'(?P<{pair[0]}>{pair[1]})' for pair in self.token_specs)
-        self.compiled_regex = re.compile(self.regex, re.DOTALL)
+        self.token_specs = TOKEN_SPECS
+        self.compiled_regex = MASTER_REGEX
 
     def tokenize(self):
-        while self.pos < len(self.text):
-            # Обработка многострочных комментариев
-            if self.text.startswith('<#', self.pos):
-                end_pos = self.text.find('#>', self.pos + 2)
-                if end_pos == -1:
-                    raise SyntaxError(f"Unterminated comment starting at position {self.pos}")
-                self.pos = end_pos + 2
-                continue
+        if isinstance(self.text, str):
+            self.tokens.extend(self._tokenize_text())
+        else:
+            self.tokens.extend(self.iter_tokens())
+        return self.tokens
 
-            # Обработка выражений
-            if self.text.startswith('.[', self.pos):
-                self._handle_expression()
-                continue
+    def _tokenize_text(self):
+        # Вход целиком в памяти: один цикл по finditer без буферов _scan и без
+        # промежуточных кортежей - это самый частый случай
+        text = self.text
+        plain_kinds = _PLAIN_KINDS
+        tokens = []
+        append = tokens.append
+        pos = 0
+        while True:
+            for match in MASTER_REGEX.finditer(text, pos):
+                kind = match.lastgroup
+                if kind in plain_kinds:
+                    start, end = match.span(kind)
+                    if kind == 'STRING':
+                        append(Token(kind, unescape_string(text[start + 1:end - 1]), start))
+                    else:
+                        append(Token(kind, text[start:end], start))
+                    continue
+                if kind is None or kind == 'COMMENT':
+                    continue
+                start, end = match.span(kind)
+                if kind == 'EXPR':
+                    append(Token('START_EXPR', '.[', start))
+                    append(Token('EXPR_CONTENT', text[start + 2:end - 2].strip(), start + 2))
+                    append(Token('END_EXPR', '].', end - 2))
+                    continue
+                self.pos = start
+                if kind == 'UNTERMINATED_COMMENT':
+                    message = f"Unterminated comment starting at position {start}"
+                elif kind == 'UNTERMINATED_EXPR':
+                    message = f"Unterminated expression starting at position {start}"
+                else:
+                    end, message = _mismatch_error(text, start)
+                if self.errors is None:
+                    raise SyntaxError(message)
+                self.errors.append((start, message))
+                if kind != 'MISMATCH':
+                    # Незакрытый комментарий или выражение тянется до конца входа
+                    return tokens
+                # Разбор продолжается после ошибочного участка
+                pos = end
+                break
+            else:
+                self.pos = len(text)
+                return tokens
 
-            match = self.compiled_regex.match(self.text, self.pos)
-            if not match:
-                raise SyntaxError(f"Unexpected character at position {self.pos}: '{self.text[self.pos]}'")
-
-            kind = match.lastgroup
-            value = match.group()
-            start_pos = match.start()
-
-            if kind == 'SKIP':
-                pass
-            elif kind == 'MISMATCH':
-                raise SyntaxError(f"Unexpected character: '{value}' at position {start_pos}")
-            elif kind == 'STRING':
-                # Корректная обработка escape-последовательностей
-                unescaped = self._unescape_string(value[1:-1])
-                self.tokens.append(Token('STRING', unescaped, start_pos))
+    def iter_tokens(self):
+        """Лениво выдаёт токены, читая вход порциями по chunk_size символов"""
+        for kind, buf, start, end, base in self._scan():
+            # token_value() развёрнут на месте: вызов функции на каждый токен заметен
+            if kind == 'STRING':
+                value = unescape_string(buf[start + 1:end - 1])
+            elif kind == 'EXPR_CONTENT':
+                value = buf[start:end].strip()
             else:
-                self.tokens.append(Token(kind, value, start_pos))
+                value = buf[start:end]
+            yield Token(kind, value, base + start)
 
-            self.pos = match.end()
+    def skip_block(self):
+        """Пропускает содержимое блока, чья '{' только что выдана iter_tokens().
 
-        return self.tokens
+        Следующим токеном будет парная '}'. Текст просматривается регуляркой только
+        в поисках скобок, строк, комментариев и выражений, токены не создаются,
+        поэтому ошибки внутри блока не обнаруживаются.
+        """
+        self._skip_depth = 1
+
+    def tokenize_compact(self):
+        """Токенизирует весь текст в компактный TokenBuffer без создания объектов Token"""
+        if not isinstance(self.text, str):
+            self.text = ''.join(self._read_chunks())
+        buffer = TokenBuffer(self.text)
+        append_type = buffer.types.append
+        append_start = buffer.starts.append
+        append_end = buffer.ends.append
+        codes = TYPE_CODES
+        for kind, _, start, end, base in self._scan():
+            append_type(codes[kind])
+            append_start(base + start)
+            append_end(base + end)
+        return buffer
 
-    def _handle_expression(self):
-        start_pos = self.pos
-        content_start = self.pos + 2
-        end_pos = self.text.find('].', content_start)
+    def _scan(self):
+        """Выдаёт токены как (тип, буфер, начало, конец, смещение буфера во входе).
 
-        if end_pos == -1:
-            raise SyntaxError(f"Unterminated expression starting at position {start_pos}")
+        Значение токена из буфера вырезает вызывающий код - только если оно нужно.
+        Вход разбирается одним проходом finditer по MASTER_REGEX: совпадения идут
+        подряд, без промежутков, потому что MISMATCH совпадает с любым символом.
+        """
+        if isinstance(self.text, str):
+            # Строка уже целиком в памяти - дочитывать нечего
+            chunks = iter(())
+            buf = self.text
+            eof = True
+        else:
+            chunks = self._read_chunks()
+            buf = ''
+            eof = False
+        base = 0  # абсолютная позиция buf[0] во входе
+        pos = 0   # текущая позиция внутри buf
+
+        while True:
+            size = len(buf)
+            need_more = False
+            resume = False
+            if self._skip_depth:
+                pos, need_more = self._fast_forward(buf, pos, eof)
+            for match in () if need_more else MASTER_REGEX.finditer(buf, pos):
+                kind = match.lastgroup
+                if kind in _PLAIN_KINDS:
+                    start, end = match.span(kind)
+                    # Совпадение, упирающееся в конец порции, может продолжаться в следующей
+                    if not eof and end + LOOKAHEAD > size:
+                        need_more = True
+                        break
+                    yield kind, buf, start, end, base
+                    pos = end
+                    if self._skip_depth:
+                        break  # Парсер попросил пропустить блок за этой '{'
+                    continue
+
+                end = match.end()
+                if not eof and end + LOOKAHEAD > size:
+                    need_more = True
+                    break
+                if kind is None:
+                    pos = end
+                    continue
+                start = match.start(kind)
+                if kind == 'EXPR':
+                    yield 'START_EXPR', buf, start, start + 2, base
+                    yield 'EXPR_CONTENT', buf, start + 2, end - 2, base
+                    yield 'END_EXPR', buf, end - 2, end, base
+                elif kind != 'COMMENT':
+                    # Незакрытые строка, комментарий или выражение могут закрыться дальше по входу
+                    if not eof and (kind != 'MISMATCH' or buf[start] == '"'):
+                        need_more = True
+                        break
+                    if kind == 'UNTERMINATED_COMMENT':
+                        message = f"Unterminated comment starting at position {base + start}"
+                    elif kind == 'UNTERMINATED_EXPR':
+                        message = f"Unterminated expression starting at position {base + start}"
+                    else:
+                        end, message = _mismatch_error(buf, start, base)
+                        # Серия неожиданных символов может продолжаться в следующей порции
+                        if not eof and end + LOOKAHEAD > size:
+                            need_more = True
+                            break
+                    self.pos = base + start
+                    if self.errors is None:
+                        raise SyntaxError(message)
+                    self.errors.append((base + start, message))
+                    if kind != 'MISMATCH':
+                        # Незакрытый комментарий или выражение тянется до конца входа
+                        return
+                    pos = end
+                    resume = True
+                    break
+                pos = end
+
+            if resume:
+                # Разбор продолжается после ошибочного участка
+                continue
+
+            if not need_more:
+                if self._skip_depth:
+                    continue
+                break
+            # Отбрасываем уже разобранную часть буфера. Незакрытый токен разбирается
+            # заново с начала, поэтому дочитываем не меньше, чем его уже прочитанная
+            # часть: буфер растёт вдвое, и длинный токен сканируется O(n), а не O(n²)
+            parts = [buf[pos:]]
+            wanted = len(parts[0])
+            read = 0
+            while True:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    eof = True
+                    break
+                parts.append(chunk)
+                read += len(chunk)
+                if read >= wanted:
+                    break
+            buf = ''.join(parts)
+            base += pos
+            pos = 0
+
+        self.pos = base + pos
+
+    def _fast_forward(self, buf, pos, eof):
+        # Ищет конец пропускаемого блока в buf. Возвращает (позиция, нужно ли
+        # дочитать вход); найденная '}' остаётся для обычного разбора
+        depth = self._skip_depth
+        while True:
+            match = _SKIP_REGEX.search(buf, pos)
+            if match is None:
+                if not eof:
+                    # Последний символ может начинать '<#' или '.[' следующей порции
+                    self._skip_depth = depth
+                    return max(pos, len(buf) - 1), True
+                pos = len(buf)
+                break
+            start = match.start()
+            char = buf[start]
+            if char == '{':
+                depth += 1
+                pos = start + 1
+                continue
+            if char == '}':
+                depth -= 1
+                if not depth:
+                    self._skip_depth = 0
+                    return start, False
+                pos = start + 1
+                continue
+            if char == '"':
+                string = _STRING_REGEX.match(buf, start)
+                end = string.end() if string is not None else -1
+            else:
+                end = buf.find('#>' if char == '<' else '].', start + 2)
+                end = end + 2 if end >= 0 else -1
+            if end < 0:
+                if not eof:
+                    self._skip_depth = depth
+                    return start, True
+                # Незакрытая конструкция: о ней сообщит обычный разбор
+                pos = start
+                break
+            pos = end
+        self._skip_depth = 0
+        return pos, False
 
-        content = self.text[content_start:end_pos]
-        self.tokens.append(Token('START_EXPR', '.[', start_pos))
-        self.tokens.append(Token('EXPR_CONTENT', content.strip(), content_start))
-        self.tokens.append(Token('END_EXPR', '].', end_pos))
-        self.pos = end_pos + 2
+    def _read_chunks(self):
+        if isinstance(self.text, str):
+            yield self.text
+            return
 
-    def _unescape_string(self, s):
-        """Корректно обрабатывает escape-последовательности в строках"""
-        return s.replace('\\"', '"').replace('\\\\', '\\').replace('\\n', '\n').replace('\\t', '\t')
\ No newline at end of file
+        decoder = None
+        while True:
+            chunk = self.text.read(self.chunk_size)
+            if not chunk:
+                break
+            if isinstance(chunk, bytes):
+                # Многобайтовый символ UTF-8 может быть разрезан между порциями
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder('utf-8')()
+                chunk = decoder.decode(chunk)
+            if chunk:
+                yield chunk
+        if decoder is not None:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
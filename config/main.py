@@ -1,57 +1,284 @@
+import os
 import sys
-import json
 import argparse
 from pathlib import Path
-from config.lexer import Lexer
-from config.parser import Parser
-from config.evaluator import Evaluator
+from config.optimizer import Optimizer
+from config.parser import ParseErrors
+from config.pipeline import prepare_ast, write_ast
+from config.batch import collect_inputs, run_batch, print_summary, store_in_cache
+from config.formats import FORMATS, DEFAULT_FORMAT
+from config.cache import CompilationCache, DEFAULT_MAX_SIZE, parse_size
+from config.watch import Watcher, DEFAULT_INTERVAL, DEFAULT_DEBOUNCE
+from config.selection import select_source, format_raw
+from config.writer import atomic_output, iter_value_chunks, INDENT
+
+
+def positive_int(text):
+    """Тип аргумента argparse: целое число больше нуля"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{text}'") from None
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return value
 
 
 def main():
     parser = argparse.ArgumentParser(description='Config language to JSON converter')
-    parser.add_argument('-i', '--input', required=True, help='Input configuration file path')
-    parser.add_argument('-o', '--output', required=True, help='Output JSON file path')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('-i', '--input', help="Input configuration file path ('-' for stdin)")
+    source.add_argument('-b', '--batch', metavar='SOURCE',
+                        help='Directory, glob pattern or manifest file with input paths')
+    parser.add_argument('-o', '--output',
+                        help="Output file path (output directory in batch mode; "
+                             "with --select optional, '-' or omitted for stdout)")
+    parser.add_argument('--format', choices=list(FORMATS), default=DEFAULT_FORMAT,
+                        help='Output format: indented JSON (default), compact JSON, '
+                             'JSON Lines with one dotted path per line, MessagePack, '
+                             'or an indexed binary file for memory-mapped lookups')
+    parser.add_argument('-j', '--jobs', type=positive_int, default=os.cpu_count(),
+                        help='Number of worker processes in batch mode')
+    parser.add_argument('--stats', action='store_true', help='Print optimizer and sharing statistics')
+    parser.add_argument('--cache-dir', default=os.environ.get('CONFIGLANG_CACHE_DIR'),
+                        help='Compilation cache directory (default: $CONFIGLANG_CACHE_DIR)')
+    parser.add_argument('--cache-size', type=parse_size, default=DEFAULT_MAX_SIZE,
+                        help='Cache size limit, e.g. 512K, 64M, 1G (default: 256M)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not use the compilation cache')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and recompile input files when they change')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help='Polling interval in seconds for --watch')
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help='Seconds a changed file must stay unchanged before recompiling')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print time, CPU time, peak memory and counters for each stage')
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help="Write the per-stage profile as JSON ('-' for stdout)")
+    parser.add_argument('--all-errors', action='store_true',
+                        help='Report every syntax error with line and column instead of stopping at the first')
+    parser.add_argument('--sweep', metavar='TABLE',
+                        help='CSV or JSON Lines table of constant overrides; '
+                             'writes one JSON per row into the output directory')
+    parser.add_argument('--select', metavar='PATH', nargs='+',
+                        help='Evaluate and print only the values at these dotted paths, e.g. SSL.CertPath')
+    parser.add_argument('--raw', action='store_true',
+                        help='With --select: print each value on its own line instead of JSON')
     args = parser.parse_args()
+    if args.output is None and not args.select:
+        parser.error('the following arguments are required: -o/--output')
+    if args.select and (args.batch or args.watch or args.sweep):
+        parser.error('--select requires a single --input file')
+    cache = None
+    if args.cache_dir and not args.no_cache:
+        cache = CompilationCache(args.cache_dir, args.cache_size)
+
+    if args.watch:
+        if args.input == '-':
+            parser.error('--watch cannot read from stdin')
+        Watcher(args.batch or args.input, args.output, batch=bool(args.batch), cache=cache,
+                interval=args.interval, debounce=args.debounce,
+                output_format=args.format).run()
+        return
+
+    if args.batch:
+        if args.sweep:
+            parser.error('--sweep requires a single --input file')
+        sys.exit(_main_batch(args, cache))
 
     input_path = Path(args.input)
-    if not input_path.exists():
+    if args.input != '-' and not input_path.exists():
         sys.stderr.write(f"Error: Input file '{args.input}' does not exist\n")
         sys.exit(1)
 
+    if args.select:
+        sys.exit(_main_select(args))
+
+    if args.profile or args.profile_json:
+        sys.exit(_main_profile(args))
+
+    if args.sweep:
+        sys.exit(_main_sweep(args))
+
+    cache_key = None
+    if cache is not None and args.input != '-':
+        # При попадании в кеш Lexer, Parser и Evaluator не запускаются
+        try:
+            cache_key = cache.key_for(input_path, args.format)
+            if cache.fetch(cache_key, args.output, args.format):
+                print(f"Successfully converted '{args.input}' to '{args.output}' (cached)")
+                return
+        except Exception as e:
+            sys.stderr.write(f"Warning: compilation cache is unavailable: {str(e)}\n")
+            cache_key = None
+
     try:
-        with open(input_path, 'r', encoding='utf-8') as f:
-            input_text = f.read()
+        input_file = sys.stdin if args.input == '-' else open(input_path, 'r', encoding='utf-8')
     except Exception as e:
         sys.stderr.write(f"Error reading input file: {str(e)}\n")
         sys.exit(1)
 
     try:
-        lexer = Lexer(input_text)
-        tokens = lexer.tokenize()
-
-        parser = Parser(tokens)
-        ast = parser.parse()
-
-        evaluator = Evaluator()
-        json_data = evaluator.evaluate(ast)
+        # Лексер читает файл порциями, а парсер забирает токены по одному,
+        # поэтому весь текст и полный список токенов в памяти не хранятся
+        optimizer = Optimizer()
+        ast = prepare_ast(input_file, optimizer, None if args.input == '-' else input_path,
+                          recover=args.all_errors)
+    except ParseErrors as e:
+        for line, column, message in e.errors:
+            sys.stderr.write(f"Syntax error at line {line}, column {column}: {message}\n")
+        count = len(e.errors)
+        sys.stderr.write(f"{count} syntax {'error' if count == 1 else 'errors'} found\n")
+        sys.exit(1)
     except SyntaxError as e:
         sys.stderr.write(f"Syntax error: {str(e)}\n")
         sys.exit(1)
+    except UnicodeDecodeError as e:
+        sys.stderr.write(f"Error reading input file: {str(e)}\n")
+        sys.exit(1)
     except Exception as e:
         sys.stderr.write(f"Processing error: {str(e)}\n")
         sys.exit(1)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
 
     try:
-        output_path = Path(args.output)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        # Результат вычисляется по ходу записи и целиком в памяти не собирается
+        write_ast(ast, args.output, args.format)
+        store_in_cache(cache, cache_key, args.output, ast['dependencies'], args.format)
+        print(f"Successfully converted '{args.input}' to '{args.output}'")
+        if args.stats:
+            print(f"Optimizer: folded {optimizer.folded}, deduplicated {optimizer.deduplicated}, "
+                  f"eliminated {optimizer.eliminated} unused constants")
+            sharing = ast['sharing']
+            print(f"Sharing: {sharing['shared_structs']} structs, {sharing['interned_strings']} strings, "
+                  f"{sharing['shared_values']} other values reused, "
+                  f"~{sharing['saved_bytes'] / 1024:.1f} KB saved")
+    except OSError as e:
+        sys.stderr.write(f"Error writing output file: {str(e)}\n")
+        sys.exit(1)
+    except Exception as e:
+        sys.stderr.write(f"Processing error: {str(e)}\n")
+        sys.exit(1)
+
+
+def _main_profile(args):
+    # Профилирование всегда выполняет полную компиляцию, кеш не используется.
+    # Модуль импортируется здесь: вместе с tracemalloc он заметен в каждом запуске
+    from config.profiling import profile_compile
+    try:
+        input_file = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+        try:
+            profile = profile_compile(input_file, args.output,
+                                      path=None if args.input == '-' else args.input,
+                                      output_format=args.format)
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+    except SyntaxError as e:
+        sys.stderr.write(f"Syntax error: {str(e)}\n")
+        return 1
+    except Exception as e:
+        sys.stderr.write(f"Processing error: {str(e)}\n")
+        return 1
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, indent=2, ensure_ascii=False)
+    if args.profile_json != '-':
+        # Иначе stdout должен содержать только JSON профиля
         print(f"Successfully converted '{args.input}' to '{args.output}'")
+    if args.profile:
+        print(profile.format_table())
+    if args.profile_json == '-':
+        print(profile.to_json())
+    elif args.profile_json:
+        with open(args.profile_json, 'w', encoding='utf-8') as f:
+            f.write(profile.to_json())
+    return 0
+
+
+def _main_select(args):
+    # Разбираются и вычисляются только нужные поля, кеш компиляции не используется
+    try:
+        input_file = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+        try:
+            values = select_source(input_file, args.select,
+                                   path=None if args.input == '-' else args.input)
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+        if args.raw:
+            text = ''.join(f"{format_raw(value)}\n" for value in values.values())
+        else:
+            # Один путь - само значение, несколько - объект путь -> значение
+            data = next(iter(values.values())) if len(values) == 1 else values
+            text = ''.join(iter_value_chunks(data, INDENT)) + '\n'
+    except KeyError as e:
+        sys.stderr.write(f"Error: path '{e.args[0]}' not found\n")
+        return 1
+    except SyntaxError as e:
+        sys.stderr.write(f"Syntax error: {str(e)}\n")
+        return 1
     except Exception as e:
+        sys.stderr.write(f"Processing error: {str(e)}\n")
+        return 1
+
+    if args.output is None or args.output == '-':
+        sys.stdout.write(text)
+        return 0
+    try:
+        with atomic_output(args.output) as f:
+            f.write(text)
+    except OSError as e:
         sys.stderr.write(f"Error writing output file: {str(e)}\n")
-        sys.exit(1)
+        return 1
+    return 0
+
+
+def _main_sweep(args):
+    # Конфигурация разбирается один раз, кеш компиляции не используется
+    from config.sweep import read_overrides, run_sweep
+    try:
+        rows = read_overrides(args.sweep)
+    except Exception as e:
+        sys.stderr.write(f"Error reading sweep table: {str(e)}\n")
+        return 1
+
+    prefix = 'variant' if args.input == '-' else Path(args.input).stem
+    try:
+        input_file = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+        try:
+            results = run_sweep(input_file, rows, args.output, prefix,
+                                path=None if args.input == '-' else args.input,
+                                output_format=args.format)
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+    except SyntaxError as e:
+        sys.stderr.write(f"Syntax error: {str(e)}\n")
+        return 1
+    except Exception as e:
+        sys.stderr.write(f"Processing error: {str(e)}\n")
+        return 1
+
+    print_summary(results)
+    return 0 if all(result.ok for result in results) else 1
+
+
+def _main_batch(args, cache):
+    try:
+        base_dir, inputs = collect_inputs(args.batch)
+    except Exception as e:
+        sys.stderr.write(f"Error: {str(e)}\n")
+        return 1
+
+    results = run_batch(inputs, base_dir, args.output, jobs=args.jobs, cache=cache,
+                        output_format=args.format)
+    if cache is not None:
+        # Рабочие процессы видят только свои записи, итоговый размер проверяем здесь
+        cache.evict()
+    print_summary(results)
+    return 0 if all(result.ok for result in results) else 1
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
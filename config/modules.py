@@ -0,0 +1,195 @@
+"""Включение файлов: include "path.conf".
+
+Включаемый модуль - обычный файл конфигурации, в котором корневая структура
+необязательна. Его константы (в том числе структуры) вставляются на место include,
+как если бы были объявлены в этом месте включающего файла. Каждый модуль
+вставляется один раз, при первом включении: повторные include того же файла
+ничего не добавляют, поэтому переопределение константы после include не
+откатывается обратно. Пути считаются от каталога включающего файла.
+
+Граф включений читается по уровням: независимые файлы одного уровня лексируются
+и разбираются параллельно на пуле потоков. Разобранные модули хранятся в
+ModuleCache и переиспользуются между корневыми файлами (например, в пакетной
+сборке), пока у файла не изменились mtime и размер.
+"""
+import os
+import threading
+from pathlib import Path
+from config.ast import ConstDeclaration, ConstExpression, Struct, TemplateInstance
+from config.expressions import compile_expression
+from config.lexer import Lexer
+from config.parser import Parser
+
+# Потоков на разбор одного уровня графа включений
+DEFAULT_JOBS = min(8, os.cpu_count() or 1)
+
+
+class ModuleCache:
+    """Разобранные модули по абсолютному пути.
+
+    Запись действительна, пока (mtime_ns, size) файла не изменились. Кеш хранит
+    результат Parser.parse() как есть: при связывании объявления копируются,
+    поэтому оптимизатор и вычислитель никогда не изменяют закешированное дерево.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def load(self, path):
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                module = Parser(Lexer(f).iter_tokens()).parse(require_root=False)
+            except SyntaxError as e:
+                raise SyntaxError(f"{path}: {str(e)}") from None
+        with self._lock:
+            self.misses += 1
+            self._entries[path] = (signature, module)
+        return module
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Общий кеш процесса: в пакетной сборке его видят все файлы одного рабочего процесса
+default_cache = ModuleCache()
+
+
+def link_includes(ast, path=None, cache=None, jobs=DEFAULT_JOBS):
+    """Подставляет константы включённых модулей в ast['consts'].
+
+    path - путь корневого файла (None для строки или stdin: пути считаются от
+    текущего каталога). Добавляет ast['dependencies'] - абсолютные пути всех
+    включённых файлов. Возвращает ast.
+    """
+    if not ast.get('includes'):
+        ast['dependencies'] = []
+        return ast
+    cache = default_cache if cache is None else cache
+    root = os.path.abspath(path) if path is not None else '<input>'
+    base_dir = Path(root).parent if path is not None else Path.cwd()
+
+    modules = _load_graph(root, base_dir, ast, cache, jobs)
+    ast['consts'], dependencies = _link(root, modules)
+    ast['dependencies'] = dependencies
+    return ast
+
+
+def _resolve(base_dir, include):
+    return os.path.abspath(base_dir / include.path)
+
+
+def _load_graph(root, base_dir, ast, cache, jobs):
+    """Все модули, достижимые из корня: путь -> (каталог, результат разбора)"""
+    # Импорт здесь: concurrent.futures тянет за собой logging, а файлам без include
+    # пул не нужен
+    from concurrent.futures import ThreadPoolExecutor
+    modules = {root: (base_dir, ast)}
+    level = [(root, include) for include in ast['includes']]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while level:
+            paths = []
+            for parent, include in level:
+                path = _resolve(modules[parent][0], include)
+                if path in modules or path in paths:
+                    continue
+                if not os.path.isfile(path):
+                    raise FileNotFoundError(
+                        f"Included file '{include.path}' does not exist "
+                        f"(included from '{parent}' at position {include.position})")
+                paths.append(path)
+
+            level = []
+            for path, module in zip(paths, executor.map(cache.load, paths)):
+                modules[path] = (Path(path).parent, module)
+                level.extend((path, include) for include in module['includes'])
+    return modules
+
+
+def _link(root, modules):
+    """Обход графа в глубину (явный стек) с проверкой циклов.
+
+    Возвращает (объявления констант в порядке подстановки, пути включённых файлов).
+    """
+    consts = []
+    dependencies = []
+    done = {root}
+    # Для каждого открытого модуля: путь, его разбор и номер следующего include
+    stack = [(root, modules[root][1], 0)]
+    emitted = [0]  # сколько объявлений модуля на вершине стека уже скопировано
+    while stack:
+        path, module, next_include = stack[-1]
+        includes = module['includes']
+        stop = includes[next_include].index if next_include < len(includes) else len(module['consts'])
+        own = path == root
+        for decl in module['consts'][emitted[-1]:stop]:
+            consts.append(decl if own else _copy_declaration(decl))
+        emitted[-1] = stop
+
+        if next_include == len(includes):
+            stack.pop()
+            emitted.pop()
+            continue
+
+        stack[-1] = (path, module, next_include + 1)
+        target = _resolve(modules[path][0], includes[next_include])
+        if any(target == open_path for open_path, _, _ in stack):
+            chain = [open_path for open_path, _, _ in stack]
+            chain = chain[chain.index(target):] + [target]
+            raise ValueError("Include cycle: " + ' -> '.join(chain))
+        if target in done:
+            continue
+        done.add(target)
+        dependencies.append(target)
+        stack.append((target, modules[target][1], 0))
+        emitted.append(0)
+    return consts, dependencies
+
+
+def _copy_declaration(decl):
+    # Оптимизатор заменяет значения и поля на месте, поэтому закешированный модуль
+    # копируется. Литералы и массивы не изменяются и разделяются между копиями,
+    # а скомпилированная программа выражения - чистая функция и тоже общая
+    return ConstDeclaration(decl.name, _copy_node(decl.value_node))
+
+
+def _copy_node(node):
+    if isinstance(node, ConstExpression):
+        return _copy_expression(node)
+    if isinstance(node, TemplateInstance):
+        return TemplateInstance(node.name, _copy_node(node.overrides))
+    if not isinstance(node, Struct):
+        return node
+
+    root = Struct()
+    stack = [(node, root)]
+    while stack:
+        source, target = stack.pop()
+        for name, value in source.fields.items():
+            if isinstance(value, Struct):
+                child = target.fields[name] = Struct()
+                stack.append((value, child))
+            elif isinstance(value, (ConstExpression, TemplateInstance)):
+                target.fields[name] = _copy_node(value)
+            else:
+                target.fields[name] = value
+    return root
+
+
+def _copy_expression(node):
+    if node.program is None:
+        node.program = compile_expression(node.tokens)
+    copy = ConstExpression(node.tokens, node.names)
+    copy.program = node.program
+    return copy
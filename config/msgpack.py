@@ -0,0 +1,192 @@
+"""Кодировщик и декодер MessagePack на чистом Python.
+
+Поддерживаются типы, которые может выдать вычислитель: dict (и любой Mapping,
+например экземпляр шаблона) со строковыми ключами, list/tuple, str, float, int,
+а также bool и None. Числа с плавающей точкой всегда пишутся как float 64,
+целые - в самом коротком подходящем формате.
+"""
+import struct
+from collections.abc import Mapping
+
+_pack_double = struct.Struct('>Bd').pack
+_unpack_from = struct.unpack_from
+
+
+def packb(value):
+    """Кодирует значение в bytes"""
+    out = bytearray()
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        value_type = type(value)
+        if value_type is float:
+            out += _pack_double(0xcb, value)
+        elif value_type is str:
+            _pack_str(out, value)
+        elif value_type is dict or isinstance(value, Mapping):
+            _pack_header(out, len(value), 0x80, 0xde, 0xdf)
+            # Стек обрабатывается с конца: пары кладём в обратном порядке
+            for key, item in reversed(list(value.items())):
+                stack.append(item)
+                stack.append(_Key(key))
+        elif value_type is _Key:
+            _pack_str(out, value.name)
+        elif value_type is list or value_type is tuple:
+            _pack_header(out, len(value), 0x90, 0xdc, 0xdd)
+            stack.extend(reversed(value))
+        elif value is None:
+            out.append(0xc0)
+        elif value is True:
+            out.append(0xc3)
+        elif value is False:
+            out.append(0xc2)
+        elif value_type is int:
+            _pack_int(out, value)
+        else:
+            raise TypeError(f"Object of type {value_type.__name__} is not MessagePack serializable")
+    return bytes(out)
+
+
+class _Key:
+    # Ключ словаря на стеке: отличает ключ от строкового значения
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        if type(name) is not str:
+            raise TypeError(f"Keys must be str, not {type(name).__name__}")
+        self.name = name
+
+
+def _pack_header(out, size, fix, code16, code32):
+    if size < 16:
+        out.append(fix | size)
+    elif size < 0x10000:
+        out += struct.pack('>BH', code16, size)
+    else:
+        out += struct.pack('>BI', code32, size)
+
+
+def _pack_str(out, text):
+    data = text.encode('utf-8')
+    size = len(data)
+    if size < 32:
+        out.append(0xa0 | size)
+    elif size < 0x100:
+        out += struct.pack('>BB', 0xd9, size)
+    elif size < 0x10000:
+        out += struct.pack('>BH', 0xda, size)
+    else:
+        out += struct.pack('>BI', 0xdb, size)
+    out += data
+
+
+def _pack_int(out, value):
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -32 <= value < 0:
+        out.append(value & 0xff)
+    elif 0 <= value < 0x10000000000000000:
+        for code, limit, fmt in ((0xcc, 0x100, '>BB'), (0xcd, 0x10000, '>BH'),
+                                 (0xce, 0x100000000, '>BI'), (0xcf, 0x10000000000000000, '>BQ')):
+            if value < limit:
+                out += struct.pack(fmt, code, value)
+                return
+    elif -0x8000000000000000 <= value < 0:
+        for code, limit, fmt in ((0xd0, 0x80, '>Bb'), (0xd1, 0x8000, '>Bh'),
+                                 (0xd2, 0x80000000, '>Bi'), (0xd3, 0x8000000000000000, '>Bq')):
+            if value >= -limit:
+                out += struct.pack(fmt, code, value)
+                return
+    else:
+        raise OverflowError("Integer is out of MessagePack range")
+
+
+# Форматы фиксированной длины: код -> (формат struct, размер)
+_FIXED = {
+    0xca: ('>f', 4), 0xcb: ('>d', 8),
+    0xcc: ('>B', 1), 0xcd: ('>H', 2), 0xce: ('>I', 4), 0xcf: ('>Q', 8),
+    0xd0: ('>b', 1), 0xd1: ('>h', 2), 0xd2: ('>i', 4), 0xd3: ('>q', 8),
+}
+_STR_SIZES = {0xd9: ('>B', 1), 0xda: ('>H', 2), 0xdb: ('>I', 4)}
+_ARRAY_SIZES = {0xdc: ('>H', 2), 0xdd: ('>I', 4)}
+_MAP_SIZES = {0xde: ('>H', 2), 0xdf: ('>I', 4)}
+
+
+def unpackb(data):
+    """Декодирует bytes в значение"""
+    data = memoryview(data)
+    pos = 0
+    # Открытые контейнеры: [контейнер, сколько элементов осталось, ожидаемый ключ]
+    stack = []
+    result = None
+    while True:
+        code = data[pos]
+        pos += 1
+        if code <= 0x7f:
+            value = code
+        elif code >= 0xe0:
+            value = code - 0x100
+        elif 0xa0 <= code <= 0xbf:
+            size = code & 0x1f
+            value = str(data[pos:pos + size], 'utf-8')
+            pos += size
+        elif code in _FIXED:
+            fmt, size = _FIXED[code]
+            value = _unpack_from(fmt, data, pos)[0]
+            pos += size
+        elif code in _STR_SIZES:
+            fmt, width = _STR_SIZES[code]
+            size = _unpack_from(fmt, data, pos)[0]
+            pos += width
+            value = str(data[pos:pos + size], 'utf-8')
+            pos += size
+        elif code == 0xc0:
+            value = None
+        elif code == 0xc2:
+            value = False
+        elif code == 0xc3:
+            value = True
+        else:
+            if 0x80 <= code <= 0x8f or code in _MAP_SIZES:
+                container, size = {}, code & 0x0f
+                if code in _MAP_SIZES:
+                    fmt, width = _MAP_SIZES[code]
+                    size = _unpack_from(fmt, data, pos)[0]
+                    pos += width
+            elif 0x90 <= code <= 0x9f or code in _ARRAY_SIZES:
+                container, size = [], code & 0x0f
+                if code in _ARRAY_SIZES:
+                    fmt, width = _ARRAY_SIZES[code]
+                    size = _unpack_from(fmt, data, pos)[0]
+                    pos += width
+            else:
+                raise ValueError(f"Unsupported MessagePack type 0x{code:02x} at offset {pos - 1}")
+            if size:
+                stack.append([container, size, None])
+                continue
+            value = container
+
+        # Готовое значение кладём в открытый контейнер; закрываем заполненные
+        while True:
+            if not stack:
+                result = value
+                break
+            frame = stack[-1]
+            container = frame[0]
+            if type(container) is dict:
+                if frame[2] is None:
+                    frame[2] = (value,)
+                    break
+                container[frame[2][0]] = value
+                frame[2] = None
+            else:
+                container.append(value)
+            frame[1] -= 1
+            if frame[1]:
+                break
+            stack.pop()
+            value = container
+        if not stack:
+            if pos != len(data):
+                raise ValueError(f"Extra data after MessagePack value at offset {pos}")
+            return result
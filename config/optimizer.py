@@ -0,0 +1,126 @@
+from config.ast import Number, String, Struct, Identifier, ConstExpression, TemplateInstance
+from config.dependencies import resolve_constants, root_references
+from config.expressions import compile_expression, parse_number
+
+
+class Optimizer:
+    """Проход между Parser.parse() и Evaluator.evaluate().
+
+    Удаляет константы, недостижимые из корневой структуры, и упорядочивает остальные
+    по зависимостям. Сворачивает выражения и ссылки, зависящие только от литералов
+    и уже известных констант, в литералы. Одинаковые (после нормализации) выражения вычисляются
+    один раз: повторные вхождения получают уже готовый результат, а несворачиваемые -
+    общий узел с одной скомпилированной программой.
+    """
+
+    def __init__(self, unknown=()):
+        # unknown - имена констант, которые нельзя считать известными (например, переопределяемые)
+        self.unknown = set(unknown)
+        self.folded = 0
+        self.deduplicated = 0
+        self.eliminated = 0
+        self._known = {}
+        self._memo = {}
+        # Общие (hash-consed) структуры встречаются в AST много раз, обходим их один раз
+        self._visited = set()
+
+    @property
+    def stats(self):
+        return {'folded': self.folded, 'deduplicated': self.deduplicated, 'eliminated': self.eliminated}
+
+    def optimize(self, ast):
+        # Переопределяемые константы не фиксируются: строка таблицы может их не задать,
+        # и тогда понадобятся их собственные зависимости
+        names = root_references(ast)
+        # Вместо узлов выражений остаются их имена: свёрнутые выражения
+        # освобождаются сразу, а не доживают до полной сборки мусора
+        ast['references'] = names
+        consts = resolve_constants(ast['consts'], names)
+        self.eliminated += len(ast['consts']) - len(consts)
+        # У переобъявленного имени значение зависит от места ссылки, а общие узлы
+        # (hash-consing) встречаются в разных местах, поэтому такие имена не сворачиваются
+        seen = set()
+        redeclared = {decl.name for decl in ast['consts'] if decl.name in seen or seen.add(decl.name)}
+        # Исходный порядок сохраняется: по нему разрешаются ссылки на переобъявленные имена
+        kept = set(consts)
+        ast['consts'] = [decl for decl in ast['consts'] if decl in kept]
+        for decl in consts:
+            # _memo не сбрасывается: у каждого сворачиваемого имени одно значение,
+            # и оно известно раньше любого выражения, которое от него зависит
+            decl.value_node = self._optimize_node(decl.value_node)
+            if (isinstance(decl.value_node, (Number, String)) and decl.name not in self.unknown
+                    and decl.name not in redeclared):
+                self._known[decl.name] = decl.value_node.value
+            else:
+                self._known.pop(decl.name, None)
+
+        ast['root'] = self._optimize_node(ast['root'])
+        return ast
+
+    def _optimize_node(self, node):
+        if isinstance(node, ConstExpression):
+            return self._optimize_expression(node)
+        elif isinstance(node, Struct):
+            self._optimize_struct(node)
+            return node
+        elif isinstance(node, TemplateInstance):
+            self._optimize_struct(node.overrides)
+            return node
+        elif isinstance(node, Identifier):
+            if node.name not in self._known:
+                return node
+            self.folded += 1
+            value = self._known[node.name]
+            return String(value) if isinstance(value, str) else Number(value)
+        return node
+
+    def _optimize_struct(self, struct_node):
+        # Обход в порядке исходного текста
+        if struct_node in self._visited:
+            return
+        self._visited.add(struct_node)
+        stack = [(struct_node.fields, iter(list(struct_node.fields.items())))]
+        while stack:
+            fields, items = stack[-1]
+            for name, value_node in items:
+                # Заменённые поля экземпляра шаблона обходятся на том же стеке
+                child = value_node.overrides if isinstance(value_node, TemplateInstance) else value_node
+                if isinstance(child, Struct):
+                    if child not in self._visited:
+                        self._visited.add(child)
+                        stack.append((child.fields, iter(list(child.fields.items()))))
+                        break
+                    continue
+                fields[name] = self._optimize_node(value_node)
+            else:
+                stack.pop()
+
+    def _optimize_expression(self, node):
+        key = self._normalize(node.tokens)
+        if key in self._memo:
+            self.deduplicated += 1
+            return self._memo[key]
+
+        if node.program is None:
+            node.program = compile_expression(node.tokens)
+        try:
+            value = node.program(self._known)
+            if not isinstance(value, (int, float)):
+                raise TypeError("Only numbers are folded")
+            result = Number(value)
+            self.folded += 1
+        except Exception:
+            # Выражение зависит от неизвестных констант или содержит ошибку,
+            # которую должен сообщить вычислитель - оставляем узел как есть
+            result = node
+        self._memo[key] = result
+        return result
+
+    @staticmethod
+    def _normalize(tokens):
+        # Числовые литералы приводятся к одной записи: '10', '10.0' и '1e1' совпадают
+        normalized = []
+        for token in tokens:
+            value = parse_number(token)
+            normalized.append(repr(value) if value is not None else token)
+        return tuple(normalized)
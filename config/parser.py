@@ -1,17 +1,101 @@
-from config.ast import ConstDeclaration, String, Struct, Number, ConstExpression, Identifier
+import sys
+from config.ast import (ConstDeclaration, String, Struct, Number, ConstExpression, Identifier, Array, Include,
+                        TemplateInstance)
+from config.utils import LineIndex
+
+_NOT_READ = object()
+
+
+def selection_tree(paths):
+    """Дерево выбранных путей: имя поля -> поддерево, None - поле выбрано целиком"""
+    tree = {}
+    for path in paths:
+        parts = path.split('.')
+        if not all(parts):
+            raise ValueError(f"Invalid path '{path}'")
+        node = tree
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is None:
+                break  # уже выбран весь родитель
+            node = child
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+class ParseErrors(SyntaxError):
+    """Все синтаксические ошибки, найденные парсером в режиме восстановления"""
+
+    def __init__(self, errors):
+        # errors - список (строка, столбец, сообщение) в порядке следования в тексте
+        self.errors = errors
+        super().__init__(f"{len(errors)} syntax errors")
+
+    def __str__(self):
+        return '\n'.join(f"line {line}, column {column}: {message}"
+                         for line, column, message in self.errors)
+
 
 class Parser:
-    def __init__(self, tokens):
-        self.tokens = tokens
-        self.pos = 0
-        self.current_token = self.tokens[0] if tokens else None
+    def __init__(self, tokens, recover=False, source=None, errors=None, select=None, lexer=None):
+        # tokens - список или любой итератор токенов (например, Lexer.iter_tokens()),
+        # который читается лениво, по одному токену вперёд.
+        # recover=True - режим восстановления: ошибка записывается, разбор продолжается
+        # со следующего ',', ';' или '}', а в конце все ошибки выбрасываются одним
+        # ParseErrors. source - исходный текст для перевода позиций в строку и столбец,
+        # errors - общий с Lexer(errors=...) список ошибок (позиция, сообщение).
+        # select - пути с точками ('SSL.CertPath'): поля корня вне этих путей
+        # пропускаются по токенам, узлы для них не создаются (config.selection).
+        # lexer - Lexer, чей iter_tokens() передан в tokens: пропускаемые блоки { ... }
+        # он проходит по тексту, не создавая и токенов (Lexer.skip_block)
+        self.recover = recover
+        self._lexer = lexer
+        self.select = None if select is None else selection_tree(select)
+        self.source = source
+        self.errors = [] if errors is None else errors
+        self._tokens = iter(tokens)
+        self._next_token = _NOT_READ
+        self.current_token = next(self._tokens, None)
+
+        # Hash-consing: одинаковые значения и структуры хранятся одним общим узлом.
+        # Оптимизатор заменяет узлы, а не правит их, поэтому общий узел можно
+        # подставить везде, где встречается такой же текст
+        self._strings = {}      # значение -> String
+        self._numbers = {}      # текст числа -> Number (по тексту: 0 и -0 - разные узлы)
+        self._identifiers = {}  # имя -> Identifier
+        self._expressions = {}  # текст выражения -> ConstExpression
+        self._arrays = {}       # общие элементы -> Array
+        # Хеш полей -> Struct или список Struct с этим хешем. Сами ключи не хранятся:
+        # кортеж полей на каждую структуру удвоил бы пиковую память разбора
+        self._structs = {}
+        self._names = {}        # имя поля -> общий объект str
+        # Ссылки корневой структуры в порядке появления (ast['references']): имена
+        # констант и узлы выражений - имена в выражениях выделяются только по запросу
+        # (config.dependencies.root_references). Вычислителю не нужно ради них
+        # обходить всё дерево. None - вне корня
+        self._references = None
+        self.shared_structs = 0
+        self.interned_strings = 0
+        self.shared_values = 0
+        self.saved_bytes = 0
+
+    @property
+    def stats(self):
+        return {'shared_structs': self.shared_structs, 'interned_strings': self.interned_strings,
+                'shared_values': self.shared_values, 'saved_bytes': self.saved_bytes}
 
     def _advance(self):
-        self.pos += 1
-        if self.pos < len(self.tokens):
-            self.current_token = self.tokens[self.pos]
+        if self._next_token is _NOT_READ:
+            self.current_token = next(self._tokens, None)
         else:
-            self.current_token = None
+            self.current_token = self._next_token
+            self._next_token = _NOT_READ
+
+    def _peek(self):
+        if self._next_token is _NOT_READ:
+            self._next_token = next(self._tokens, None)
+        return self._next_token
 
     def _expect(self, token_type):
         if self.current_token is None or self.current_token.type != token_type:
@@ -22,28 +106,111 @@ class Parser:
         self._advance()
         return token
 
-    def parse(self):
+    def parse(self, require_root=True):
+        """require_root=False - разбор включаемого модуля, где корневая структура необязательна"""
+        if not self.recover:
+            return self._parse_document(require_root)
+        try:
+            ast = self._parse_document(require_root)
+        except SyntaxError as e:
+            # Ошибки вне структур (нет корня, лишнее после него) завершают разбор
+            self._record(e)
+            ast = None
+        if self.errors:
+            raise self._collected_errors()
+        return ast
+
+    def _parse_document(self, require_root):
         consts = []
+        includes = []
 
-        # Парсим объявления констант
-        while self.current_token and self.current_token.type == 'IDENTIFIER':
-            next_token = self.tokens[self.pos + 1] if self.pos + 1 < len(self.tokens) else None
-            if next_token and next_token.type == 'COLON_EQUALS':
-                consts.append(self._parse_const_declaration())
-            else:
-                break
+        # Парсим объявления констант и include
+        while self.current_token:
+            try:
+                if self.current_token.type == 'INCLUDE':
+                    includes.append(self._parse_include(len(consts)))
+                    continue
+                if self.current_token.type == 'STRUCT':
+                    break
+                next_token = self._peek()
+                if (self.current_token.type == 'IDENTIFIER' and next_token
+                        and next_token.type == 'COLON_EQUALS'):
+                    consts.append(self._parse_const_declaration())
+                elif self.recover:
+                    raise SyntaxError("Expected root struct at the end of configuration. Format: struct { ... }")
+                else:
+                    break
+            except SyntaxError as e:
+                if not self.recover:
+                    raise
+                self._record(e)
+                self._synchronize(top_level=True)
+
+        if not require_root and not self.current_token:
+            return {'consts': consts, 'root': None, 'includes': includes, 'sharing': self.stats}
 
         # Корневая структура ОБЯЗАТЕЛЬНО должна быть struct {...} (по ТЗ)
         if not self.current_token or self.current_token.type != 'STRUCT':
             raise SyntaxError("Expected root struct at the end of configuration. Format: struct { ... }")
 
-        root_struct = self._parse_struct()
+        self._references = {}
+        root_struct = self._parse_struct(self.select)
 
         # После корневой структуры не должно быть ничего
         if self.current_token:
             raise SyntaxError(f"Unexpected content after root struct: {self.current_token.type}")
 
-        return {'consts': consts, 'root': root_struct}
+        return {'consts': consts, 'root': root_struct, 'includes': includes, 'sharing': self.stats,
+                'references': list(self._references)}
+
+    def _record(self, error):
+        # Позиция ошибки - текущий токен (None - конец входа)
+        position = self.current_token.position if self.current_token else None
+        self.errors.append((position, str(error)))
+
+    def _synchronize(self, top_level=False):
+        """Пропускает токены до точки, с которой можно продолжить разбор.
+
+        Разделитель ',' или ';' поглощается, '}' остаётся закрывающей скобкой
+        текущей структуры. Скобки, открытые внутри пропускаемого участка,
+        учитываются, чтобы не остановиться внутри чужой вложенной структуры.
+        На верхнем уровне разбор продолжается и с include или корневого struct.
+        """
+        depth = 0
+        while self.current_token is not None:
+            kind = self.current_token.type
+            if depth == 0:
+                if kind == 'COMMA' or kind == 'SEMICOLON':
+                    self._advance()
+                    return
+                if top_level and (kind == 'STRUCT' or kind == 'INCLUDE'):
+                    return
+                if kind == 'RBRACE' and not top_level:
+                    return
+            if kind == 'LBRACE':
+                depth += 1
+            elif kind == 'RBRACE' and depth:
+                depth -= 1
+            self._advance()
+
+    def _collected_errors(self):
+        # Ошибки лексера и парсера сливаются в порядке позиций; строки и столбцы
+        # считаются по индексу начал строк, построенному один раз
+        end = len(self.source) if self.source is not None else -1
+        errors = sorted(((end if position is None else position), message)
+                        for position, message in self.errors)
+        if self.source is None:
+            return ParseErrors([(None, None, message) for _, message in errors])
+        index = LineIndex(self.source)
+        return ParseErrors([(*index.location(position), message) for position, message in errors])
+
+    def _parse_include(self, index):
+        # include "path.conf"; - точка с запятой необязательна
+        position = self._expect('INCLUDE').position
+        path = self._expect('STRING').value
+        if self.current_token and self.current_token.type == 'SEMICOLON':
+            self._advance()
+        return Include(path, position, index)
 
     def _parse_const_declaration(self):
         name_token = self._expect('IDENTIFIER')
@@ -52,54 +219,287 @@ class Parser:
         self._expect('SEMICOLON')
         return ConstDeclaration(name_token.value, value_node)
 
-    def _parse_struct(self):
+    def _parse_struct(self, select=None):
+        """Разбирает struct { ... } любой вложенности.
+
+        Вложенные структуры не вызывают метод рекурсивно, а кладутся на явный стек,
+        поэтому глубина ограничена только памятью, а не пределом рекурсии Python.
+        """
         self._expect('STRUCT')
+        return self._parse_struct_body(select)
+
+    def _parse_struct_body(self, select=None):
+        # { поля } - тело struct и список заменяемых полей экземпляра шаблона
         self._expect('LBRACE')
 
-        fields = {}
-        while self.current_token and self.current_token.type != 'RBRACE':
-            name_token = self._expect('IDENTIFIER')
-            self._expect('EQUALS')
-            value_node = self._parse_value()
-            fields[name_token.value] = value_node
+        root = Struct()
+        stack = [root]
+        names = [None]  # имя поля, под которым структура лежит в родителе
+        # Для каждой открытой структуры - какие её поля разбирать (None - все)
+        scopes = None if select is None else [select]
+        while stack:
+            try:
+                self._parse_fields(stack, names, scopes)
+            except SyntaxError as e:
+                if not self.recover:
+                    raise
+                self._record(e)
+                if self.current_token is None:
+                    # Вход кончился внутри структуры - восстанавливаться не с чего
+                    break
+                self._synchronize()
+        return self._shared_struct(root)
+
+    def _shared_struct(self, node):
+        """Общий узел для структуры с таким же содержимым или сам node.
 
-            if self.current_token and self.current_token.type == 'COMMA':
+        Вызывается при закрытии структуры. Все значения полей к этому моменту уже
+        общие узлы, поэтому ключ - просто кортеж пар (имя, узел). Структуры со
+        ссылками на константы тоже делятся, в том числе между объявлениями; если
+        имя переобъявлено, вычислитель сбрасывает результаты структур при смене
+        его значения (config.dependencies).
+        """
+        fields = node.fields
+        key = tuple(fields.items())
+        key_hash = hash(key)
+        candidates = self._structs.get(key_hash)
+        if candidates is None:
+            self._structs[key_hash] = node
+            return node
+        if type(candidates) is not list:
+            candidates = self._structs[key_hash] = [candidates]
+        for shared in candidates:
+            # Узлы сравниваются по identity, порядок полей важен для вывода
+            if tuple(shared.fields.items()) == key:
+                self.shared_structs += 1
+                self.saved_bytes += _STRUCT_NODE_SIZE + sys.getsizeof(fields)
+                return shared
+        candidates.append(node)
+        return node
+
+    def _parse_fields(self, stack, names, scopes=None):
+        # Разбирает поля структуры на вершине stack, пока стек не опустеет
+        fields = stack[-1].fields
+        names_table = self._names
+        while stack:
+            token = self.current_token
+            if token is None or token.type == 'RBRACE':
+                self._expect('RBRACE')
+                node = stack.pop()
+                name = names.pop()
+                if scopes is not None:
+                    scopes.pop()
+                if not stack:
+                    break
+                fields = stack[-1].fields
+                shared = self._shared_struct(node)
+                if type(name) is tuple:
+                    # Закрылся список заменяемых полей экземпляра шаблона
+                    name, template = name
+                    fields[name] = TemplateInstance(template, shared)
+                elif shared is not node:
+                    fields[name] = shared
+                # Разделитель после вложенной структуры относится к родителю
+                self._skip_separator()
+                continue
+
+            # Проверки _expect развёрнуты вручную: это самый горячий цикл парсера
+            if token.type != 'IDENTIFIER':
+                self._expect('IDENTIFIER')
+            name = names_table.setdefault(token.value, token.value)
+            self._advance()
+            token = self.current_token
+            if token is None or token.type != 'EQUALS':
+                self._expect('EQUALS')
+            self._advance()
+            scope = None
+            if scopes is not None and scopes[-1] is not None:
+                if name not in scopes[-1]:
+                    self._skip_value()
+                    continue
+                scope = scopes[-1][name]
+            token = self.current_token
+            if token is not None and token.type == 'STRUCT':
                 self._advance()
-            elif self.current_token and self.current_token.type == 'SEMICOLON':
-                # Разрешаем точку с запятой как разделитель (для совместимости с примерами)
+                self._expect('LBRACE')
+                child = Struct()
+                fields[name] = child
+                stack.append(child)
+                names.append(name)
+                if scopes is not None:
+                    scopes.append(scope)
+                fields = child.fields
+                continue
+            if token is not None and token.type == 'IDENTIFIER':
+                following = self._peek()
+                if following is not None and following.type == 'LBRACE':
+                    # Экземпляр шаблона Имя { ... }: заменяемые поля разбираются в том же
+                    # стеке, что и вложенные структуры; в names - пара (поле, шаблон)
+                    if self._references is not None:
+                        self._references[token.value] = None
+                    self._advance()
+                    self._advance()
+                    child = Struct()
+                    fields[name] = child
+                    stack.append(child)
+                    names.append((name, token.value))
+                    if scopes is not None:
+                        scopes.append(None)
+                    fields = child.fields
+                    continue
+
+            fields[name] = self._parse_scalar()
+            token = self.current_token
+            if token is not None and (token.type == 'COMMA' or token.type == 'SEMICOLON'):
                 self._advance()
 
-        self._expect('RBRACE')
-        return Struct(fields)
+    def _skip_separator(self):
+        if self.current_token and self.current_token.type == 'COMMA':
+            self._advance()
+        elif self.current_token and self.current_token.type == 'SEMICOLON':
+            # Разрешаем точку с запятой как разделитель (для совместимости с примерами)
+            self._advance()
+
+    def _skip_value(self):
+        # Пропускает значение поля вместе с разделителем, не создавая узлов
+        token = self.current_token
+        kind = token.type if token is not None else None
+        if kind == 'STRUCT' or kind == 'IDENTIFIER':
+            self._advance()
+            if kind == 'STRUCT' or (self.current_token is not None and self.current_token.type == 'LBRACE'):
+                self._skip_balanced('LBRACE', 'RBRACE')
+        elif kind == 'LBRACKET':
+            self._skip_balanced('LBRACKET', 'RBRACKET')
+        elif kind == 'START_EXPR':
+            self._advance()
+            self._expect('EXPR_CONTENT')
+            self._expect('END_EXPR')
+        elif kind == 'NUMBER' or kind == 'STRING':
+            self._advance()
+        else:
+            # Та же ошибка, что и при обычном разборе
+            self._parse_scalar()
+        self._skip_separator()
+
+    def _skip_balanced(self, opening, closing):
+        token = self.current_token
+        if (opening == 'LBRACE' and self._lexer is not None and self._next_token is _NOT_READ
+                and token is not None and token.type == 'LBRACE'):
+            # Лексер только что выдал эту '{' и стоит сразу за ней: следующим
+            # токеном после пропуска будет парная '}'
+            self._lexer.skip_block()
+            self._advance()
+            self._expect('RBRACE')
+            return
+        self._expect(opening)
+        depth = 1
+        while depth:
+            token = self.current_token
+            if token is None:
+                self._expect(closing)
+            if token.type == opening:
+                depth += 1
+            elif token.type == closing:
+                depth -= 1
+            self._advance()
 
     def _parse_value(self):
-        if self.current_token.type == 'NUMBER':
+        if self.current_token is not None and self.current_token.type == 'STRUCT':
+            return self._parse_struct()
+        return self._parse_scalar()
+
+    def _parse_scalar(self):
+        if self.current_token is None:
+            raise SyntaxError("Unexpected token in value: EOF at position -1")
+        elif self.current_token.type == 'NUMBER':
+            text = self.current_token.value
+            self._advance()
+            node = self._numbers.get(text)
+            if node is not None:
+                self.shared_values += 1
+                self.saved_bytes += _NUMBER_NODE_SIZE
+                return node
             try:
-                value = float(self.current_token.value)
+                value = float(text)
             except ValueError:
-                value = self.current_token.value
-            self._advance()
-            return Number(value)
-        elif self.current_token.type == 'STRUCT':
-            return self._parse_struct()
+                value = text
+            node = self._numbers[text] = Number(value)
+            return node
         elif self.current_token.type == 'START_EXPR':
             return self._parse_const_expression()
         elif self.current_token.type == 'STRING':
             value = self.current_token.value
             self._advance()
-            return String(value)
+            node = self._strings.get(value)
+            if node is None:
+                node = self._strings[value] = String(value)
+            else:
+                self.interned_strings += 1
+                self.saved_bytes += _STRING_NODE_SIZE + sys.getsizeof(value)
+            return node
         elif self.current_token.type == 'IDENTIFIER':
             name = self.current_token.value
             self._advance()
-            return Identifier(name)
+            if self._references is not None:
+                self._references[name] = None
+            if self.current_token is not None and self.current_token.type == 'LBRACE':
+                return self._parse_template_instance(name)
+            node = self._identifiers.get(name)
+            if node is None:
+                node = self._identifiers[name] = Identifier(name)
+            else:
+                self.shared_values += 1
+                self.saved_bytes += _IDENTIFIER_NODE_SIZE + sys.getsizeof(name)
+            return node
+        elif self.current_token.type == 'LBRACKET':
+            return self._parse_array()
         else:
-            position = self.current_token.position if self.current_token else -1
+            position = self.current_token.position
             raise SyntaxError(f"Unexpected token in value: {self.current_token.type} at position {position}")
 
+    def _parse_template_instance(self, name):
+        """Имя { Поле = значение, ... } - экземпляр шаблона.
+
+        Шаблон - константа-структура name; в экземпляре записываются только
+        заменяемые и новые поля, остальные берутся из шаблона при вычислении.
+        Экземпляры внутри полей разбирает _parse_fields на общем стеке.
+        """
+        return TemplateInstance(name, self._parse_struct_body())
+
+    def _parse_array(self):
+        # [ значение, значение, ... ] - элементы через запятую, висячая запятая допустима
+        self._expect('LBRACKET')
+        items = []
+        while self.current_token is not None and self.current_token.type != 'RBRACKET':
+            if self.current_token.type == 'LBRACKET':
+                raise SyntaxError(f"Nested arrays are not supported at position {self.current_token.position}")
+            items.append(self._parse_scalar())
+            if self.current_token is not None and self.current_token.type == 'COMMA':
+                self._advance()
+            elif self.current_token is not None and self.current_token.type != 'RBRACKET':
+                self._expect('COMMA')
+        self._expect('RBRACKET')
+        key = tuple(items)
+        node = self._arrays.get(key)
+        if node is None:
+            node = self._arrays[key] = Array(items)
+        else:
+            self.shared_values += 1
+            self.saved_bytes += _ARRAY_NODE_SIZE + sys.getsizeof(items)
+        return node
+
     def _parse_const_expression(self):
         self._expect('START_EXPR')
         content_token = self._expect('EXPR_CONTENT')
         self._expect('END_EXPR')
+        node = self._expressions.get(content_token.value)
+        if node is not None:
+            if self._references is not None:
+                self._references[node] = None
+            # Общий узел: программа выражения компилируется один раз
+            self.shared_values += 1
+            self.saved_bytes += _EXPRESSION_NODE_SIZE + sys.getsizeof(node.tokens)
+            return node
 
         # Разбиваем выражение на токены, учитывая операторы и идентификаторы
         tokens = []
@@ -115,4 +515,16 @@ class Parser:
                 current += char
         if current:
             tokens.append(current)
-        return ConstExpression(tokens)
\ No newline at end of file
+        node = self._expressions[content_token.value] = ConstExpression(tokens)
+        if self._references is not None:
+            self._references[node] = None
+        return node
+
+
+# Размеры узлов для оценки сэкономленной памяти
+_STRING_NODE_SIZE = sys.getsizeof(String(''))
+_NUMBER_NODE_SIZE = sys.getsizeof(Number(0.0)) + sys.getsizeof(0.0)
+_IDENTIFIER_NODE_SIZE = sys.getsizeof(Identifier(''))
+_ARRAY_NODE_SIZE = sys.getsizeof(Array())
+_EXPRESSION_NODE_SIZE = sys.getsizeof(ConstExpression([]))
+_STRUCT_NODE_SIZE = sys.getsizeof(Struct())
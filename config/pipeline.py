@@ -0,0 +1,47 @@
+from config.lexer import Lexer
+from config.parser import Parser
+from config.optimizer import Optimizer
+from config.evaluator import Evaluator
+from config.formats import write_output, DEFAULT_FORMAT
+from config.modules import link_includes
+
+
+def parse_source(source, path=None, recover=False, select=None):
+    """Лексический и синтаксический анализ. source - строка или файловый объект.
+
+    path - путь исходного файла, от его каталога считаются пути в include.
+    recover=True - собрать все синтаксические ошибки и выбросить их одним ParseErrors
+    (текст читается целиком: по нему считаются строки и столбцы ошибок).
+    select - пути с точками: в корне разбираются только поля на этих путях.
+    """
+    if not recover:
+        lexer = Lexer(source)
+        parser = Parser(lexer.iter_tokens(), select=select, lexer=lexer)
+        return link_includes(parser.parse(), path)
+
+    text = source if isinstance(source, str) else source.read()
+    if isinstance(text, bytes):
+        text = text.decode('utf-8')
+    errors = []
+    lexer = Lexer(text, errors=errors)
+    parser = Parser(lexer.iter_tokens(), recover=True, source=text, errors=errors, select=select,
+                    lexer=lexer)
+    return link_includes(parser.parse(), path)
+
+
+def prepare_ast(source, optimizer=None, path=None, recover=False):
+    """Разбор и оптимизация: AST, готовое к вычислению"""
+    ast = parse_source(source, path, recover)
+    if optimizer is None:
+        optimizer = Optimizer()
+    return optimizer.optimize(ast)
+
+
+def compile_source(source, optimizer=None, path=None):
+    """Полный цикл Lexer -> Parser -> Optimizer -> Evaluator, возвращает данные для JSON"""
+    return Evaluator().evaluate(prepare_ast(source, optimizer, path))
+
+
+def write_ast(ast, output_path, output_format=DEFAULT_FORMAT):
+    """Вычисляет AST и пишет результат; JSON и JSON Lines - не собирая его в памяти"""
+    write_output(ast, output_path, output_format)
@@ -0,0 +1,139 @@
+import json
+import os
+import time
+import tracemalloc
+from config.ast import Struct, ConstExpression, Array, TemplateInstance
+from config.lexer import Lexer
+from config.parser import Parser
+from config.modules import link_includes
+from config.optimizer import Optimizer
+from config.evaluator import Evaluator
+from config.formats import DEFAULT_FORMAT
+from config.pipeline import write_ast
+
+
+class StageProfile:
+    def __init__(self, name):
+        self.name = name
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.peak_memory = None  # байты; None, если память не отслеживалась
+        self.counts = {}
+
+    def to_dict(self):
+        return {
+            'stage': self.name,
+            'wall_time': self.wall_time,
+            'cpu_time': self.cpu_time,
+            'peak_memory': self.peak_memory,
+            'counts': dict(self.counts),
+        }
+
+
+class CompileProfile:
+    """Время, процессорное время, пиковая память и счётчики по стадиям компиляции"""
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    def run_stage(self, name, function, *args):
+        stage = StageProfile(name)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            return stage, function(*args)
+        finally:
+            stage.wall_time = time.perf_counter() - wall
+            stage.cpu_time = time.process_time() - cpu
+            if self.trace_memory:
+                stage.peak_memory = tracemalloc.get_traced_memory()[1] - start_memory
+            self.stages.append(stage)
+
+    def to_dict(self):
+        return {
+            'stages': [stage.to_dict() for stage in self.stages],
+            'total': {
+                'wall_time': sum(stage.wall_time for stage in self.stages),
+                'cpu_time': sum(stage.cpu_time for stage in self.stages),
+            },
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def format_table(self):
+        lines = [f"{'stage':<10}{'wall ms':>10}{'cpu ms':>10}{'peak KiB':>11}  counts"]
+        for stage in self.stages:
+            memory = '-' if stage.peak_memory is None else f"{stage.peak_memory / 1024:.1f}"
+            counts = ', '.join(f"{key}={value}" for key, value in stage.counts.items())
+            lines.append(f"{stage.name:<10}{stage.wall_time * 1000:>10.2f}"
+                         f"{stage.cpu_time * 1000:>10.2f}{memory:>11}  {counts}")
+        total = self.to_dict()['total']
+        lines.append(f"{'total':<10}{total['wall_time'] * 1000:>10.2f}{total['cpu_time'] * 1000:>10.2f}")
+        return '\n'.join(lines)
+
+
+def count_nodes(ast):
+    """Число узлов AST и выражений в нём"""
+    nodes = expressions = 0
+    stack = [decl.value_node for decl in ast['consts']] + [ast['root']]
+    nodes += len(ast['consts'])
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        if isinstance(node, Struct):
+            stack.extend(node.fields.values())
+        elif isinstance(node, Array):
+            stack.extend(node.items)
+        elif isinstance(node, TemplateInstance):
+            stack.append(node.overrides)
+        elif isinstance(node, ConstExpression):
+            expressions += 1
+    return nodes, expressions
+
+
+def profile_compile(source, output_path=None, trace_memory=True, path=None,
+                    output_format=DEFAULT_FORMAT):
+    """Компилирует source (строку или файловый объект) по стадиям и возвращает CompileProfile.
+
+    path - путь исходного файла для разрешения include (разбор включённых файлов
+    входит в стадию parse). output_format - формат выходного файла (config.formats).
+
+    Чтобы стадии можно было измерить по отдельности, токены собираются в список,
+    а результат - в словарь (в обычном режиме они обрабатываются потоково).
+    Стадия write пишет файл так же, как обычный запуск (pipeline.write_ast), и
+    поэтому вычисляет AST заново.
+    """
+    profile = CompileProfile(trace_memory)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        stage, tokens = profile.run_stage('lex', lambda: Lexer(source).tokenize())
+        stage.counts['tokens'] = len(tokens)
+
+        stage, ast = profile.run_stage('parse', lambda: link_includes(Parser(tokens).parse(), path))
+        stage.counts['nodes'], stage.counts['expressions'] = count_nodes(ast)
+        stage.counts.update(ast['sharing'])
+
+        optimizer = Optimizer()
+        stage, ast = profile.run_stage('optimize', optimizer.optimize, ast)
+        stage.counts.update(optimizer.stats)
+
+        evaluator = Evaluator(share_structs=True)
+        stage, _ = profile.run_stage('evaluate', evaluator.evaluate, ast)
+        stage.counts['expressions'] = evaluator.expressions_evaluated
+        stage.counts['constants'] = len(evaluator.constants)
+        stage.counts['structs_reused'] = evaluator.structs_reused
+
+        if output_path is not None:
+            stage, _ = profile.run_stage('write', write_ast, ast, output_path, output_format)
+            stage.counts['bytes'] = os.path.getsize(output_path)
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    return profile
@@ -0,0 +1,67 @@
+"""Выбор отдельных значений по путям с точками ('Port', 'SSL.CertPath').
+
+Парсер пропускает поля корня вне выбранных путей по токенам, не создавая узлов,
+вычислитель - только константы, нужные выбранным узлам. Оптимизатор не запускается:
+свёртка всего дерева стоила бы больше, чем вычисление нескольких значений.
+Лексер по-прежнему читает весь файл, а синтаксические ошибки внутри пропущенных
+значений могут остаться незамеченными.
+"""
+from collections.abc import Mapping
+from config.ast import Struct
+from config.evaluator import Evaluator
+from config.pipeline import parse_source
+from config.templates import to_plain
+from config.writer import iter_value_chunks
+
+
+def select_values(ast, paths, evaluator=None):
+    """Значения по путям paths в том же порядке; нет пути - KeyError(путь)"""
+    evaluator = Evaluator() if evaluator is None else evaluator
+    targets = [_locate(ast['root'], path) for path in paths]
+    evaluator.evaluate_constants(ast, [node for node, _ in targets])
+    values = []
+    for path, (node, rest) in zip(paths, targets):
+        value = evaluator._evaluate_node(node)
+        # Путь продолжается внутри константы-структуры или экземпляра шаблона
+        for part in rest:
+            if not isinstance(value, Mapping) or part not in value:
+                raise KeyError(path)
+            value = value[part]
+        values.append(value)
+    return values
+
+
+def _locate(root, path):
+    # (узел, оставшиеся части пути): спуск по узлам Struct, пока они есть
+    node = root
+    parts = path.split('.')
+    for index, part in enumerate(parts):
+        if type(node) is not Struct:
+            return node, parts[index:]
+        if part not in node.fields:
+            raise KeyError(path)
+        node = node.fields[part]
+    return node, []
+
+
+def select_source(source, paths, path=None):
+    """Разбирает source (строку или файловый объект) только ради paths.
+
+    Возвращает dict путь -> значение (обычные dict и list) в порядке paths.
+    path - путь исходного файла для разрешения include.
+    """
+    paths = list(paths)
+    ast = parse_source(source, path, select=paths)
+    values = select_values(ast, paths)
+    return {selected: to_plain(value) for selected, value in zip(paths, values)}
+
+
+def format_raw(value):
+    """Значение для скриптов: строка без кавычек, целое число без '.0', остальное - компактный JSON"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return ''.join(iter_value_chunks(value))
@@ -0,0 +1,110 @@
+"""Режим --sweep: одна конфигурация, много вариантов с переопределёнными константами.
+
+Текст разбирается один раз. Оптимизатор заранее сворачивает всё, что не зависит
+от переопределяемых констант, поэтому для каждой строки таблицы вычисляются только
+зависящие от них выражения и ссылки, а остальное уже лежит в AST литералами.
+"""
+import csv
+import json
+import time
+from pathlib import Path
+from config.batch import BatchResult
+from config.evaluator import Evaluator
+from config.expressions import parse_number
+from config.formats import write_output, FORMATS, DEFAULT_FORMAT
+from config.optimizer import Optimizer
+from config.pipeline import parse_source
+
+# Столбец с именем выходного файла варианта
+NAME_COLUMN = '_name'
+
+
+def read_overrides(path):
+    """Строки таблицы переопределений: CSV (с заголовком) или JSON Lines (.jsonl, .ndjson)"""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.suffix.lower() in ('.jsonl', '.ndjson'):
+            rows = []
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError(f"Line {number} of '{path}' must be a JSON object")
+                rows.append({name: _normalize_value(value) for name, value in row.items()})
+            return rows
+        # Пустая ячейка CSV означает, что константа в этой строке не переопределяется
+        return [{name: _parse_cell(value) for name, value in row.items() if value not in ('', None)}
+                for row in csv.DictReader(f)]
+
+
+def _parse_cell(text):
+    text = text.strip()
+    if text.startswith('['):
+        return _normalize_value(json.loads(text))
+    value = parse_number(text)
+    return value if value is not None else text
+
+
+def _normalize_value(value):
+    # Числа языка всегда float, как и у литералов, разобранных парсером
+    if isinstance(value, bool):
+        raise TypeError(f"Unsupported override value: {value!r}")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, list):
+        return [_normalize_value(item) for item in value]
+    return value
+
+
+class Sweep:
+    """Разобранная и оптимизированная конфигурация для переопределяемых констант names"""
+
+    def __init__(self, source, names, path=None):
+        self.names = set(names)
+        self.ast = parse_source(source, path)
+        declared = {decl.name for decl in self.ast['consts']}
+        for name in sorted(self.names - declared):
+            raise NameError(f"Unknown constant in overrides: '{name}'")
+        self.optimizer = Optimizer(unknown=self.names)
+        self.optimizer.optimize(self.ast)
+
+    def evaluate(self, overrides):
+        return Evaluator(overrides).evaluate(self.ast)
+
+    def write(self, overrides, output_path, output_format=DEFAULT_FORMAT):
+        write_output(self.ast, output_path, output_format, Evaluator(overrides, share_structs=True))
+
+
+def variant_names(rows, prefix):
+    """Имена вариантов: значение столбца _name или номер строки"""
+    names = []
+    for index, row in enumerate(rows, 1):
+        name = str(row.get(NAME_COLUMN, f'{prefix}-{index}'))
+        if not name or Path(name).name != name:
+            raise ValueError(f"Invalid variant name in row {index}: '{name}'")
+        if name in names:
+            raise ValueError(f"Duplicate variant name in row {index}: '{name}'")
+        names.append(name)
+    return names
+
+
+def run_sweep(source, rows, output_dir, prefix='variant', path=None, output_format=DEFAULT_FORMAT):
+    """Пишет по одному файлу на строку rows, результаты - в порядке строк"""
+    names = variant_names(rows, prefix)
+    overrides = [{key: value for key, value in row.items() if key != NAME_COLUMN} for row in rows]
+    sweep = Sweep(source, {name for row in overrides for name in row}, path)
+
+    results = []
+    for name, row in zip(names, overrides):
+        output_path = Path(output_dir) / f'{name}{FORMATS[output_format]}'
+        started = time.perf_counter()
+        error = None
+        try:
+            sweep.write(row, output_path, output_format)
+        except OSError as e:
+            error = f"Error writing output file: {str(e)}"
+        except Exception as e:
+            error = f"Processing error: {str(e)}"
+        results.append(BatchResult(name, str(output_path), error, time.perf_counter() - started))
+    return results
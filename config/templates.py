@@ -0,0 +1,149 @@
+"""Экземпляры шаблонов структур: копирование при записи.
+
+Шаблон - обычная константа-структура, его тело вычисляется один раз, при
+объявлении. Экземпляр Имя { Поле = значение } вычисляется в StructOverlay:
+словарь заменённых полей поверх общего результата шаблона. Время и память на
+экземпляр зависят от числа заменённых полей, а не от размера шаблона.
+"""
+from collections.abc import Mapping, MutableMapping
+
+_MISSING = object()
+
+
+class StructOverlay(MutableMapping):
+    """Структура-экземпляр: поля overrides поверх base (dict или другого StructOverlay).
+
+    Порядок ключей - ключи base (заменённые остаются на своих местах), затем новые.
+    Запись и удаление меняют только сам экземпляр. Вложенная структура при чтении
+    оборачивается в свой StructOverlay, а массив копируется, поэтому изменения
+    через них тоже не доходят до шаблона.
+    """
+
+    __slots__ = ('_base', '_overrides', '_copies', '_deleted')
+
+    def __init__(self, base, overrides=None):
+        self._base = base
+        self._overrides = {} if overrides is None else overrides
+        # Ключ -> выданные наружу обёртки вложенных структур и копии массивов
+        self._copies = {}
+        # Удалённые ключи base
+        self._deleted = set()
+
+    def __getitem__(self, key):
+        value = self._copies.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = self._overrides.get(key, _MISSING)
+        if value is _MISSING:
+            if key in self._deleted:
+                raise KeyError(key)
+            value = _raw_lookup(self._base, key)
+        value_type = type(value)
+        if value_type is dict or value_type is StructOverlay:
+            value = self._copies[key] = StructOverlay(value)
+        elif value_type is list:
+            value = self._copies[key] = list(value)
+        return value
+
+    def __setitem__(self, key, value):
+        self._overrides[key] = value
+        self._copies.pop(key, None)
+        self._deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._overrides.pop(key, None)
+        self._copies.pop(key, None)
+        if key in self._base:
+            self._deleted.add(key)
+
+    def __contains__(self, key):
+        if key in self._overrides:
+            return True
+        return key not in self._deleted and key in self._base
+
+    def __iter__(self):
+        deleted = self._deleted
+        for key in self._base:
+            if key not in deleted:
+                yield key
+        base = self._base
+        for key in self._overrides:
+            if key not in base:
+                yield key
+
+    def __len__(self):
+        base = self._base
+        added = sum(1 for key in self._overrides if key not in base)
+        return len(base) - len(self._deleted) + added
+
+    def __repr__(self):
+        return f"StructOverlay({len(self._overrides)} overrides over {len(self._base)} fields)"
+
+    def raw_items(self):
+        """Пары (ключ, значение) без обёрток и копий - для кодировщиков, только чтение"""
+        base = self._base
+        overrides = self._overrides
+        copies = self._copies
+        deleted = self._deleted
+        base_items = base.raw_items() if type(base) is StructOverlay else base.items()
+        for key, value in base_items:
+            if key in copies:
+                yield key, copies[key]
+            elif key in overrides:
+                yield key, overrides[key]
+            elif key not in deleted:
+                yield key, value
+        for key, value in overrides.items():
+            if key not in base:
+                yield key, copies.get(key, value)
+
+    def to_dict(self):
+        """Независимая копия из обычных dict и list"""
+        return to_plain(self)
+
+
+def _raw_lookup(mapping, key):
+    # Значение по цепочке base без обёрток: иначе обёртка из __getitem__ базы
+    # оборачивалась бы ещё раз, и цепочка росла бы с каждым уровнем вложенности
+    while type(mapping) is StructOverlay:
+        value = mapping._copies.get(key, _MISSING)
+        if value is _MISSING:
+            value = mapping._overrides.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if key in mapping._deleted:
+            raise KeyError(key)
+        mapping = mapping._base
+    return mapping[key]
+
+
+def to_plain(value):
+    """Копия значения, в которой экземпляры шаблонов и dict стали обычными dict"""
+    if not isinstance(value, Mapping):
+        return list(value) if type(value) is list else value
+    result = {}
+    stack = [(_items(value), result)]
+    while stack:
+        items, target = stack[-1]
+        for key, item in items:
+            if isinstance(item, Mapping):
+                child = target[key] = {}
+                stack.append((_items(item), child))
+                break
+            target[key] = list(item) if type(item) is list else item
+        else:
+            stack.pop()
+    return result
+
+
+def _items(mapping):
+    return mapping.raw_items() if type(mapping) is StructOverlay else iter(mapping.items())
+
+
+def json_default(value):
+    """Параметр default для json и orjson: экземпляр шаблона кодируется как объект"""
+    if type(value) is StructOverlay:
+        return dict(value.raw_items())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,83 @@
+import asyncio
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import MappingProxyType
+
+import config
+from config.aio import aload, aload_many
+
+
+class TestAsyncLoad(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.paths = []
+        for i in range(5):
+            path = self.temp_dir / f'app{i}.conf'
+            path.write_text(f'N := {i};\nstruct {{ N = N, Inner = struct {{ X = .[N 2 *]. }} }}', encoding='utf-8')
+            self.paths.append(path)
+        self.broken = self.temp_dir / 'broken.conf'
+        self.broken.write_text('struct { N = }', encoding='utf-8')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_aload(self):
+        data = asyncio.run(aload(self.paths[2]))
+        self.assertIsInstance(data, MappingProxyType)
+        self.assertIs(data, config.load(self.paths[2]))
+        data = asyncio.run(config.aload(self.paths[2], copy=True))
+        self.assertEqual(data, {'N': 2.0, 'Inner': {'X': 4.0}})
+        with self.assertRaises(SyntaxError):
+            asyncio.run(aload(self.broken))
+
+    def test_aload_executors(self):
+        self.assertIs(asyncio.run(aload(self.paths[1], executor='thread')), config.load(self.paths[1]))
+        data = asyncio.run(aload(self.paths[1], executor='process'))
+        self.assertIsInstance(data['Inner'], MappingProxyType)
+        self.assertEqual(data['Inner']['X'], 2.0)
+        with self.assertRaises(ValueError):
+            asyncio.run(aload(self.paths[1], executor='fiber'))
+
+    def test_results_keep_order(self):
+        paths = self.paths + [self.broken, self.temp_dir / 'missing.conf']
+        for executor in ('thread', 'process'):
+            with self.subTest(executor=executor):
+                results = asyncio.run(aload_many(paths, executor=executor, max_workers=3))
+                self.assertEqual([r.path for r in results], [str(p) for p in paths])
+                self.assertEqual([r.config['N'] for r in results[:5]], [0.0, 1.0, 2.0, 3.0, 4.0])
+                self.assertIsInstance(results[0].config['Inner'], MappingProxyType)
+                self.assertTrue(all(r.ok and r.compile_seconds <= r.seconds for r in results[:5]))
+                self.assertIsInstance(results[5].error, SyntaxError)
+                self.assertIsInstance(results[6].error, FileNotFoundError)
+
+        results = asyncio.run(aload_many(self.paths[:1], copy=True, executor='process'))
+        self.assertEqual(results[0].config, {'N': 0.0, 'Inner': {'X': 0.0}})
+        with self.assertRaises(ValueError):
+            asyncio.run(aload_many(self.paths, executor='fiber'))
+
+    def test_timeout_and_cancellation(self):
+        # Единственный поток пула занят: задачи ждут в очереди дольше тайм-аута
+        release = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(release.wait)
+            results = asyncio.run(aload_many(self.paths[:2], executor=executor, timeout=0.05))
+            self.assertTrue(all(isinstance(r.error, TimeoutError) for r in results))
+            self.assertIsNone(results[0].compile_seconds)
+
+            async def cancel():
+                task = asyncio.ensure_future(aload_many(self.paths, executor=executor))
+                await asyncio.sleep(0.01)
+                task.cancel()
+                await task
+
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(cancel())
+            release.set()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from types import MappingProxyType
+
+import config
+from config.api import LoadCache
+
+
+class TestLoad(unittest.TestCase):
+    SOURCE = 'Levels := [1, 2];\nstruct { Name = "a", Levels = Levels, Inner = struct { X = 1 } }'
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.path = self.temp_dir / 'app.conf'
+        self.path.write_text(self.SOURCE, encoding='utf-8')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_loads(self):
+        data = config.loads(self.SOURCE)
+        self.assertIsInstance(data, MappingProxyType)
+        self.assertIsInstance(data['Inner'], MappingProxyType)
+        self.assertEqual(data['Levels'], (1.0, 2.0))
+        with self.assertRaises(TypeError):
+            data['Name'] = 'b'
+
+        data = config.loads(self.SOURCE, copy=True)
+        self.assertEqual(data, {'Name': 'a', 'Levels': [1.0, 2.0], 'Inner': {'X': 1.0}})
+
+    def test_shared_structs(self):
+        source = 'struct { A = struct { X = 1 }, B = struct { X = 1 } }'
+        data = config.loads(source)
+        self.assertIs(data['A'], data['B'])
+        # Изменяемая копия не связывает одинаковые структуры между собой
+        data = config.loads(source, copy=True)
+        data['A']['X'] = 2.0
+        self.assertEqual(data['B'], {'X': 1.0})
+
+    def test_cache_hits_until_file_changes(self):
+        cache = LoadCache(maxsize=4)
+        first = cache.load(self.path)
+        self.assertIs(cache.load(str(self.path)), first)
+        self.assertEqual(cache.info(), (1, 1, 4, 1))
+
+        copy = cache.load(self.path, copy=True)
+        copy['Inner']['X'] = 2.0
+        self.assertEqual(cache.load(self.path)['Inner']['X'], 1.0)
+
+        self.path.write_text(self.SOURCE.replace('"a"', '"bb"'), encoding='utf-8')
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertEqual(cache.load(self.path)['Name'], 'bb')
+        self.assertEqual(cache.info().misses, 2)
+
+    def test_lru_eviction(self):
+        cache = LoadCache(maxsize=2)
+        paths = []
+        for index in range(3):
+            path = self.temp_dir / f'{index}.conf'
+            path.write_text(f'struct {{ N = {index} }}', encoding='utf-8')
+            paths.append(path)
+        cache.load(paths[0])
+        cache.load(paths[1])
+        cache.load(paths[0])
+        cache.load(paths[2])
+        self.assertEqual(cache.info().currsize, 2)
+        cache.load(paths[0])
+        cache.load(paths[1])
+        self.assertEqual(cache.info().misses, 4)
+
+        cache.clear()
+        self.assertEqual(cache.info(), (0, 0, 2, 0))
+
+    def test_module_functions(self):
+        config.cache_clear()
+        config.load(self.path)
+        config.load(self.path)
+        self.assertEqual(config.cache_info().hits, 1)
+        config.cache_clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from config.batch import collect_inputs, run_batch
+from config.main import main as cli_main
+
+
+class TestBatch(unittest.TestCase):
+    EXAMPLES_DIR = Path(__file__).parent / 'examples'
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.src = self.temp_dir / 'src'
+        (self.src / 'nested').mkdir(parents=True)
+        shutil.copy(self.EXAMPLES_DIR / 'server.conf', self.src / 'server.conf')
+        shutil.copy(self.EXAMPLES_DIR / 'physics.conf', self.src / 'nested' / 'physics.conf')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_collect_inputs(self):
+        base_dir, inputs = collect_inputs(str(self.src))
+        self.assertEqual(base_dir, self.src)
+        self.assertEqual(len(inputs), 2)
+
+        base_dir, inputs = collect_inputs(str(self.src / '*.conf'))
+        self.assertEqual(inputs, [self.src / 'server.conf'])
+
+        manifest = self.temp_dir / 'inputs.txt'
+        manifest.write_text('# manifest\nsrc/server.conf\n\nsrc/nested/physics.conf\n', encoding='utf-8')
+        base_dir, inputs = collect_inputs(str(manifest))
+        self.assertEqual(base_dir.resolve(), self.src.resolve())
+        self.assertEqual(len(inputs), 2)
+
+    def test_run_batch_on_pool(self):
+        (self.src / 'broken.conf').write_text('struct { Port = 1', encoding='utf-8')
+        base_dir, inputs = collect_inputs(str(self.src))
+        out = self.temp_dir / 'out'
+
+        results = run_batch(inputs, base_dir, out, jobs=2)
+
+        self.assertEqual([Path(r.input_path).name for r in results],
+                         ['broken.conf', 'physics.conf', 'server.conf'])
+        self.assertFalse(results[0].ok)
+        self.assertIn('Syntax error', results[0].error)
+        self.assertTrue(results[1].ok and results[2].ok)
+        with open(out / 'nested' / 'physics.json', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['Math']['PiValue'], 3.1415926535)
+
+    def test_cli_exit_code(self):
+        (self.src / 'broken.conf').write_text('struct {', encoding='utf-8')
+        argv = ['config', '--batch', str(self.src), '-o', str(self.temp_dir / 'out'), '-j', '1']
+        with patch('sys.argv', argv), patch('sys.stdout'):
+            with self.assertRaises(SystemExit) as cm:
+                cli_main()
+        self.assertEqual(cm.exception.code, 1)
+        self.assertTrue((self.temp_dir / 'out' / 'server.json').exists())
+
+    def test_jobs_must_be_positive(self):
+        for jobs in ('0', '-2', 'many'):
+            argv = ['config', '--batch', str(self.src), '-o', str(self.temp_dir / 'out'), '-j', jobs]
+            with patch('sys.argv', argv), patch('sys.stderr', new_callable=io.StringIO) as stderr:
+                with self.assertRaises(SystemExit) as cm:
+                    cli_main()
+            self.assertEqual(cm.exception.code, 2)
+            self.assertIn('-j/--jobs', stderr.getvalue())
+        self.assertFalse((self.temp_dir / 'out').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from config.lexer import Lexer
+from config.parser import Parser
+from config.evaluator import Evaluator
+from config.benchmarks.generator import generate_config
+from config.benchmarks.runner import find_regressions
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_generated_config_compiles(self):
+        text = generate_config(constants=10, width=3, depth=3, branching=2,
+                               comment_density=0.5, unicode_share=0.5, seed=1)
+        result = Evaluator().evaluate(Parser(Lexer(text).tokenize()).parse())
+
+        node, depth = result, 0
+        while 'S0' in node:
+            node, depth = node['S0'], depth + 1
+        self.assertEqual(depth, 3)
+        self.assertEqual(len([key for key in node if key.startswith('F')]), 3)
+
+    def test_generator_parameters(self):
+        self.assertEqual(generate_config(seed=5), generate_config(seed=5))
+        self.assertNotIn('<#', generate_config(comment_density=0))
+        self.assertIn('<#', generate_config(comment_density=1))
+        ascii_only = generate_config(unicode_share=0, comment_density=0)
+        self.assertTrue(ascii_only.isascii())
+
+    def test_find_regressions(self):
+        def report(seconds):
+            return {'results': {'small': {'stages': {'parse': {'seconds': seconds}}}}}
+
+        self.assertEqual(find_regressions(report(1.05), report(1.0), threshold=0.1), [])
+        regressions = find_regressions(report(1.5), report(1.0), threshold=0.1)
+        self.assertEqual([(name, stage) for name, stage, *_ in regressions], [('small', 'parse')])
+
+    def test_find_format_regressions(self):
+        def report(write, read=1.0):
+            formats = {'msgpack': {'write_seconds': write, 'read_seconds': read, 'size_bytes': 1}}
+            return {'results': {'small': {'stages': {}, 'formats': formats}}}
+
+        self.assertEqual(find_regressions(report(1.0), report(1.0)), [])
+        regressions = find_regressions(report(2.0), report(1.0))
+        self.assertEqual([(name, stage) for name, stage, *_ in regressions], [('small', 'write:msgpack')])
+        # Базовая линия без замеров форматов не даёт ложных регрессий
+        self.assertEqual(find_regressions(report(2.0), {'results': {'small': {'stages': {}}}}), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
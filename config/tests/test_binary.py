@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from config.binary import BinaryConfig, BinaryStruct, encode_binary, fnv1a, open_binary
+from config.formats import read_output, write_output
+from config.pipeline import compile_source, prepare_ast
+
+
+class TestBinary(unittest.TestCase):
+    EXAMPLES_DIR = Path(__file__).parent / 'examples'
+    DATA = {
+        'Name': 'сервер',
+        'Spells': {'Heal': {'ManaCost': 25.0, 'Tags': ['light', 'сила']}, 'Fire': {}},
+        'Levels': [1.0, [2.0, 3.0]],
+        'Copy': 'сервер',
+    }
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_fnv1a(self):
+        self.assertEqual(fnv1a(b''), 0x811c9dc5)
+        self.assertEqual(fnv1a(b'a'), 0xe40c292c)
+        self.assertEqual(fnv1a(b'foobar'), 0xbf9cf968)
+
+    def test_round_trip_and_order(self):
+        config = BinaryConfig(encode_binary(self.DATA))
+        self.assertEqual(config.to_dict(), self.DATA)
+        self.assertEqual(list(config.root), list(self.DATA))
+        self.assertEqual(list(config['Spells']), ['Heal', 'Fire'])
+
+    def test_dotted_paths(self):
+        config = BinaryConfig(encode_binary(self.DATA))
+        self.assertEqual(config['Spells.Heal.ManaCost'], 25.0)
+        self.assertEqual(config['Spells.Heal.Tags'], ('light', 'сила'))
+        self.assertEqual(config['Levels'], (1.0, (2.0, 3.0)))
+        self.assertIsInstance(config['Spells.Fire'], BinaryStruct)
+        self.assertEqual(len(config['Spells.Fire']), 0)
+        self.assertIsNone(config.get('Spells.Ice'))
+        for path in ('Spells.Ice', 'Name.Length', 'Spells.Heal.ManaCost.X', ''):
+            with self.subTest(path=path), self.assertRaises(KeyError):
+                config[path]
+        self.assertIn('Heal', config['Spells'])
+        self.assertNotIn(1, config['Spells'])
+
+    def test_strings_are_stored_once(self):
+        single = encode_binary({'A': 'x' * 100})
+        double = encode_binary({'A': 'x' * 100, 'B': 'x' * 100})
+        self.assertLess(len(double) - len(single), 100)
+
+    def test_large_struct_index(self):
+        data = {f'Key{i}': float(i) for i in range(5000)}
+        config = BinaryConfig(encode_binary(data))
+        for i in (0, 1234, 4999):
+            self.assertEqual(config[f'Key{i}'], float(i))
+        self.assertEqual(config.to_dict(), data)
+
+    def test_mmap_file_from_compiler(self):
+        for example in sorted(self.EXAMPLES_DIR.glob('*.conf')):
+            with self.subTest(example=example.name):
+                source = example.read_text(encoding='utf-8')
+                output_path = self.temp_dir / f'{example.stem}.cfgb'
+                write_output(prepare_ast(source), output_path, 'binary')
+                with open_binary(output_path) as config:
+                    self.assertEqual(config.to_dict(), compile_source(source))
+                self.assertEqual(read_output(output_path, 'binary'), compile_source(source))
+
+    def test_invalid_input(self):
+        with self.assertRaisesRegex(ValueError, 'Not a ConfigLang binary file'):
+            BinaryConfig(b'{"A": 1}' * 10)
+        with self.assertRaisesRegex(ValueError, 'Unsupported binary config version'):
+            BinaryConfig(b'CFGB\x09\x00' + encode_binary({})[6:])
+        with self.assertRaises(TypeError):
+            encode_binary([1.0])
+        with self.assertRaises(TypeError):
+            encode_binary({'A': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
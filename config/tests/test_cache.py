@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from config.cache import CompilationCache, parse_size
+from config.main import main as cli_main
+
+
+class TestCache(unittest.TestCase):
+    EXAMPLES_DIR = Path(__file__).parent / 'examples'
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.cache_dir = self.temp_dir / 'cache'
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def run_converter(self, *extra):
+        argv = ['config', '-i', str(self.EXAMPLES_DIR / 'server.conf'),
+                '-o', str(self.temp_dir / 'server.json'), '--cache-dir', str(self.cache_dir), *extra]
+        with patch('sys.argv', argv), patch('sys.stdout'):
+            cli_main()
+
+    def test_cli_hit_skips_compilation(self):
+        self.run_converter()
+        first = (self.temp_dir / 'server.json').read_bytes()
+        self.assertEqual(len(list(self.cache_dir.glob('*.json'))), 1)
+
+        with patch('config.main.prepare_ast') as prepare_ast:
+            self.run_converter()
+            prepare_ast.assert_not_called()
+        self.assertEqual((self.temp_dir / 'server.json').read_bytes(), first)
+
+    def test_no_cache_switch(self):
+        self.run_converter('--no-cache')
+        self.assertFalse(self.cache_dir.exists())
+
+    def test_key_depends_on_content_and_options(self):
+        cache = CompilationCache(self.cache_dir)
+        source = self.temp_dir / 'a.conf'
+        source.write_text('struct { A = 1 }', encoding='utf-8')
+        key = cache.key_for(source)
+
+        self.assertEqual(cache.key_for(source), key)
+        self.assertNotEqual(cache.key_for(source, 'compact'), key)
+        source.write_text('struct { A = 2 }', encoding='utf-8')
+        self.assertNotEqual(cache.key_for(source), key)
+
+    def test_same_root_with_different_includes(self):
+        outputs = {}
+        for stage in ('prod', 'stage'):
+            directory = self.temp_dir / stage
+            directory.mkdir()
+            (directory / 'common.conf').write_text(f'Env := "{stage}";', encoding='utf-8')
+            (directory / 'app.conf').write_text('include "common.conf"; struct { Env = Env }',
+                                                encoding='utf-8')
+        for stage in ('prod', 'stage'):
+            output = self.temp_dir / f'{stage}.json'
+            argv = ['config', '-i', str(self.temp_dir / stage / 'app.conf'), '-o', str(output),
+                    '--cache-dir', str(self.cache_dir)]
+            with patch('sys.argv', argv), patch('sys.stdout'):
+                cli_main()
+            outputs[stage] = output.read_text(encoding='utf-8')
+        self.assertIn('"prod"', outputs['prod'])
+        self.assertIn('"stage"', outputs['stage'])
+
+    def test_lru_eviction(self):
+        output = self.temp_dir / 'out.json'
+        output.write_bytes(b'x' * 100)
+        cache = CompilationCache(self.cache_dir, max_size=250)
+
+        cache.store('a', output)
+        cache.store('b', output)
+        # Обращение к 'a' делает её самой свежей, вытесняется 'b'
+        past = time.time() - 10
+        os.utime(self.cache_dir / 'b.json', (past, past))
+        os.utime(self.cache_dir / 'a.json', (past - 10, past - 10))
+        self.assertTrue(cache.fetch('a', self.temp_dir / 'copy.json'))
+        cache.store('c', output)
+
+        self.assertEqual(sorted(p.name for p in self.cache_dir.glob('*.json')), ['a.json', 'c.json'])
+        self.assertFalse(cache.fetch('b', self.temp_dir / 'copy.json'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_entry_suffix_follows_format(self):
+        output = self.temp_dir / 'out.bin'
+        output.write_bytes(b'x' * 100)
+        dependency = self.temp_dir / 'lib.conf'
+        dependency.write_text('A := 1;', encoding='utf-8')
+        cache = CompilationCache(self.cache_dir, max_size=150)
+
+        cache.store('a', output, [dependency], output_format='msgpack')
+        self.assertEqual(sorted(p.name for p in self.cache_dir.iterdir()), ['a.deps', 'a.msgpack'])
+        self.assertFalse(cache.fetch('a', self.temp_dir / 'copy.bin'))
+        self.assertTrue(cache.fetch('a', self.temp_dir / 'copy.bin', 'msgpack'))
+
+        # Вытесняются записи любого формата вместе со списком зависимостей
+        past = time.time() - 10
+        os.utime(self.cache_dir / 'a.msgpack', (past, past))
+        cache.store('b', output, output_format='binary')
+        self.assertEqual(sorted(p.name for p in self.cache_dir.iterdir()), ['b.cfgb'])
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size('512K'), 512 * 1024)
+        self.assertEqual(parse_size('64m'), 64 * 1024 ** 2)
+        self.assertEqual(parse_size('1000'), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
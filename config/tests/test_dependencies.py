@@ -0,0 +1,52 @@
+import unittest
+
+from config.ast import ConstExpression
+from config.dependencies import expression_names, references, resolve_constants, root_references
+from config.lexer import Lexer
+from config.parser import Parser
+
+
+def parse(text):
+    return Parser(Lexer(text).tokenize()).parse()
+
+
+class TestDependencies(unittest.TestCase):
+    def test_references(self):
+        ast = parse('struct { A = X, B = .[Y 2 * Z mod sqrt]., C = struct { D = [1, W] }, E = T { F = X } }')
+        self.assertEqual(references([ast['root']]), ['X', 'Y', 'Z', 'W', 'T'])
+        # Парсер собирает те же ссылки по ходу разбора корня
+        self.assertEqual(root_references(ast), ['X', 'Y', 'Z', 'W', 'T'])
+        self.assertEqual(root_references({'root': ast['root']}), ['X', 'Y', 'Z', 'W', 'T'])
+        node = ConstExpression(['A', '1e3', '+', 'Inf', '*', '_B', 'sqrt', '-', 'A', 'mod'])
+        self.assertEqual(expression_names(node), ['A', '_B'])
+        self.assertIs(expression_names(node), node.names)
+
+    def test_order_and_reachability(self):
+        ast = parse('C := .[A B +].; A := 1; B := A; Unused := C; A := 2; struct { C = C }')
+        bindings = {}
+        order = resolve_constants(ast['consts'], root_references(ast), bindings=bindings)
+        self.assertEqual([decl.name for decl in order], ['A', 'A', 'B', 'C'])
+        # C ссылается вперёд и видит последнее объявление A, B - объявление выше себя
+        first, last = ast['consts'][1], ast['consts'][4]
+        self.assertEqual(order[:2], [last, first])
+        self.assertEqual(bindings, {ast['consts'][0]: {'A': last}, ast['consts'][2]: {'A': first}})
+
+    def test_fixed_constants_skip_dependencies(self):
+        ast = parse('A := B; B := 1; struct { A = A }')
+        order = resolve_constants(ast['consts'], root_references(ast), fixed={'A'})
+        self.assertEqual([decl.name for decl in order], ['A'])
+
+    def test_cycles(self):
+        ast = parse('A := .[B 1 +].; B := struct { X = C }; C := A; struct { A = A }')
+        with self.assertRaisesRegex(ValueError, r'Constant cycle: A -> B -> C -> A'):
+            resolve_constants(ast['consts'], root_references(ast))
+        ast = parse('A := .[A 1 +].; struct { A = A }')
+        with self.assertRaisesRegex(ValueError, r'Constant cycle: A -> A'):
+            resolve_constants(ast['consts'], root_references(ast))
+        # Переобъявление ссылается на прежнее значение, а не на себя
+        ast = parse('A := 1; A := .[A 1 +].; struct { A = A }')
+        self.assertEqual(len(resolve_constants(ast['consts'], root_references(ast))), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from config.ast import *
 from config.evaluator import Evaluator
+from config.pipeline import compile_source
 
 
 class TestEvaluator(unittest.TestCase):
@@ -118,5 +119,82 @@ class TestEvaluator(unittest.TestCase):
             evaluator.evaluate({'consts': [], 'root': root})
 
 
+    def test_deep_nesting(self):
+        depth = 5000  # заметно больше предела рекурсии Python
+        root = inner = Struct()
+        for _ in range(depth):
+            child = Struct({'Value': Number(1)})
+            inner.fields['A'] = child
+            inner = child
+
+        result = Evaluator().evaluate({'consts': [], 'root': root})
+        for _ in range(depth):
+            result = result['A']
+        self.assertEqual(result, {'Value': 1})
+
+    def test_shared_struct_is_evaluated_once(self):
+        shared = Struct({'Value': Number(1.0), 'Inner': Struct({'X': Number(2.0)})})
+        root = Struct({'A': shared, 'B': shared, 'C': Struct({'D': shared})})
+        evaluator = Evaluator(share_structs=True)
+        result = evaluator.evaluate({'consts': [], 'root': root})
+        self.assertEqual(result['A'], {'Value': 1.0, 'Inner': {'X': 2.0}})
+        self.assertIs(result['A'], result['B'])
+        self.assertIs(result['A'], result['C']['D'])
+        self.assertEqual(evaluator.structs_reused, 2)
+
+    def test_shared_struct_results_are_independent_by_default(self):
+        shared = Struct({'Value': Number(1.0), 'Inner': Struct({'X': Number(2.0)})})
+        root = Struct({'A': shared, 'B': shared})
+        result = Evaluator().evaluate({'consts': [], 'root': root})
+        self.assertIsNot(result['A'], result['B'])
+        result['A']['Inner']['X'] = 3.0
+        self.assertEqual(result['B'], {'Value': 1.0, 'Inner': {'X': 2.0}})
+
+    def test_constant_references_are_independent_by_default(self):
+        result = compile_source('S := struct { A = 1, L = [1, 2] }; L := [3]; '
+                                'struct { X = S, Y = S, P = L, Q = L }')
+        self.assertIsNot(result['X'], result['Y'])
+        self.assertIsNot(result['X']['L'], result['Y']['L'])
+        self.assertIsNot(result['P'], result['Q'])
+        result['X']['A'] = 2.0
+        result['X']['L'].append(3.0)
+        result['P'].append(4.0)
+        self.assertEqual(result['Y'], {'A': 1.0, 'L': [1.0, 2.0]})
+        self.assertEqual(result['Q'], [3.0])
+
+        shared = Evaluator(share_structs=True).evaluate(
+            {'consts': [ConstDeclaration('S', Struct({'A': Number(1.0)}))],
+             'root': Struct({'X': Identifier('S'), 'Y': Identifier('S')})})
+        self.assertIs(shared['X'], shared['Y'])
+
+    def test_struct_results_follow_constant_changes(self):
+        shared = Struct({'X': Identifier('A')})
+        ast = {'consts': [ConstDeclaration('A', Number(1.0)), ConstDeclaration('S', shared),
+                          ConstDeclaration('A', Number(2.0))],
+               'root': Struct({'S': Identifier('S'), 'T': shared})}
+        self.assertEqual(Evaluator().evaluate(ast), {'S': {'X': 1.0}, 'T': {'X': 2.0}})
+
+    def test_redeclaration_refers_to_previous(self):
+        ast = {'consts': [ConstDeclaration('A', Number(1.0)),
+                          ConstDeclaration('A', ConstExpression(['A', '1', '+']))],
+               'root': Struct({'A': Identifier('A')})}
+        self.assertEqual(Evaluator().evaluate(ast), {'A': 2.0})
+
+    def test_constants_resolved_by_dependencies(self):
+        # Порядок объявлений не важен, неиспользуемые константы не вычисляются
+        ast = {'consts': [ConstDeclaration('B', ConstExpression(['A', '2', '*'])),
+                          ConstDeclaration('A', Number(3.0)),
+                          ConstDeclaration('Broken', ConstExpression(['1', '0', '/'])),
+                          ConstDeclaration('Missing', Identifier('Nope'))],
+               'root': Struct({'B': Identifier('B')})}
+        evaluator = Evaluator()
+        self.assertEqual(evaluator.evaluate(ast), {'B': 6.0})
+        self.assertEqual(evaluator.constants, {'A': 3.0, 'B': 6.0})
+
+        ast['consts'].append(ConstDeclaration('A', ConstExpression(['B', '1', '+'])))
+        with self.assertRaisesRegex(ValueError, 'Constant cycle: B -> A -> B'):
+            Evaluator().evaluate(ast)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,55 @@
+import unittest
+import math
+from config.expressions import compile_expression, constant_names, parse_number
+
+
+class TestExpressions(unittest.TestCase):
+    def test_compiled_program(self):
+        program = compile_expression(['BaseInt', '1.5', '*', '2', '+'])
+
+        self.assertAlmostEqual(program({'BaseInt': 20}), 32.0)
+        # Программа не зависит от конкретных значений и переиспользуется
+        self.assertAlmostEqual(program({'BaseInt': 10}), 17.0)
+
+    def test_parse_number(self):
+        self.assertEqual(parse_number('1e3'), 1000.0)
+        self.assertEqual(parse_number('-.5'), -0.5)
+        self.assertEqual(parse_number('Inf'), math.inf)
+        self.assertTrue(math.isnan(parse_number('NaN')))
+        for token in ('BaseInt', '_x', 'mod', 'Infinite', '', '+'):
+            self.assertIsNone(parse_number(token))
+
+    def test_constant_names(self):
+        names = constant_names(['A', '2', '*', 'sqrt', 'B', 'inf', '+', '-', 'A', 'mod'], [])
+        self.assertEqual(names, ['A', 'B', 'A'])
+
+    def test_functions(self):
+        self.assertAlmostEqual(compile_expression(['2', 'sqrt'])({}), 1.41421356237, places=10)
+        self.assertAlmostEqual(compile_expression(['7', '3', 'mod'])({}), 1.0)
+
+    def test_stack_depth_checked_at_compile_time(self):
+        program = compile_expression(['1', '+'])
+        with self.assertRaisesRegex(ValueError, "Not enough operands for operator '\\+'"):
+            program({})
+
+        program = compile_expression(['1', '2'])
+        with self.assertRaisesRegex(ValueError, 'expected 1 value on stack, got 2'):
+            program({})
+
+    def test_runtime_errors(self):
+        # Ошибка в имени константы сообщается раньше ошибки глубины стека
+        with self.assertRaises(NameError):
+            compile_expression(['UNKNOWN', '+'])({})
+
+        with self.assertRaises(TypeError):
+            compile_expression(['Name', '1', '+'])({'Name': 'Mage'})
+
+        with self.assertRaisesRegex(ZeroDivisionError, 'Division by zero in expression'):
+            compile_expression(['1', '0', '/'])({})
+
+        with self.assertRaisesRegex(ValueError, "Error in operation 'sqrt'"):
+            compile_expression(['0', '1', '-', 'sqrt'])({})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import importlib.util
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from config import formats
+from config.batch import collect_inputs, run_batch
+from config.cache import CompilationCache
+from config.formats import FORMATS, encode_compact, read_output, write_output
+from config.main import main as cli_main
+from config.msgpack import unpackb
+from config.pipeline import compile_source, prepare_ast
+
+
+class TestFormats(unittest.TestCase):
+    EXAMPLES_DIR = Path(__file__).parent / 'examples'
+    SOURCE = '''
+    Db := struct { Host = "db", Ports = [5432, 5433] };
+    Bad := .[1 0 - sqrt].;
+    struct {
+        Name = "сервер",
+        Db = Db,
+        Empty = struct {},
+        Limits = struct { Cpu = 2, Memory = struct { Soft = 1, Hard = 2 } }
+    }
+    '''
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_every_format_reads_back_the_same_data(self):
+        for example in sorted(self.EXAMPLES_DIR.glob('*.conf')):
+            source = example.read_text(encoding='utf-8')
+            expected = compile_source(source)
+            for output_format, suffix in FORMATS.items():
+                with self.subTest(example=example.name, format=output_format):
+                    output_path = self.temp_dir / f'{example.stem}-{output_format}{suffix}'
+                    write_output(prepare_ast(source), output_path, output_format)
+                    self.assertEqual(read_output(output_path, output_format), expected)
+
+    def test_deep_nesting_in_every_format(self):
+        def nested(depth):
+            return 'A = struct { ' * depth + 'V = 1' + ' }' * depth
+
+        for depth in (300, 5000):
+            # Глубже предела orjson (255) и предела рекурсии интерпретатора
+            source = f'D := struct {{ {nested(depth)} }}; struct {{ {nested(depth)}, C = D }}'
+            for output_format, suffix in FORMATS.items():
+                with self.subTest(depth=depth, format=output_format):
+                    output_path = self.temp_dir / f'deep-{depth}{suffix}'
+                    write_output(prepare_ast(source), output_path, output_format)
+                    self.assertGreater(output_path.stat().st_size, 4 * depth)
+                    if depth < 500:
+                        data = read_output(output_path, output_format)
+                        self.assertEqual(data['C'], {'A': data['A']})
+                        for _ in range(depth):
+                            data = data['A']
+                        self.assertEqual(data, {'V': 1.0})
+
+    def test_json_lines_layout(self):
+        output_path = self.temp_dir / 'out.jsonl'
+        write_output(prepare_ast(self.SOURCE), output_path, 'jsonl')
+        self.assertEqual(output_path.read_text(encoding='utf-8').splitlines(), [
+            '{"Name":"сервер"}',
+            '{"Db.Host":"db"}',
+            '{"Db.Ports":[5432.0,5433.0]}',
+            '{"Empty":{}}',
+            '{"Limits.Cpu":2.0}',
+            '{"Limits.Memory.Soft":1.0}',
+            '{"Limits.Memory.Hard":2.0}',
+        ])
+        self.assertEqual(read_output(output_path, 'jsonl'), compile_source(self.SOURCE))
+
+    def test_compact_json(self):
+        output_path = self.temp_dir / 'out.json'
+        write_output(prepare_ast('struct { A = "я", B = [1, 2] }'), output_path, 'compact')
+        self.assertEqual(output_path.read_text(encoding='utf-8'), '{"A":"я","B":[1.0,2.0]}')
+
+        # Без orjson работает стандартный модуль, результат тот же
+        with patch.object(formats, 'orjson', None):
+            self.assertEqual(encode_compact({'A': 'я', 'B': [1.0, 2.0]}),
+                             '{"A":"я","B":[1.0,2.0]}'.encode('utf-8'))
+
+    def test_non_finite_numbers_are_kept(self):
+        data = {'Nan': float('nan'), 'Inf': float('inf')}
+        self.assertEqual(encode_compact(data), b'{"Nan":NaN,"Inf":Infinity}')
+        output_path = self.temp_dir / 'out.json'
+        formats.write_data(data, output_path, 'compact')
+        result = read_output(output_path, 'compact')
+        self.assertNotEqual(result['Nan'], result['Nan'])
+        self.assertEqual(result['Inf'], float('inf'))
+        self.assertEqual(encode_compact({'A': {'B': [1.0, float('-inf')]}, 'S': 'null'}),
+                         b'{"A":{"B":[1.0,-Infinity]},"S":"null"}')
+        self.assertEqual(encode_compact({'L': ['null', [float('nan')]]}), b'{"L":["null",[NaN]]}')
+
+    @unittest.skipUnless(importlib.util.find_spec('orjson'), 'orjson is not installed')
+    def test_null_in_strings_keeps_orjson(self):
+        data = {'Type': 'nullable', 'Values': [1.0, 2.5], 'Inner': {'Null': 'null'}}
+        with patch.object(formats, '_encode_compact', side_effect=AssertionError):
+            self.assertEqual(encode_compact(data),
+                             b'{"Type":"nullable","Values":[1.0,2.5],"Inner":{"Null":"null"}}')
+
+    def test_orjson_not_imported_on_startup(self):
+        # orjson с зависимостями стоит нескольких миллисекунд на каждый запуск CLI
+        code = ('import sys, config.main; from config.formats import write_output; '
+                'from config.pipeline import prepare_ast; '
+                'write_output(prepare_ast("struct { A = 1 }"), sys.argv[1]); '
+                'print("orjson" in sys.modules)')
+        output = subprocess.run([sys.executable, '-c', code, str(self.temp_dir / 'out.json')],
+                                capture_output=True, text=True, check=True,
+                                cwd=Path(__file__).parent.parent.parent).stdout
+        self.assertEqual(output.split(), ['False'])
+
+    def test_unknown_format(self):
+        with self.assertRaisesRegex(ValueError, "Unknown output format 'yaml'"):
+            write_output(prepare_ast('struct {}'), self.temp_dir / 'out.yaml', 'yaml')
+
+    def test_cli_format(self):
+        output_path = self.temp_dir / 'server.msgpack'
+        argv = ['config', '-i', str(self.EXAMPLES_DIR / 'server.conf'), '-o', str(output_path),
+                '--format', 'msgpack', '--no-cache']
+        with patch('sys.argv', argv), patch('sys.stdout'):
+            cli_main()
+        with open(self.EXAMPLES_DIR / 'server.conf', encoding='utf-8') as f:
+            self.assertEqual(unpackb(output_path.read_bytes()), compile_source(f))
+
+    def test_batch_suffix_and_cache_key(self):
+        base_dir, inputs = collect_inputs(str(self.EXAMPLES_DIR))
+        cache = CompilationCache(self.temp_dir / 'cache')
+        results = run_batch(inputs, base_dir, self.temp_dir / 'out', jobs=1, cache=cache,
+                            output_format='jsonl')
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(sorted(p.name for p in (self.temp_dir / 'out').iterdir()),
+                         sorted(p.with_suffix('.jsonl').name for p in inputs))
+
+        # Кеш хранит результат отдельно для каждого формата
+        results = run_batch(inputs, base_dir, self.temp_dir / 'json', jobs=1, cache=cache)
+        self.assertFalse(any(result.cached for result in results))
+        for result in results:
+            with open(result.output_path, encoding='utf-8') as f:
+                json.load(f)
+        results = run_batch(inputs, base_dir, self.temp_dir / 'out', jobs=1, cache=cache,
+                            output_format='jsonl')
+        self.assertTrue(all(result.cached for result in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import io
 import json
 import tempfile
 import os
@@ -108,6 +109,17 @@ class TestIntegration(unittest.TestCase):
 
         os.unlink(output_file)
 
+    def test_all_errors_summary(self):
+        for source, summary in (('struct { A = }', '1 syntax error found'),
+                                ('struct { A = , B = }', '2 syntax errors found')):
+            input_file = self.temp_dir / 'broken.conf'
+            input_file.write_text(source, encoding='utf-8')
+            argv = ['config', '-i', str(input_file), '-o', str(self.temp_dir / 'out.json'), '--all-errors']
+            with patch('sys.argv', argv), patch('sys.stderr', new_callable=io.StringIO) as stderr:
+                with self.assertRaises(SystemExit):
+                    cli_main()
+            self.assertEqual(stderr.getvalue().splitlines()[-1], summary)
+
     def tearDown(self):
         for file in self.temp_dir.glob('*'):
             try:
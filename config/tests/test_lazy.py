@@ -0,0 +1,76 @@
+import unittest
+from collections.abc import Mapping
+from pathlib import Path
+
+from config.api import freeze
+from config.lazy import LazyConfig, load_lazy
+from config.pipeline import compile_source
+
+
+class TestLazyConfig(unittest.TestCase):
+    EXAMPLES_DIR = Path(__file__).parent / 'examples'
+
+    def test_matches_eager_evaluation(self):
+        for path in sorted(self.EXAMPLES_DIR.glob('*.conf')):
+            text = path.read_text(encoding='utf-8')
+            with self.subTest(path.name):
+                config = load_lazy(text)
+                expected = compile_source(text)
+                self.assertEqual(list(config), list(expected))
+                self.assertEqual(config.to_dict(), expected)
+                self.assertEqual(config, freeze(expected))
+
+    def test_fields_are_evaluated_on_first_access(self):
+        config = load_lazy('''
+        Zero := 0;
+        struct {
+            Good = .[2 Zero +].,
+            Broken = .[1 Zero /].,
+            Nested = struct { Value = .[Zero 1 +]. }
+        }
+        ''')
+        self.assertIsInstance(config, Mapping)
+        self.assertEqual(config['Good'], 2.0)
+        self.assertIs(config['Nested'], config['Nested'])
+        self.assertIsInstance(config['Nested'], LazyConfig)
+        self.assertEqual(config['Nested']['Value'], 1.0)
+        self.assertIn('Broken', config)
+        self.assertEqual(len(config), 3)
+        # Ошибка вычисления проявляется только при обращении к полю
+        with self.assertRaises(ZeroDivisionError):
+            config['Broken']
+        with self.assertRaises(ZeroDivisionError):
+            config.to_dict()
+
+    def test_values_are_read_only(self):
+        config = load_lazy('''
+        Db := struct { Host = "db", Ports = [5432, 5433], Tls = struct { On = 1 } };
+        struct { Db = Db, Other = Db, Ports = [1, 2] }
+        ''')
+        self.assertEqual(config['Ports'], (1.0, 2.0))
+        self.assertEqual(config['Db']['Ports'], (5432.0, 5433.0))
+        with self.assertRaises(TypeError):
+            config['Db']['Host'] = 'other'
+        with self.assertRaises(TypeError):
+            config['Db']['Tls']['On'] = 0
+        with self.assertRaises(AttributeError):
+            config['Ports'].append(3)
+
+        data = config.to_dict()
+        data['Db']['Host'] = 'other'
+        data['Db']['Ports'].append(1)
+        data['Ports'].append(3)
+        self.assertEqual(config['Other']['Host'], 'db')
+        self.assertEqual(data['Other'], {'Host': 'db', 'Ports': [5432.0, 5433.0], 'Tls': {'On': 1.0}})
+        self.assertEqual(config['Ports'], (1.0, 2.0))
+
+    def test_read_only(self):
+        config = load_lazy('struct { A = 1 }')
+        with self.assertRaises(TypeError):
+            config['A'] = 2
+        with self.assertRaises(KeyError):
+            config['B']
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
+import io
+import time
 import unittest
-from config.lexer import Lexer, Token
+from config.lexer import Lexer, Token, TokenBuffer
 
 
 class TestLexer(unittest.TestCase):
@@ -81,5 +83,116 @@ class TestLexer(unittest.TestCase):
             Lexer('@').tokenize()
 
 
+    def test_iter_tokens_across_chunks(self):
+        """Комментарии, выражения, строки и числа, разрезанные границей порции"""
+        input_text = ('<# комментарий #> Pi := 3.14e-2;\n'
+                      'struct { Name = "Привет \\"мир\\"", Value = .[ Pi 2 * ]., Flag = 1 }')
+        expected = [(t.type, t.value, t.position) for t in Lexer(input_text).tokenize()]
+
+        for chunk_size in (1, 2, 3, 5, 7, 64):
+            lexer = Lexer(io.StringIO(input_text), chunk_size=chunk_size)
+            tokens = [(t.type, t.value, t.position) for t in lexer.iter_tokens()]
+            self.assertEqual(tokens, expected, f"chunk_size={chunk_size}")
+
+    def test_long_tokens_across_many_chunks(self):
+        """Токен длиной в тысячи порций не разбирается заново на каждой из них"""
+        input_text = ('<#' + 'x' * 1_000_000 + '#> A := "' + 'y' * 1_000_000 + '"; '
+                      'B := .[' + ' 1' * 500_000 + ' ].; struct { C = A }')
+        expected = [(t.type, len(t.value), t.position) for t in Lexer(input_text).tokenize()]
+
+        started = time.perf_counter()
+        lexer = Lexer(io.StringIO(input_text), chunk_size=1024)
+        tokens = [(t.type, len(t.value), t.position) for t in lexer.iter_tokens()]
+        seconds = time.perf_counter() - started
+
+        self.assertEqual(tokens, expected)
+        # Повторный разбор с начала токена на каждой порции занимал десятки секунд
+        self.assertLess(seconds, 2.0)
+
+    def test_tokenize_matches_stream(self):
+        """Быстрый путь tokenize() для строки совпадает с потоковым разбором, включая ошибки"""
+        for text in ('<# c #> A := .[ 1 2 + ].; struct { B = "x\\"y", C = [1, -2.5e3] }  ',
+                     'A = @ 1 ^ "s" <# open', 'A = .[ 1 2'):
+            errors, streamed_errors = [], []
+            lexer = Lexer(text, errors=errors)
+            tokens = [(t.type, t.value, t.position) for t in lexer.tokenize()]
+            streamed = Lexer(io.StringIO(text), chunk_size=4, errors=streamed_errors)
+            expected = [(t.type, t.value, t.position) for t in streamed.iter_tokens()]
+            self.assertEqual(tokens, expected, text)
+            self.assertEqual(errors, streamed_errors, text)
+            self.assertEqual(lexer.pos, streamed.pos, text)
+
+    def test_recovery_reports_each_bad_run_once(self):
+        """Серия неожиданных символов - одна ошибка, незакрытая строка - одна ошибка до конца строки"""
+        cases = [
+            ('struct { X = 1 } junk', ["Unexpected characters: 'junk' at position 17"]),
+            ('struct { port = 1 }', ["Unexpected characters: 'port' at position 9"]),
+            ('struct { A = "unterminated }', ['Unterminated string starting at position 13']),
+            ('A = "open,\nB = @@ 2; ^', ['Unterminated string starting at position 4',
+                                          "Unexpected characters: '@@' at position 15",
+                                          "Unexpected character: '^' at position 21"]),
+        ]
+        for text, expected in cases:
+            errors = []
+            tokens = [(t.type, t.value, t.position) for t in Lexer(text, errors=errors).tokenize()]
+            self.assertEqual([message for _, message in errors], expected, text)
+            for chunk_size in (1, 2, 5):
+                streamed_errors = []
+                lexer = Lexer(io.StringIO(text), chunk_size=chunk_size, errors=streamed_errors)
+                self.assertEqual([(t.type, t.value, t.position) for t in lexer.iter_tokens()], tokens)
+                self.assertEqual(streamed_errors, errors)
+        # После незакрытой строки разбор продолжается со следующей строки
+        self.assertEqual([t.value for t in Lexer('A = "open,\nB = 2;', errors=[]).tokenize()],
+                         ['A', '=', 'B', '=', '2', ';'])
+
+        with self.assertRaisesRegex(SyntaxError, "Unexpected characters: 'junk' at position 17"):
+            Lexer('struct { X = 1 } junk').tokenize()
+
+    def test_iter_tokens_binary_stream(self):
+        input_text = 'struct { Name = "Элиандра — ²" }'
+        lexer = Lexer(io.BytesIO(input_text.encode('utf-8')), chunk_size=1)
+        values = [t.value for t in lexer.iter_tokens()]
+        self.assertIn('Элиандра — ²', values)
+
+    def test_iter_tokens_errors_in_stream(self):
+        with self.assertRaisesRegex(SyntaxError, 'position 4'):
+            list(Lexer(io.StringIO('A = <# unterminated'), chunk_size=2).iter_tokens())
+
+        with self.assertRaisesRegex(SyntaxError, 'position 4'):
+            list(Lexer(io.StringIO('A = "unterminated'), chunk_size=2).iter_tokens())
+
+        with self.assertRaisesRegex(SyntaxError, 'Unterminated expression'):
+            list(Lexer(io.StringIO('A = .[ 1 2 +'), chunk_size=2).iter_tokens())
+
+    def test_positions_and_errors_at_edges(self):
+        text = '  <#>#>  .[].<# a #>-1 +2"s\\\\"  \n'
+        tokens = [(t.type, t.value, t.position) for t in Lexer(text).tokenize()]
+        self.assertEqual(tokens, [
+            ('START_EXPR', '.[', 9), ('EXPR_CONTENT', '', 11), ('END_EXPR', '].', 11),
+            ('NUMBER', '-1', 20), ('NUMBER', '+2', 23), ('STRING', 's\\', 25),
+        ])
+        for chunk_size in (1, 2, 5):
+            streamed = Lexer(io.StringIO(text), chunk_size=chunk_size).iter_tokens()
+            self.assertEqual([(t.type, t.value, t.position) for t in streamed], tokens)
+
+        with self.assertRaisesRegex(SyntaxError, "Unexpected character: '\\r' at position 6"):
+            Lexer('A := 1\r\n').tokenize()
+        with self.assertRaisesRegex(SyntaxError, "Unterminated comment starting at position 3"):
+            Lexer('A  <#> ').tokenize()
+
+    def test_tokenize_compact(self):
+        input_text = ('<# comment #> Pi := 3.14;\n'
+                      'struct { Name = "Hello \\"World\\"", Value = .[ Pi 2 * ]. }')
+        expected = [(t.type, t.value, t.position) for t in Lexer(input_text).tokenize()]
+        buffer = Lexer(input_text).tokenize_compact()
+
+        self.assertIsInstance(buffer, TokenBuffer)
+        self.assertEqual(len(buffer), len(expected))
+        self.assertEqual([(t.type, t.value, t.position) for t in buffer], expected)
+        self.assertEqual(buffer.value_at(len(buffer) - 1), '}')
+        self.assertEqual((buffer[8].type, buffer[8].value), ('STRING', 'Hello "World"'))
+        self.assertFalse(hasattr(buffer[0], '__dict__'))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,143 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from config.cache import CompilationCache
+from config.evaluator import Evaluator
+from config.modules import ModuleCache, link_includes
+from config.optimizer import Optimizer
+from config.parser import Parser
+from config.lexer import Lexer
+from config.pipeline import compile_source
+from config.watch import Watcher
+
+
+class TestIncludes(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write(self, name, text, mtime=None):
+        path = self.temp_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+        return path
+
+    def test_thread_pool_only_for_includes(self):
+        # concurrent.futures тянет logging: файлам без include он не нужен
+        self.write('lib.conf', 'A := 1;')
+        app = self.write('app.conf', 'include "lib.conf"; struct { A = A }')
+        code = ('import sys; from config.pipeline import compile_source; '
+                'compile_source("struct { A = 1 }"); print("concurrent.futures" in sys.modules); '
+                'compile_source(open(sys.argv[1]), path=sys.argv[1]); print("concurrent.futures" in sys.modules)')
+        output = subprocess.run([sys.executable, '-c', code, str(app)], capture_output=True, text=True,
+                                check=True, cwd=Path(__file__).parent.parent.parent).stdout
+        self.assertEqual(output.split(), ['False', 'True'])
+
+    def compile(self, name, cache=None):
+        path = self.temp_dir / name
+        ast = Parser(Lexer(path.read_text(encoding='utf-8')).tokenize()).parse()
+        link_includes(ast, path, cache or ModuleCache())
+        return Evaluator().evaluate(Optimizer().optimize(ast)), ast
+
+    def test_parse_include(self):
+        ast = Parser(Lexer('A := 1; include "lib.conf"; include "x.conf" B := 2; struct {}').tokenize()).parse()
+        self.assertEqual([(i.path, i.index) for i in ast['includes']], [('lib.conf', 1), ('x.conf', 1)])
+        self.assertEqual([decl.name for decl in ast['consts']], ['A', 'B'])
+
+        module = Parser(Lexer('A := 1;').tokenize()).parse(require_root=False)
+        self.assertIsNone(module['root'])
+        with self.assertRaises(SyntaxError):
+            Parser(Lexer('A := 1;').tokenize()).parse()
+
+    def test_constants_and_structs_from_modules(self):
+        self.write('lib/base.conf', 'Base := 10;\nDb := struct { Host = "db", Port = .[Base 5432 +]. };')
+        self.write('lib/limits.conf', 'include "base.conf";\nLimit := .[Base 2 *].;')
+        self.write('app.conf', 'include "lib/limits.conf";\nstruct { Limit = Limit, Db = Db }')
+
+        data, ast = self.compile('app.conf')
+        self.assertEqual(data, {'Limit': 20.0, 'Db': {'Host': 'db', 'Port': 5442.0}})
+        self.assertEqual([Path(p).name for p in ast['dependencies']], ['limits.conf', 'base.conf'])
+
+    def test_each_module_is_included_once(self):
+        self.write('base.conf', 'Level := 1;')
+        self.write('left.conf', 'include "base.conf"; Level := 2;')
+        self.write('right.conf', 'include "base.conf"; Right := Level;')
+        self.write('app.conf', 'include "left.conf"; include "right.conf"; struct { L = Level, R = Right }')
+
+        cache = ModuleCache()
+        data, _ = self.compile('app.conf', cache)
+        # Повторное включение base.conf не возвращает Level к 1
+        self.assertEqual(data, {'L': 2.0, 'R': 2.0})
+        self.assertEqual(cache.misses, 3)
+
+    def test_module_cache_is_reused_and_not_mutated(self):
+        self.write('lib.conf', 'K := .[2 3 *].; S := struct { V = .[K 1 +]. };', mtime=1)
+        self.write('a.conf', 'include "lib.conf"; struct { S = S }')
+        self.write('b.conf', 'K := 100; include "lib.conf"; struct { K = K, S = S }')
+
+        cache = ModuleCache()
+        self.assertEqual(self.compile('a.conf', cache)[0], {'S': {'V': 7.0}})
+        self.assertEqual(self.compile('b.conf', cache)[0], {'K': 6.0, 'S': {'V': 7.0}})
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        self.write('lib.conf', 'K := 1; S := struct { V = K };', mtime=2)
+        self.assertEqual(self.compile('a.conf', cache)[0], {'S': {'V': 1.0}})
+        self.assertEqual(cache.misses, 2)
+
+    def test_cycles_and_missing_files(self):
+        self.write('a.conf', 'include "b.conf"; struct {}')
+        self.write('b.conf', 'include "c.conf";')
+        self.write('c.conf', 'include "b.conf";')
+        with self.assertRaisesRegex(ValueError, r'Include cycle: .*b\.conf -> .*c\.conf -> .*b\.conf'):
+            self.compile('a.conf')
+
+        self.write('self.conf', 'include "self.conf"; struct {}')
+        with self.assertRaisesRegex(ValueError, 'Include cycle'):
+            self.compile('self.conf')
+
+        self.write('missing.conf', 'include "nope.conf"; struct {}')
+        with self.assertRaisesRegex(FileNotFoundError, "'nope.conf' does not exist"):
+            self.compile('missing.conf')
+
+        self.write('broken.conf', 'include "bad.conf"; struct {}')
+        self.write('bad.conf', 'X := ;')
+        with self.assertRaisesRegex(SyntaxError, 'bad.conf'):
+            self.compile('broken.conf')
+
+    def test_string_source_resolves_from_cwd(self):
+        self.write('lib.conf', 'Name := "lib";')
+        cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            self.assertEqual(compile_source('include "lib.conf"; struct { N = Name }'), {'N': 'lib'})
+        finally:
+            os.chdir(cwd)
+
+    def test_dependency_changes_invalidate_builds(self):
+        self.write('lib.conf', 'Port := 1;', mtime=1)
+        app = self.write('app.conf', 'include "lib.conf"; struct { Port = Port }', mtime=1)
+
+        cache = CompilationCache(self.temp_dir / 'cache')
+        watcher = Watcher(str(app), str(self.temp_dir / 'app.json'), cache=cache,
+                          debounce=0, log=lambda message: None)
+        watcher.build()
+        self.assertEqual(watcher.poll(now=1.0), [])
+
+        self.write('lib.conf', 'Port := 2;', mtime=2)
+        results = watcher.poll(now=2.0)
+        self.assertEqual(len(results), 1)
+        self.assertFalse(results[0].cached)
+        self.assertEqual((self.temp_dir / 'app.json').read_text(encoding='utf-8'), '{\n  "Port": 2.0\n}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import math
+import unittest
+
+from config.msgpack import packb, unpackb
+
+
+class TestMsgpack(unittest.TestCase):
+    def test_known_encodings(self):
+        self.assertEqual(packb({'a': 1.0}).hex(), '81a161cb3ff0000000000000')
+        self.assertEqual(packb([1, -1, -33, 128, 'ab']).hex(), '9501ffd0dfcc80a26162')
+        self.assertEqual(packb([None, True, False]).hex(), '93c0c3c2')
+
+    def test_round_trip(self):
+        values = [
+            {},
+            [],
+            {'Name': 'сервер', 'Port': 8080.0, 'Nested': {'Empty': {}, 'List': [1.5, [2.0, 'x']]}},
+            {'Long': 'x' * 40, 'Longer': 'y' * 300, 'Huge': 'z' * 70000},
+            {f'K{i}': float(i) for i in range(20)},
+            [float(i) for i in range(70000)],
+            [0, 127, 255, 65535, 2 ** 32, 2 ** 64 - 1, -32, -128, -32768, -2 ** 31, -2 ** 63],
+        ]
+        for value in values:
+            with self.subTest(value=str(value)[:40]):
+                self.assertEqual(unpackb(packb(value)), value)
+
+        self.assertTrue(math.isnan(unpackb(packb(float('nan')))))
+        self.assertEqual(unpackb(packb((1.0, 2.0))), [1.0, 2.0])
+
+    def test_deep_nesting_without_recursion(self):
+        value = {}
+        node = value
+        for _ in range(5000):
+            node['S'] = {}
+            node = node['S']
+        # Сравнение словарей такой глубины само упирается в рекурсию - сравниваем байты
+        encoded = packb(value)
+        self.assertEqual(packb(unpackb(encoded)), encoded)
+        self.assertEqual(len(encoded), 5000 * 3 + 1)
+
+    def test_errors(self):
+        with self.assertRaises(TypeError):
+            packb({1: 'x'})
+        with self.assertRaises(TypeError):
+            packb({'a': object()})
+        with self.assertRaises(OverflowError):
+            packb(2 ** 64)
+        with self.assertRaisesRegex(ValueError, 'Unsupported MessagePack type 0xc4'):
+            unpackb(b'\xc4\x01a')
+        with self.assertRaisesRegex(ValueError, 'Extra data'):
+            unpackb(b'\x01\x02')
+
+
+if __name__ == '__main__':
+    unittest.main()
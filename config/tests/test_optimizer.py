@@ -0,0 +1,71 @@
+import unittest
+from config.lexer import Lexer
+from config.parser import Parser
+from config.optimizer import Optimizer
+from config.evaluator import Evaluator
+from config.ast import *
+
+
+def parse(text):
+    return Parser(Lexer(text).tokenize()).parse()
+
+
+class TestOptimizer(unittest.TestCase):
+    def test_folds_expressions_and_constants(self):
+        ast = parse('BaseInt := 20; SpellPower := .[BaseInt 1.5 *].; '
+                    'struct { Power = SpellPower, Mana = .[BaseInt 10 *]. }')
+        optimizer = Optimizer()
+        ast = optimizer.optimize(ast)
+
+        self.assertIsInstance(ast['consts'][1].value_node, Number)
+        self.assertEqual(ast['consts'][1].value_node.value, 30.0)
+        self.assertIsInstance(ast['root'].fields['Power'], Number)
+        self.assertEqual(ast['root'].fields['Mana'].value, 200.0)
+        self.assertEqual(optimizer.folded, 3)
+
+    def test_deduplicates_identical_expressions(self):
+        ast = parse('BaseInt := 20; struct { A = .[BaseInt 10 *]., '
+                    'B = struct { C = .[BaseInt 10.0 *]. }, D = .[BaseInt 1e1 *]. }')
+        optimizer = Optimizer()
+        ast = optimizer.optimize(ast)
+
+        self.assertEqual(optimizer.stats, {'folded': 1, 'deduplicated': 2, 'eliminated': 0})
+        self.assertIs(ast['root'].fields['A'], ast['root'].fields['D'])
+        self.assertEqual(Evaluator().evaluate(ast), {'A': 200.0, 'B': {'C': 200.0}, 'D': 200.0})
+
+    def test_redefined_constant(self):
+        # Ссылка видит ближайшее объявление выше, корень - последнее
+        ast = parse('X := 1; A := .[X 1 +].; X := 5; struct { A = A, B = .[X 1 +]. }')
+        ast = Optimizer().optimize(ast)
+        self.assertEqual(Evaluator().evaluate(ast), {'A': 2.0, 'B': 6.0})
+
+        ast = parse('A := 1; A := .[A 1 +].; S := struct { V = A }; A := 10; '
+                    'struct { S = S, T = struct { V = A } }')
+        ast = Optimizer().optimize(ast)
+        self.assertEqual(Evaluator().evaluate(ast), {'S': {'V': 2.0}, 'T': {'V': 10.0}})
+
+    def test_dead_constants_are_eliminated(self):
+        ast = parse('B := .[A 2 *].; Unused := .[1 0 /].; A := 3; Base := struct { X = B }; '
+                    'struct { T = Base { Y = 1 } }')
+        optimizer = Optimizer()
+        ast = optimizer.optimize(ast)
+        self.assertEqual([decl.name for decl in ast['consts']], ['B', 'A', 'Base'])
+        self.assertEqual(optimizer.eliminated, 1)
+        self.assertEqual(Evaluator().evaluate(ast), {'T': {'X': 6.0, 'Y': 1.0}})
+
+    def test_errors_left_to_evaluator(self):
+        ast = parse('Name := "Mage"; struct { A = .[Name 1 +]., B = .[1 0 /]. }')
+        ast = Optimizer().optimize(ast)
+
+        self.assertIsInstance(ast['root'].fields['A'], ConstExpression)
+        with self.assertRaises(TypeError):
+            Evaluator().evaluate(ast)
+
+    def test_unknown_constants_are_not_folded(self):
+        ast = parse('BaseInt := 20; struct { Mana = .[BaseInt 10 *]. }')
+        ast = Optimizer(unknown={'BaseInt'}).optimize(ast)
+        self.assertIsInstance(ast['root'].fields['Mana'], ConstExpression)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from config.lexer import Lexer
-from config.parser import Parser
+from config.parser import Parser, ParseErrors
+from config.pipeline import parse_source
 from config.ast import *
 
 
@@ -105,5 +106,124 @@ class TestParser(unittest.TestCase):
             Parser(Lexer('struct { field = 42').tokenize()).parse()
 
 
+    def test_lazy_token_stream(self):
+        input_text = 'BaseInt := 20; struct { Mana = .[BaseInt 10 *]., Name = "Mage" }'
+        lexer = Lexer(input_text)
+        ast = Parser(lexer.iter_tokens()).parse()
+
+        self.assertEqual(ast['consts'][0].name, 'BaseInt')
+        self.assertEqual(ast['root'].fields['Mana'].tokens, ['BaseInt', '10', '*'])
+        self.assertEqual(ast['root'].fields['Name'].value, 'Mage')
+
+
+    def test_compact_token_stream(self):
+        input_text = 'BaseInt := 20; struct { Stats = struct { Mana = .[BaseInt 10 *]. } }'
+        ast = Parser(Lexer(input_text).tokenize_compact()).parse()
+
+        mana = ast['root'].fields['Stats'].fields['Mana']
+        self.assertEqual(mana.tokens, ['BaseInt', '10', '*'])
+        self.assertFalse(hasattr(mana, '__dict__'))
+
+
+    def test_deep_nesting(self):
+        depth = 5000  # заметно больше предела рекурсии Python
+        input_text = 'struct {' + ' A = struct {' * depth + ' Leaf = 1 ' + '}' * (depth + 1)
+        node = Parser(Lexer(input_text).tokenize()).parse()['root']
+        for _ in range(depth):
+            node = node.fields['A']
+        self.assertEqual(node.fields['Leaf'].value, 1.0)
+
+    def test_unexpected_end_of_input(self):
+        with self.assertRaisesRegex(SyntaxError, 'EOF'):
+            Parser(Lexer('struct { Port = ').tokenize()).parse()
+
+    def test_recovery_collects_all_errors(self):
+        text = ('A := ;\n'
+                'B := 1;\n'
+                'struct {\n'
+                '  X = ,\n'
+                '  Y = @,\n'
+                '  Z = struct { Q = 1, R = } ,\n'
+                '  Ok = 3\n'
+                '}\n')
+        with self.assertRaises(ParseErrors) as cm:
+            parse_source(text, recover=True)
+        errors = cm.exception.errors
+        self.assertEqual([(line, column) for line, column, _ in errors],
+                         [(1, 6), (4, 7), (5, 7), (5, 8), (6, 27)])
+        self.assertIn("Unexpected character: '@'", errors[2][2])
+        self.assertIsInstance(cm.exception, SyntaxError)
+        self.assertTrue(str(cm.exception).startswith('line 1, column 6: '))
+
+    def test_recovery_keeps_parsing_after_errors(self):
+        errors = []
+        parser = Parser(Lexer('struct { A = , B = struct { C = 2 }, D = 4 }').tokenize(),
+                        recover=True, errors=errors)
+        with self.assertRaises(ParseErrors):
+            parser.parse()
+        self.assertEqual(len(errors), 1)
+
+        # Без ошибок режим восстановления даёт обычное дерево
+        ast = Parser(Lexer('X := 1; struct { A = X }').tokenize(), recover=True).parse()
+        self.assertEqual(ast['root'].fields['A'].name, 'X')
+
+    def test_recovery_error_counts(self):
+        for text, count in (('struct { X = 1 } junk', 1),
+                            ('struct { port = 1, Ok = 2 }', 2),
+                            # Скобка попала в строку, поэтому структура не закрыта
+                            ('struct { A = "unterminated }', 2)):
+            with self.assertRaises(ParseErrors) as cm:
+                parse_source(text, recover=True)
+            self.assertEqual(len(cm.exception.errors), count, cm.exception.errors)
+
+    def test_recovery_at_end_of_input(self):
+        with self.assertRaises(ParseErrors) as cm:
+            parse_source('struct {\n  A = 1,\n  B = ', recover=True)
+        self.assertEqual([(line, column) for line, column, _ in cm.exception.errors], [(3, 7)])
+
+    def test_identical_structs_and_values_are_shared(self):
+        source = '''
+        Unit := struct { Kind = "soldier", Hp = 100 };
+        struct {
+            A = struct { Kind = "soldier", Hp = 100, Tags = [1, 2] },
+            B = struct { Kind = "soldier", Hp = 100, Tags = [1, 2] },
+            C = struct { Hp = 100, Kind = "soldier" },
+            D = struct { Kind = "soldier", Hp = 100 },
+            Zero = struct { V = 0 },
+            NegativeZero = struct { V = -0 }
+        }
+        '''
+        parser = Parser(Lexer(source).tokenize())
+        ast = parser.parse()
+        fields = ast['root'].fields
+        self.assertIs(fields['A'], fields['B'])
+        # Другой порядок полей - другая структура, а совпадение с константой - та же
+        self.assertIsNot(fields['C'], ast['consts'][0].value_node)
+        self.assertIs(fields['D'], ast['consts'][0].value_node)
+        self.assertIsNot(fields['Zero'], fields['NegativeZero'])
+        self.assertIs(fields['A'].fields['Kind'], fields['C'].fields['Kind'])
+        self.assertIs(next(iter(fields['A'].fields)), next(iter(fields['D'].fields)))
+
+        stats = ast['sharing']
+        self.assertEqual(stats, parser.stats)
+        self.assertEqual(stats['shared_structs'], 2)
+        self.assertEqual(stats['interned_strings'], 4)
+        self.assertGreater(stats['saved_bytes'], 0)
+
+    def test_structs_with_references_are_shared(self):
+        source = '''
+        A := 1;
+        S := struct { X = A, Y = .[A 1 +]. };
+        A := 2;
+        T := struct { X = A, Y = .[A 1 +]. };
+        struct { P = struct { X = A }, Q = struct { X = A } }
+        '''
+        ast = Parser(Lexer(source).tokenize()).parse()
+        consts = {decl.name: decl.value_node for decl in ast['consts']}
+        # A везде означает последнее объявление, поэтому S и T - один узел
+        self.assertIs(consts['S'], consts['T'])
+        self.assertIs(ast['root'].fields['P'], ast['root'].fields['Q'])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,74 @@
+import io
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from config.profiling import profile_compile
+from config.main import main as cli_main
+
+
+class TestProfiling(unittest.TestCase):
+    EXAMPLES_DIR = Path(__file__).parent / 'examples'
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_profile_api(self):
+        text = 'BaseInt := 20; struct { A = .[BaseInt 10 *]., B = struct { C = "x" } }'
+        profile = profile_compile(text, self.temp_dir / 'out.json')
+
+        stages = {stage.name: stage for stage in profile.stages}
+        self.assertEqual(list(stages), ['lex', 'parse', 'optimize', 'evaluate', 'write'])
+        self.assertEqual(stages['lex'].counts['tokens'], 21)
+        self.assertEqual(stages['parse'].counts['expressions'], 1)
+        self.assertEqual(stages['optimize'].counts['folded'], 1)
+        for stage in profile.stages:
+            self.assertGreaterEqual(stage.wall_time, 0)
+            self.assertIsNotNone(stage.peak_memory)
+        self.assertIn('total', profile.format_table())
+
+    def test_deep_nesting_with_output(self):
+        depth = 20000
+        text = 'struct { ' + 'A = struct { ' * depth + 'V = 1' + ' }' * depth + ' }'
+        output_path = self.temp_dir / 'deep.json'
+        profile = profile_compile(text, output_path, trace_memory=False)
+        self.assertEqual(profile.stages[-1].name, 'write')
+        self.assertEqual(profile.stages[-1].counts['bytes'], output_path.stat().st_size)
+        self.assertTrue(output_path.read_text(encoding='utf-8').startswith('{\n  "A": {\n    "A"'))
+
+    def test_without_memory_tracing(self):
+        profile = profile_compile('struct { A = .[1 2 +]. }', trace_memory=False)
+        self.assertEqual([stage.peak_memory for stage in profile.stages], [None] * 4)
+        self.assertEqual(profile.stages[-1].counts['expressions'], 0)
+
+    def test_cli_json(self):
+        argv = ['config', '-i', str(self.EXAMPLES_DIR / 'server.conf'),
+                '-o', str(self.temp_dir / 'server.json'), '--profile-json', '-']
+        stdout = io.StringIO()
+        with patch('sys.argv', argv), patch('sys.stdout', stdout):
+            with self.assertRaises(SystemExit) as cm:
+                cli_main()
+
+        self.assertEqual(cm.exception.code, 0)
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(report['stages'][0]['stage'], 'lex')
+        self.assertIn('wall_time', report['total'])
+
+    def test_not_imported_on_startup(self):
+        # Профилировщик и tracemalloc грузятся только для --profile
+        code = 'import sys, config.main; print("config.profiling" in sys.modules, "tracemalloc" in sys.modules)'
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                check=True, cwd=Path(__file__).parent.parent.parent).stdout
+        self.assertEqual(output.split(), ['False', 'False'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import io
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+from pathlib import Path
+from unittest.mock import patch
+
+from config.evaluator import Evaluator
+from config.lexer import Lexer
+from config.main import main as cli_main
+from config.parser import Parser, selection_tree
+from config.pipeline import compile_source, parse_source
+from config.selection import select_source, select_values, format_raw
+
+SOURCE = """
+Base := struct { Host = "localhost", Port = 80 };
+Unused := .[1 0 /].;
+Timeout := 30;
+struct {
+    Name = "server",
+    Port = 8080,
+    SSL = struct {
+        CertPath = "/etc/ssl/cert.pem",
+        Options = struct { Strict = .[Timeout 2 *]. },
+    },
+    Mirror = Base { Port = 81 },
+    Skipped = struct {
+        Text = "} { <# #>",
+        <# } #>
+        Expr = .[Timeout 1 +].,
+        List = [1, 2, 3],
+    },
+    Hosts = [1, 2],
+}
+"""
+
+
+class TestSelectionTree(unittest.TestCase):
+    def test_nested_paths(self):
+        tree = selection_tree(['Port', 'SSL.CertPath', 'SSL.Options.Strict'])
+        self.assertEqual(tree, {'Port': None, 'SSL': {'CertPath': None, 'Options': {'Strict': None}}})
+
+    def test_whole_parent_wins(self):
+        self.assertEqual(selection_tree(['SSL', 'SSL.CertPath']), {'SSL': None})
+        self.assertEqual(selection_tree(['SSL.CertPath', 'SSL']), {'SSL': None})
+
+    def test_invalid_path(self):
+        for path in ('', 'SSL.', '.Port', 'A..B'):
+            with self.assertRaises(ValueError):
+                selection_tree([path])
+
+
+class TestSelectSource(unittest.TestCase):
+    def test_values_match_full_compile(self):
+        full = compile_source(SOURCE)
+        paths = ['Port', 'SSL.CertPath', 'SSL.Options', 'Mirror.Port', 'Mirror.Host', 'Hosts']
+        result = select_source(SOURCE, paths)
+        self.assertEqual(list(result), paths)
+        self.assertEqual(result['Port'], full['Port'])
+        self.assertEqual(result['SSL.CertPath'], full['SSL']['CertPath'])
+        self.assertEqual(result['SSL.Options'], {'Strict': 60.0})
+        self.assertEqual(result['Mirror.Port'], 81.0)
+        self.assertEqual(result['Mirror.Host'], 'localhost')
+        self.assertEqual(result['Hosts'], [1.0, 2.0])
+
+    def test_skipped_fields_have_no_nodes(self):
+        ast = parse_source(SOURCE, select=['SSL.CertPath'])
+        self.assertEqual(list(ast['root'].fields), ['SSL'])
+        self.assertEqual(list(ast['root'].fields['SSL'].fields), ['CertPath'])
+
+    def test_skipping_without_lexer(self):
+        tokens = Lexer(SOURCE).tokenize()
+        ast = Parser(tokens, select=['Skipped.Expr', 'Hosts']).parse()
+        self.assertEqual(list(ast['root'].fields), ['Skipped', 'Hosts'])
+        self.assertEqual(list(ast['root'].fields['Skipped'].fields), ['Expr'])
+        self.assertEqual(select_values(ast, ['Skipped.Expr']), [31.0])
+
+    def test_skip_block_across_chunks(self):
+        expected = select_source(SOURCE, ['Hosts', 'Port'])
+        for chunk_size in (1, 2, 3, 7, 64):
+            with self.subTest(chunk_size=chunk_size):
+                lexer = Lexer(io.StringIO(SOURCE), chunk_size=chunk_size)
+                ast = Parser(lexer.iter_tokens(), select=['Hosts', 'Port'], lexer=lexer).parse()
+                self.assertEqual(select_values(ast, ['Hosts', 'Port']), [expected['Hosts'], expected['Port']])
+
+    def test_only_needed_constants_evaluated(self):
+        ast = parse_source(SOURCE, select=['SSL.Options.Strict'])
+        evaluator = Evaluator()
+        # Unused делит на ноль, но не нужен выбранному пути
+        self.assertEqual(select_values(ast, ['SSL.Options.Strict'], evaluator), [60.0])
+        self.assertEqual(set(evaluator.constants), {'Timeout'})
+
+    def test_missing_path(self):
+        for path in ('Missing', 'SSL.Missing', 'Port.Value', 'Mirror.Missing'):
+            with self.assertRaises(KeyError):
+                select_source(SOURCE, [path])
+
+    def test_format_raw(self):
+        self.assertEqual(format_raw(8080.0), '8080')
+        self.assertEqual(format_raw(0.5), '0.5')
+        self.assertEqual(format_raw('a "b"'), 'a "b"')
+        self.assertEqual(format_raw({'A': [1.5, 'x']}), '{"A":[1.5,"x"]}')
+
+
+class TestSelectCli(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input = self.temp_dir / 'server.conf'
+        self.input.write_text(SOURCE, encoding='utf-8')
+
+    def run_cli(self, *args):
+        out = io.StringIO()
+        with patch('sys.argv', ['config', '-i', str(self.input), *args]), redirect_stdout(out):
+            try:
+                cli_main()
+            except SystemExit as e:
+                if e.code:
+                    raise
+        return out.getvalue()
+
+    def test_raw_values(self):
+        output = self.run_cli('--select', 'Port', 'SSL.CertPath', '--raw')
+        self.assertEqual(output.splitlines(), ['8080', '/etc/ssl/cert.pem'])
+
+    def test_json_output(self):
+        self.assertEqual(json.loads(self.run_cli('--select', 'SSL.Options')), {'Strict': 60.0})
+        output = json.loads(self.run_cli('--select', 'Port', 'Mirror.Port'))
+        self.assertEqual(output, {'Port': 8080.0, 'Mirror.Port': 81.0})
+
+    def test_output_file(self):
+        output_file = self.temp_dir / 'port.txt'
+        self.run_cli('--select', 'Port', '--raw', '-o', str(output_file))
+        self.assertEqual(output_file.read_text(encoding='utf-8').strip(), '8080')
+
+    def test_deep_values(self):
+        depth = 5000
+        self.input.write_text('struct { Root = ' + 'struct { A = ' * depth + '1' + ' }' * depth + ' }',
+                              encoding='utf-8')
+        # Глубже предела рекурсии json.dumps
+        output = self.run_cli('--select', 'Root.A')
+        self.assertTrue(output.startswith('{\n  "A": {\n    "A": {'))
+        self.assertEqual(output.count('"A"'), depth - 1)
+        raw = self.run_cli('--select', 'Root', '--raw')
+        self.assertEqual(raw, '{"A":' * depth + '1.0' + '}' * depth + '\n')
+
+    def test_missing_path_exits(self):
+        err = io.StringIO()
+        with redirect_stderr(err), self.assertRaises(SystemExit) as cm:
+            self.run_cli('--select', 'Missing')
+        self.assertEqual(cm.exception.code, 1)
+
+    def test_output_required_without_select(self):
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as cm:
+            self.run_cli()
+        self.assertNotEqual(cm.exception.code, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
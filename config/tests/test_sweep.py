@@ -0,0 +1,91 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from config.ast import Number, ConstExpression
+from config.main import main as cli_main
+from config.sweep import Sweep, read_overrides, run_sweep
+
+
+class TestSweep(unittest.TestCase):
+    EXAMPLES_DIR = Path(__file__).parent / 'examples'
+    SOURCE = '''
+    BaseInt := 20;
+    Scale := 3;
+    Levels := [1, 2, 3];
+    Power := .[BaseInt 1.5 *].;
+    struct {
+        Int = BaseInt,
+        Power = Power,
+        Mana = .[BaseInt 10 *].,
+        Fixed = .[Scale 2 *].,
+        Levels = .[Levels BaseInt *].
+    }
+    '''
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_only_dependent_nodes_are_left_for_evaluation(self):
+        sweep = Sweep(self.SOURCE, {'BaseInt'})
+        fields = sweep.ast['root'].fields
+        self.assertIsInstance(fields['Fixed'], Number)
+        self.assertIsInstance(fields['Mana'], ConstExpression)
+
+        self.assertEqual(sweep.evaluate({'BaseInt': 2.0}),
+                         {'Int': 2.0, 'Power': 3.0, 'Mana': 20.0, 'Fixed': 6.0,
+                          'Levels': [2.0, 4.0, 6.0]})
+        # Тот же AST без переопределений даёт обычный результат
+        self.assertEqual(sweep.evaluate({})['Mana'], 200.0)
+
+    def test_unknown_constant(self):
+        with self.assertRaises(NameError):
+            Sweep(self.SOURCE, {'Missing'})
+
+    def test_read_overrides(self):
+        table = self.temp_dir / 'tiers.csv'
+        table.write_text('_name,BaseInt,Scale\nlow,10,\nhigh,40,"[1, 2]"\n', encoding='utf-8')
+        self.assertEqual(read_overrides(table), [
+            {'_name': 'low', 'BaseInt': 10.0},
+            {'_name': 'high', 'BaseInt': 40.0, 'Scale': [1.0, 2.0]},
+        ])
+
+        table = self.temp_dir / 'tiers.jsonl'
+        table.write_text('{"BaseInt": 1}\n\n{"BaseInt": 2.5, "Scale": "x"}\n', encoding='utf-8')
+        self.assertEqual(read_overrides(table), [{'BaseInt': 1.0}, {'BaseInt': 2.5, 'Scale': 'x'}])
+
+    def test_run_sweep_reports_failed_rows(self):
+        rows = [{'BaseInt': 1.0}, {'BaseInt': 'text'}, {'_name': 'last', 'BaseInt': 3.0}]
+        results = run_sweep(self.SOURCE, rows, self.temp_dir, prefix='hero')
+
+        self.assertEqual([Path(r.output_path).name for r in results],
+                         ['hero-1.json', 'hero-2.json', 'last.json'])
+        self.assertEqual([r.ok for r in results], [True, False, True])
+        self.assertFalse((self.temp_dir / 'hero-2.json').exists())
+        with open(self.temp_dir / 'last.json', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['Mana'], 30.0)
+
+    def test_cli(self):
+        table = self.temp_dir / 'ports.csv'
+        table.write_text('_name,MinPort\ndev,1000\nprod,8000\n', encoding='utf-8')
+        out = self.temp_dir / 'out'
+        argv = ['config', '-i', str(self.EXAMPLES_DIR / 'server.conf'), '--sweep', str(table),
+                '-o', str(out)]
+        with patch('sys.argv', argv), patch('sys.stdout'):
+            with self.assertRaises(SystemExit) as cm:
+                cli_main()
+        self.assertEqual(cm.exception.code, 0)
+        with open(out / 'dev.json', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['Port'], 1080.0)
+        with open(out / 'prod.json', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['Port'], 8080.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from config.api import loads
+from config.evaluator import Evaluator
+from config.formats import FORMATS, encode_compact, read_output, write_output
+from config.lazy import load_lazy
+from config.lexer import Lexer
+from config.optimizer import Optimizer
+from config.parser import Parser
+from config.pipeline import compile_source, prepare_ast
+from config.templates import StructOverlay, to_plain
+from config.writer import encode_value
+
+BASE = ('Port := 80;\n'
+        'Server := struct { Host = "localhost", Port = Port, Tls = struct { On = 0 }, Tags = [1, 2] };\n')
+
+
+def evaluate_shared(source):
+    return Evaluator(share_structs=True).evaluate(Parser(Lexer(source).tokenize()).parse())
+
+
+class TestTemplates(unittest.TestCase):
+    def test_instances_override_fields(self):
+        source = (BASE + 'Fast := Server { Port = 8080 };\n'
+                  'struct { A = Server { Host = "a", Extra = 1 }, B = Fast { Tls = struct { On = 1 } } }')
+        expected = {
+            'A': {'Host': 'a', 'Port': 80.0, 'Tls': {'On': 0.0}, 'Tags': [1.0, 2.0], 'Extra': 1.0},
+            'B': {'Host': 'localhost', 'Port': 8080.0, 'Tls': {'On': 1.0}, 'Tags': [1.0, 2.0]},
+        }
+        shared = evaluate_shared(source)
+        self.assertEqual(shared, expected)
+        self.assertIsInstance(shared['A'], StructOverlay)
+        # Без share_structs экземпляр - обычный dict, готовый для json
+        data = compile_source(source)
+        self.assertEqual(data, expected)
+        self.assertIs(type(data['B']), dict)
+        self.assertIs(type(data['B']['Tls']), dict)
+        self.assertEqual(json.loads(json.dumps(data)), expected)
+        # Новые поля идут после полей шаблона, заменённые остаются на своих местах
+        self.assertEqual(list(data['A']), ['Host', 'Port', 'Tls', 'Tags', 'Extra'])
+        self.assertEqual(list(shared['A']), ['Host', 'Port', 'Tls', 'Tags', 'Extra'])
+
+    def test_template_body_is_evaluated_once(self):
+        source = BASE + 'struct { ' + ', '.join(f'I{i} = Server {{ Port = {i} }}' for i in range(50)) + ' }'
+        ast = Parser(Lexer(source).tokenize()).parse()
+        evaluator = Evaluator(share_structs=True)
+        data = evaluator.evaluate(ast)
+        self.assertEqual(evaluator.instances, 50)
+        self.assertIs(data['I0']._base, data['I49']._base)
+        self.assertEqual(data['I7']['Port'], 7.0)
+
+    def test_copy_on_write(self):
+        data = evaluate_shared(BASE + 'struct { A = Server { Host = "a" }, B = Server { Host = "b" } }')
+        a, b = data['A'], data['B']
+        a['Port'] = 1
+        a['Tls']['On'] = 1
+        a['Tags'].append(3)
+        del a['Host']
+        self.assertEqual(a, {'Port': 1, 'Tls': {'On': 1}, 'Tags': [1.0, 2.0, 3]})
+        self.assertEqual(b, {'Host': 'b', 'Port': 80.0, 'Tls': {'On': 0.0}, 'Tags': [1.0, 2.0]})
+        self.assertEqual(len(a), 3)
+        self.assertNotIn('Host', a)
+        with self.assertRaises(KeyError):
+            a['Host']
+        with self.assertRaises(KeyError):
+            del a['Host']
+        a['Host'] = 'again'
+        self.assertEqual(list(a), ['Host', 'Port', 'Tls', 'Tags'])
+
+    def test_serialization(self):
+        data = evaluate_shared(BASE + 'Pair := struct { X = Server { Port = 1 } };\n'
+                               'struct { P = Pair, S = Server { Host = "s" } }')
+        plain = to_plain(data)
+        self.assertIs(type(plain['P']['X']), dict)
+        self.assertIs(type(plain['S']['Tls']), dict)
+        self.assertEqual(plain, data)
+        self.assertEqual(encode_compact(data), encode_compact(plain))
+        self.assertEqual(encode_value(data['S'], 0), encode_value(plain['S'], 0))
+        self.assertEqual(loads(BASE + 'struct { S = Server { Host = "s" } }', copy=True)['S']['Host'], 's')
+
+    def test_lazy_and_optimized(self):
+        source = 'K := 2;\n' + BASE + 'struct { S = Server { Port = .[K 3 *]., Host = K } }'
+        config = load_lazy(source, Optimizer())
+        self.assertEqual(config['S']['Port'], 6.0)
+        self.assertEqual(config.to_dict()['S']['Host'], 2.0)
+
+    def test_deeply_nested_instances(self):
+        depth = 5000
+        source = 'T := struct { A = 0 }; struct { X = ' + 'T { A = ' * depth + '1' + ' }' * depth + ' }'
+        node = Parser(Lexer(source).tokenize()).parse()['root'].fields['X']
+        for _ in range(depth):
+            self.assertEqual(node.name, 'T')
+            node = node.overrides.fields['A']
+        self.assertEqual(node.value, 1.0)
+
+        def check_depth(data):
+            value = data['X']
+            for _ in range(depth):
+                self.assertEqual(list(value), ['A'])
+                value = value['A']
+            self.assertEqual(value, 1.0)
+
+        # Оптимизатор и вычислитель тоже не упираются в предел рекурсии
+        ast = Optimizer().optimize(Parser(Lexer(source).tokenize()).parse())
+        check_depth(Evaluator().evaluate(ast))
+        check_depth(compile_source(source))
+        check_depth(loads(source))
+        temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        for output_format, suffix in FORMATS.items():
+            with self.subTest(format=output_format):
+                output_path = temp_dir / f'deep{suffix}'
+                write_output(prepare_ast(source), output_path, output_format)
+                if output_format == 'json':
+                    text = output_path.read_text(encoding='utf-8')
+                    self.assertEqual(text.count('"A": {'), depth - 1)
+                elif output_format == 'compact':
+                    self.assertEqual(output_path.read_bytes(),
+                                     b'{"X":' + b'{"A":' * depth + b'1.0' + b'}' * (depth + 1))
+                else:
+                    check_depth(read_output(output_path, output_format))
+        self.assertEqual(compile_source('T := struct { A = 0, B = 2 }; struct { X = T { A = T { A = T { B = 3 } } } }'),
+                         {'X': {'A': {'A': {'A': 0.0, 'B': 3.0}, 'B': 2.0}, 'B': 2.0}})
+
+    def test_errors(self):
+        with self.assertRaisesRegex(NameError, "Undefined constant 'Missing'"):
+            compile_source('struct { A = Missing { X = 1 } }')
+        with self.assertRaisesRegex(TypeError, "'Port' is not a struct"):
+            compile_source('Port := 1; struct { A = Port { X = 1 } }')
+        with self.assertRaises(SyntaxError):
+            compile_source(BASE + 'struct { A = Server { Port } }')
+
+
+if __name__ == '__main__':
+    unittest.main()
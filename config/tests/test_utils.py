@@ -0,0 +1,20 @@
+import unittest
+from config.utils import LineIndex, remove_comments
+
+
+class TestUtils(unittest.TestCase):
+    def test_line_index(self):
+        index = LineIndex('ab\nc\n\nЁж')
+        self.assertEqual(index.location(0), (1, 1))
+        self.assertEqual(index.location(2), (1, 3))
+        self.assertEqual(index.location(3), (2, 1))
+        self.assertEqual(index.location(5), (3, 1))
+        self.assertEqual(index.location(7), (4, 2))
+        self.assertEqual(index.location(8), (4, 3))
+
+    def test_remove_comments(self):
+        self.assertEqual(remove_comments('A <# x\ny #>B'), 'A B')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import contextlib
+import importlib.util
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from config import vector
+from config.lexer import Lexer
+from config.parser import Parser
+from config.evaluator import Evaluator
+
+SOURCE = '''
+Levels := [1, 2, 3, 4.5];
+Bonus := [10, 20, 30, 40];
+Base := 2;
+struct {
+    Raw = Levels,
+    Scaled = .[Levels Base *].,
+    Sum = .[Levels Bonus + 3 /].,
+    Diff = .[100 Levels -].,
+    Mod = .[Bonus 7 mod].,
+    Roots = .[Bonus sqrt].,
+    Empty = [],
+    Mixed = [Base, .[Base 1 +]., 7]
+}
+'''
+
+
+def evaluate(text):
+    return Evaluator().evaluate(Parser(Lexer(text).tokenize()).parse())
+
+
+@contextlib.contextmanager
+def python_only():
+    # Принудительно используем реализацию на чистом Python
+    with patch.multiple(vector, numpy=None, ARRAY_TYPES=(list,)), \
+            patch('config.expressions.ARRAY_TYPES', (list,)):
+        yield
+
+
+class TestVector(unittest.TestCase):
+    def test_python_fallback(self):
+        with python_only():
+            result = evaluate(SOURCE)
+
+        self.assertEqual(result['Raw'], [1.0, 2.0, 3.0, 4.5])
+        self.assertEqual(result['Scaled'], [2.0, 4.0, 6.0, 9.0])
+        self.assertEqual(result['Sum'], [11 / 3, 22 / 3, 11.0, 44.5 / 3])
+        self.assertEqual(result['Diff'], [99.0, 98.0, 97.0, 95.5])
+        self.assertEqual(result['Mod'], [3.0, 6.0, 2.0, 5.0])
+        self.assertEqual(result['Empty'], [])
+        self.assertEqual(result['Mixed'], [2.0, 3.0, 7.0])
+
+    @unittest.skipUnless(importlib.util.find_spec('numpy'), 'NumPy is not installed')
+    def test_numpy_matches_fallback(self):
+        with python_only():
+            expected = evaluate(SOURCE)
+        # Короткие массивы тоже через NumPy
+        with patch.object(vector, 'VECTORIZE_MIN', 0):
+            result = evaluate(SOURCE)
+
+        self.assertIsNotNone(vector.numpy)
+        self.assertEqual(result, expected)
+        self.assertTrue(all(type(item) is float for item in result['Roots']))
+
+    def test_numpy_not_imported_on_startup(self):
+        # Импорт NumPy стоит десятков миллисекунд на каждый запуск CLI
+        code = ('import sys, config.main; from config.pipeline import compile_source; '
+                'compile_source("A := [1, 2]; struct { B = .[A 2 *]. }"); '
+                'print("numpy" in sys.modules, "asyncio" in sys.modules)')
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                check=True, cwd=Path(__file__).parent.parent.parent).stdout
+        self.assertEqual(output.split(), ['False', 'False'])
+
+    def test_errors(self):
+        for context in (python_only(), contextlib.nullcontext()):
+            with context:
+                with self.assertRaisesRegex(ValueError, 'Array length mismatch'):
+                    evaluate('A := [1, 2]; B := [1, 2, 3]; struct { C = .[A B +]. }')
+                with self.assertRaises(ZeroDivisionError):
+                    evaluate('A := [1, 0]; struct { C = .[1 A /]. }')
+                with self.assertRaisesRegex(ValueError, 'Negative number in sqrt'):
+                    evaluate('A := [1, -4]; struct { C = .[A sqrt]. }')
+
+        with self.assertRaises(TypeError):
+            evaluate('S := "text"; struct { C = [1, S] }')
+        with self.assertRaises(SyntaxError):
+            evaluate('struct { C = [1, [2]] }')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from config.watch import Watcher
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.src = self.temp_dir / 'src'
+        self.src.mkdir()
+        self.log = []
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write(self, name, text, mtime):
+        path = self.src / name
+        path.write_text(text, encoding='utf-8')
+        os.utime(path, ns=(mtime, mtime))
+        return path
+
+    def read_output(self, name):
+        with open(self.temp_dir / 'out' / name, encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_recompiles_only_changed_files(self):
+        self.write('a.conf', 'struct { A = 1 }', 1)
+        self.write('b.conf', 'struct { B = 1 }', 1)
+        watcher = Watcher(str(self.src), str(self.temp_dir / 'out'), batch=True,
+                          debounce=0.3, log=self.log.append)
+        self.assertEqual(len(watcher.build()), 2)
+        self.assertEqual(watcher.poll(now=10.0), [])
+
+        self.write('a.conf', 'struct { A = 2 }', 2)
+        # Изменение ещё не "устоялось" - ждём debounce
+        self.assertEqual(watcher.poll(now=20.0), [])
+        self.write('a.conf', 'struct { A = 3 }', 3)
+        self.assertEqual(watcher.poll(now=20.2), [])
+
+        results = watcher.poll(now=20.6)
+        self.assertEqual([Path(r.input_path).name for r in results], ['a.conf'])
+        self.assertEqual(self.read_output('a.json'), {'A': 3.0})
+        self.assertIn('ms', self.log[-1])
+
+    def test_new_files_and_errors(self):
+        self.write('a.conf', 'struct { A = 1 }', 1)
+        watcher = Watcher(str(self.src), str(self.temp_dir / 'out'), batch=True,
+                          debounce=0, log=self.log.append)
+        watcher.build()
+
+        self.write('c.conf', 'struct { C = 1', 1)
+        results = watcher.poll(now=1.0)
+        self.assertEqual(len(results), 1)
+        self.assertFalse(results[0].ok)
+        self.assertTrue(self.log[-1].startswith('FAIL'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from config.ast import *
+from config.evaluator import Evaluator
+from config.pipeline import parse_source
+from config.writer import dump_events, write_events
+
+
+def render(ast):
+    f = io.StringIO()
+    dump_events(Evaluator().iter_events(ast), f)
+    return f.getvalue()
+
+
+class TestWriter(unittest.TestCase):
+    EXAMPLES_DIR = Path(__file__).parent / 'examples'
+
+    def test_matches_json_dump_on_examples(self):
+        for name in ('character.conf', 'physics.conf', 'server.conf'):
+            with open(self.EXAMPLES_DIR / name, encoding='utf-8') as f:
+                ast = parse_source(f)
+            expected = json.dumps(Evaluator().evaluate(ast), indent=2, ensure_ascii=False)
+            self.assertEqual(render(ast), expected, name)
+
+    def test_empty_structs_and_special_values(self):
+        root = Struct({
+            'Empty': Struct(),
+            'Nested': Struct({'Inner': Struct()}),
+            'Count': Number(42),
+            'Inf': ConstExpression(['1e308', '10', '*']),
+            'Text': String('Кавычки "и" \\ слеш\n\t'),
+            'List': Array([Number(1), Number(2.5)]),
+            'EmptyList': Array(),
+        })
+        ast = {'consts': [], 'root': root}
+        expected = json.dumps(Evaluator().evaluate(ast), indent=2, ensure_ascii=False)
+        self.assertEqual(render(ast), expected)
+        self.assertEqual(render({'consts': [], 'root': Struct()}), '{}')
+
+    def test_error_leaves_no_output(self):
+        temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        root = Struct({'A': Number(1), 'B': ConstExpression(['1', '0', '/'])})
+
+        with self.assertRaises(ZeroDivisionError):
+            write_events(Evaluator().iter_events({'consts': [], 'root': root}), temp_dir / 'out.json')
+        self.assertEqual(list(temp_dir.iterdir()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
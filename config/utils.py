@@ -1,6 +1,23 @@
 import re
+from bisect import bisect_right
 
 def remove_comments(text):
     """Удаляет многострочные комментарии из текста"""
     pattern = r'<#.*?#>'
-    return re.sub(pattern, '', text, flags=re.DOTALL)
\ No newline at end of file
+    return re.sub(pattern, '', text, flags=re.DOTALL)
+
+
+class LineIndex:
+    """Перевод смещения в тексте в (строка, столбец), оба считаются с 1.
+
+    Смещения начал строк вычисляются один проход по тексту, а каждый запрос -
+    двоичный поиск, поэтому тысячи ошибок не требуют повторного просмотра текста.
+    """
+
+    def __init__(self, text):
+        self.line_starts = [0]
+        self.line_starts.extend(match.end() for match in re.finditer('\n', text))
+
+    def location(self, offset):
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
@@ -0,0 +1,125 @@
+"""Поэлементные операции над массивами в постфиксных выражениях.
+
+Если установлен NumPy, операция над длинным массивом выполняется одним векторным
+вызовом, иначе - списковым включением на чистом Python. NumPy импортируется только
+при первой такой операции: импорт стоит десятки миллисекунд, а большинству
+конфигураций не нужен вовсе. Результаты обоих путей совпадают: элементы всегда
+приводятся к float (IEEE double), а ошибки проверяются заранее и возбуждаются
+те же, что и для скаляров.
+"""
+import math
+import operator
+
+_NOT_LOADED = object()
+# Модуль NumPy, None - не установлен, _NOT_LOADED - ещё не импортировался
+numpy = _NOT_LOADED
+# Массивы короче считаются на чистом Python: преобразование в ndarray и обратно
+# окупается только на длинных
+VECTORIZE_MIN = 64
+
+# Типы значений-массивов; ndarray добавляется при импорте NumPy
+ARRAY_TYPES = {list}
+
+_PYTHON_BINARY = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    'mod': operator.mod,
+}
+_NUMPY_BINARY = {}
+
+
+def _load_numpy():
+    # Импорт NumPy при первой векторной операции; None - не установлен
+    global numpy
+    if numpy is _NOT_LOADED:
+        try:
+            import numpy as module
+        except ImportError:  # NumPy - необязательный ускоритель
+            module = None
+        if module is not None:
+            _NUMPY_BINARY.update({
+                '+': module.add,
+                '-': module.subtract,
+                '*': module.multiply,
+                '/': module.true_divide,
+                # numpy.remainder, как и оператор %, берёт знак делителя
+                'mod': module.remainder,
+            })
+            ARRAY_TYPES.add(module.ndarray)
+        numpy = module
+    return numpy
+
+
+def _use_numpy(*operands):
+    # ndarray уже получен из NumPy; список - если он достаточно длинный
+    for value in operands:
+        value_type = type(value)
+        if value_type is list:
+            if len(value) >= VECTORIZE_MIN:
+                return _load_numpy() is not None
+        elif value_type in ARRAY_TYPES:
+            return True
+    return False
+
+
+def is_array(value):
+    return type(value) in ARRAY_TYPES
+
+
+def to_list(value):
+    """Массив (список или ndarray) -> список float для вывода в JSON"""
+    if type(value) is not list:
+        return value.tolist()
+    return [float(item) for item in value]
+
+
+def _check_lengths(a, b):
+    if is_array(a) and is_array(b) and len(a) != len(b):
+        raise ValueError(f"Array length mismatch: {len(a)} and {len(b)}")
+
+
+def _has_zero(value):
+    if is_array(value):
+        return any(item == 0 for item in value)
+    return value == 0
+
+
+def binary(token, a, b):
+    """Поэлементная операция; хотя бы один из операндов - массив, второй может быть числом"""
+    _check_lengths(a, b)
+
+    if _use_numpy(a, b):
+        x = numpy.asarray(a, dtype=float)
+        y = numpy.asarray(b, dtype=float)
+        if token in ('/', 'mod') and not y.all():
+            raise ZeroDivisionError("Division by zero")
+        with numpy.errstate(all='ignore'):
+            return _NUMPY_BINARY[token](x, y)
+
+    if token in ('/', 'mod') and _has_zero(b):
+        raise ZeroDivisionError("Division by zero")
+    op = _PYTHON_BINARY[token]
+    if is_array(a) and is_array(b):
+        return [op(float(x), float(y)) for x, y in zip(a, b)]
+    if is_array(a):
+        b = float(b)
+        return [op(float(x), b) for x in a]
+    a = float(a)
+    return [op(a, float(y)) for y in b]
+
+
+def unary(token, a):
+    if token != 'sqrt':
+        raise ValueError(f"Unknown operator '{token}'")
+
+    if _use_numpy(a):
+        x = numpy.asarray(a, dtype=float)
+        if (x < 0).any():
+            raise ValueError("Negative number in sqrt")
+        return numpy.sqrt(x)
+
+    if any(item < 0 for item in a):
+        raise ValueError("Negative number in sqrt")
+    return [math.sqrt(float(x)) for x in a]
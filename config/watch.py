@@ -0,0 +1,121 @@
+import os
+import time
+from pathlib import Path
+from config.batch import collect_inputs, output_path_for, compile_file
+from config.formats import DEFAULT_FORMAT
+
+DEFAULT_INTERVAL = 0.5
+DEFAULT_DEBOUNCE = 0.3
+
+
+class Watcher:
+    """Следит за входными файлами опросом mtime и размера и перекомпилирует изменённые.
+
+    Процесс живёт всё время наблюдения, поэтому импорты и скомпилированные
+    регулярные выражения не пересоздаются. Серия быстрых правок одного файла
+    (например, сохранение редактором через временный файл) даёт одну
+    перекомпиляцию: файл собирается, когда его состояние не меняется debounce секунд.
+    В состояние файла входят и файлы, включённые им через include.
+    """
+
+    def __init__(self, source, output, batch=False, cache=None,
+                 interval=DEFAULT_INTERVAL, debounce=DEFAULT_DEBOUNCE, log=print,
+                 output_format=DEFAULT_FORMAT):
+        self.source = source
+        self.output = output
+        self.batch = batch
+        self.cache = cache
+        self.interval = interval
+        self.debounce = debounce
+        self.log = log
+        self.output_format = output_format
+        self._known = {}    # путь -> сигнатура последней скомпилированной версии
+        self._pending = {}  # путь -> (сигнатура, момент её появления)
+        self._dependencies = {}  # путь -> включённые файлы последней сборки
+
+    def _targets(self):
+        if not self.batch:
+            return {Path(self.source): Path(self.output)}
+        # Каталог или шаблон пересматривается на каждом опросе, чтобы увидеть новые файлы
+        base_dir, inputs = collect_inputs(self.source)
+        return {path: output_path_for(path, base_dir, self.output, self.output_format) for path in inputs}
+
+    def _scan(self):
+        current = {}
+        for path, output in self._targets().items():
+            signature = self._signature(path)
+            if signature is not None:
+                current[path] = (signature, output)
+        return current
+
+    def _signature(self, path):
+        own = _file_signature(path)
+        if own is None:
+            return None
+        return (own,) + tuple(_file_signature(dependency)
+                              for dependency in self._dependencies.get(path, ()))
+
+    def build(self):
+        """Первичная сборка всех файлов"""
+        results = []
+        for path, (signature, output) in self._scan().items():
+            self._known[path] = signature
+            results.append(self._compile(path, output))
+        return results
+
+    def poll(self, now=None):
+        """Один шаг наблюдения: возвращает результаты перекомпилированных файлов"""
+        now = time.monotonic() if now is None else now
+        current = self._scan()
+
+        for path in list(self._known):
+            if path not in current:
+                del self._known[path]
+                self._pending.pop(path, None)
+
+        for path, (signature, _) in current.items():
+            if self._known.get(path) == signature:
+                self._pending.pop(path, None)
+            elif self._pending.get(path, (None,))[0] != signature:
+                self._pending[path] = (signature, now)
+
+        results = []
+        for path, (signature, since) in list(self._pending.items()):
+            if now - since < self.debounce or path not in current:
+                continue
+            del self._pending[path]
+            self._known[path] = signature
+            results.append(self._compile(path, current[path][1]))
+        return results
+
+    def run(self):
+        self.build()
+        self.log(f"Watching '{self.source}' for changes (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(self.interval)
+                self.poll()
+        except KeyboardInterrupt:
+            self.log("Stopped watching")
+
+    def _compile(self, path, output):
+        result = compile_file(path, output, self.cache, self.output_format)
+        if self._dependencies.get(path, []) != result.dependencies:
+            # Набор включённых файлов изменился - сигнатура пересчитывается с ним
+            self._dependencies[path] = result.dependencies
+            self._known[path] = self._signature(path)
+        latency = result.seconds * 1000
+        if result.ok:
+            note = ', cached' if result.cached else ''
+            self.log(f"Compiled '{result.input_path}' -> '{result.output_path}' in {latency:.1f} ms{note}")
+        else:
+            self.log(f"FAIL '{result.input_path}' ({latency:.1f} ms): {result.error}")
+        return result
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
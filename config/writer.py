@@ -0,0 +1,157 @@
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from config.evaluator import START_STRUCT, KEY, SCALAR, END_STRUCT
+from config.templates import StructOverlay
+
+INDENT = '  '
+# Сколько фрагментов копить перед записью в файл
+FLUSH_EVERY = 4096
+
+_encode_string = json.encoder.encode_basestring
+_INFINITY = float('inf')
+
+
+def encode_scalar(value):
+    """Кодирует число или строку так же, как json.dump"""
+    if isinstance(value, str):
+        return _encode_string(value)
+    if isinstance(value, float):
+        if value != value:
+            return 'NaN'
+        if value == _INFINITY:
+            return 'Infinity'
+        if value == -_INFINITY:
+            return '-Infinity'
+        return float.__repr__(value)
+    if isinstance(value, int):
+        return int.__repr__(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_value(value, depth):
+    """Скаляр, массив чисел или структура-константа; оформление как в json.dump(indent=2)"""
+    if type(value) is dict or type(value) is StructOverlay:
+        # Значение константы-структуры уже вычислено целиком, но его вложенность
+        # не ограничена: json.dumps упёрся бы в предел рекурсии
+        return ''.join(iter_value_chunks(value, INDENT, depth))
+    if type(value) is not list:
+        return encode_scalar(value)
+    if not value:
+        return '[]'
+    separator = ',\n' + INDENT * (depth + 1)
+    items = separator.join(encode_scalar(item) for item in value)
+    return f"[\n{INDENT * (depth + 1)}{items}\n{INDENT * depth}]"
+
+
+def iter_value_chunks(value, indent=None, depth=0):
+    """Фрагменты JSON уже вычисленного значения любой вложенности.
+
+    indent=None - компактно, как json.dumps(separators=(',', ':')); иначе оформление
+    как у json.dumps(indent=len(indent)), сдвинутое на depth уровней.
+    """
+    key_separator = ':' if indent is None else ': '
+    stack = []
+    # Открытый контейнер: [итератор пар (ключ, значение), были ли элементы, закрывающая скобка];
+    # внешний кадр без скобки содержит само value
+    frame = [iter(((None, value),)), False, None]
+    while True:
+        for key, item in frame[0]:
+            if frame[2] is not None:
+                prefix = ',' if frame[1] else ''
+                frame[1] = True
+                if indent is not None:
+                    prefix += '\n' + indent * (depth + len(stack))
+                if key is not None:
+                    prefix += _encode_string(key) + key_separator
+                yield prefix
+            item_type = type(item)
+            if item_type is dict or item_type is StructOverlay:
+                yield '{'
+                pairs = item.raw_items() if item_type is StructOverlay else item.items()
+                stack.append(frame)
+                frame = [iter(pairs), False, '}']
+                break
+            if item_type is list or item_type is tuple:
+                yield '['
+                stack.append(frame)
+                frame = [((None, element) for element in item), False, ']']
+                break
+            yield encode_scalar(item)
+        else:
+            closing = frame[2]
+            if closing is None:
+                return
+            if frame[1] and indent is not None:
+                yield '\n' + indent * (depth + len(stack) - 1) + closing
+            else:
+                yield closing
+            frame = stack.pop()
+
+
+def iter_json_chunks(events):
+    """Превращает события вычислителя в фрагменты текста.
+
+    Формат байт в байт совпадает с json.dump(..., indent=2, ensure_ascii=False).
+    """
+    depth = 0
+    # Для каждой открытой структуры: были ли в ней уже поля
+    has_fields = []
+    for event, value in events:
+        if event == KEY:
+            prefix = ',\n' if has_fields[-1] else '\n'
+            has_fields[-1] = True
+            yield f"{prefix}{INDENT * depth}{_encode_string(value)}: "
+        elif event == SCALAR:
+            yield encode_value(value, depth)
+        elif event == START_STRUCT:
+            depth += 1
+            has_fields.append(False)
+            yield '{'
+        elif event == END_STRUCT:
+            depth -= 1
+            yield f"\n{INDENT * depth}}}" if has_fields.pop() else '}'
+        else:
+            raise ValueError(f"Unknown event: {event!r}")
+
+
+def dump_events(events, f):
+    parts = []
+    for chunk in iter_json_chunks(events):
+        parts.append(chunk)
+        if len(parts) >= FLUSH_EVERY:
+            f.write(''.join(parts))
+            parts.clear()
+    f.write(''.join(parts))
+
+
+def write_events(events, output_path):
+    """Пишет поток событий в файл через временный файл.
+
+    Ошибка вычисления посреди документа не оставляет недописанный выходной файл.
+    """
+    with atomic_output(output_path) as f:
+        dump_events(events, f)
+
+
+@contextmanager
+def atomic_output(output_path, binary=False):
+    """Файл для записи, который появляется под именем output_path только целиком"""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    try:
+        if binary:
+            with open(temp_path, 'wb') as f:
+                yield f
+        else:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                yield f
+        os.replace(temp_path, output_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise